@@ -0,0 +1,227 @@
+"""
+Admission control for gateway-bound views.
+
+When GMO slows down, every request holds a worker thread for as long as the
+gateway takes to answer, and new requests keep arriving. Each endpoint group
+(``transactions``, ``payment_methods``) lets at most ``concurrency`` POST
+requests run at once per process; up to ``queue`` more wait for a slot, in
+priority order, for at most ``max_wait`` seconds. Everything beyond that is
+answered at once with ``503`` and ``Retry-After``, so the worker stays
+responsive (health checks, reads and the other group keep being served)
+instead of collapsing under a backlog it can never clear.
+
+Views declare their group and priority with ``admission_group`` and
+``admission_priority``. Requests that settle money already in flight
+(capture, 3-D Secure finalization, amount updates, cancels) are admitted
+before reads, and reads before new charges and card registrations. When the
+queue is full, a new request displaces the lowest-priority waiter if it
+outranks it.
+
+Running and waiting requests are exposed as ``admission.<group>.*`` gauges
+and counters at ``/health/metrics``, queue waits under ``admission_wait``.
+"""
+import asyncio
+from dataclasses import dataclass
+import enum
+from functools import cache, lru_cache
+import heapq
+import itertools
+import threading
+import time
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+from GMOPayment import metrics
+
+
+class Priority(enum.IntEnum):
+    """Admission order of waiting requests; lower values go first"""
+
+    SETTLE = 0  # capture, finalize, update and cancel of orders already authorized
+    READ = 1
+    NEW = 2  # new charges, tokens and card registrations
+
+
+WAITING, ADMITTED, SHED = "waiting", "admitted", "shed"
+
+GATED_METHODS = frozenset({"POST"})
+
+
+def _resolve_future(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Waiter:
+    """A queued request, woken from a thread (``Event``) or an event loop (``Future``)"""
+
+    __slots__ = ("priority", "sequence", "state", "event", "loop", "future")
+
+    def __init__(self, priority: int, sequence: int, loop: asyncio.AbstractEventLoop | None = None):
+        self.priority = priority
+        self.sequence = sequence
+        self.state = WAITING
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def __lt__(self, other: '_Waiter') -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+    def wake(self, state: str) -> None:
+        self.state = state
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve_future, self.future)
+
+
+class AdmissionGroup:
+    """Concurrency limit plus bounded priority queue for one endpoint group"""
+
+    def __init__(self, name: str, concurrency: int, queue: int = 0, max_wait: float = 0.0):
+        if concurrency < 1:
+            raise ValueError(f"Admission group {name!r} needs a concurrency of at least 1")
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.max_wait = max_wait
+        self._running = 0
+        self._waiters: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"admission.{self.name}.running", self._running)
+        metrics.set_gauge(f"admission.{self.name}.waiting", len(self._waiters))
+
+    def _enter(self, priority: int, loop: asyncio.AbstractEventLoop | None) -> bool | _Waiter:
+        """Admit at once (``True``), shed (``False``) or queue the request (a ``_Waiter``)"""
+        with self._lock:
+            if self._running < self.concurrency and not self._waiters:
+                self._running += 1
+                self._publish()
+                metrics.increment(f"admission.{self.name}.admitted")
+                return True
+            if len(self._waiters) >= self.queue:
+                lowest = max(self._waiters, default=None)
+                if lowest is None or lowest.priority <= priority:
+                    metrics.increment(f"admission.{self.name}.shed.full")
+                    return False
+                self._waiters.remove(lowest)
+                heapq.heapify(self._waiters)
+                lowest.wake(SHED)
+                metrics.increment(f"admission.{self.name}.shed.displaced")
+            waiter = _Waiter(priority, next(self._sequence), loop)
+            heapq.heappush(self._waiters, waiter)
+            self._publish()
+            metrics.increment(f"admission.{self.name}.queued")
+            return waiter
+
+    def _finish(self, waiter: _Waiter, started: float) -> bool:
+        """Settle a wait that ended; a waiter admitted just as it timed out keeps its slot"""
+        with self._lock:
+            if waiter.state == WAITING:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                waiter.state = SHED
+                self._publish()
+                metrics.increment(f"admission.{self.name}.shed.timeout")
+        metrics.admission_wait.record(self.name, time.monotonic() - started)
+        if waiter.state == ADMITTED:
+            metrics.increment(f"admission.{self.name}.admitted")
+            return True
+        return False
+
+    def acquire(self, priority: int = Priority.NEW) -> bool:
+        """Take a slot, waiting up to ``max_wait`` seconds; ``False`` means the request is shed"""
+        entry = self._enter(priority, None)
+        if not isinstance(entry, _Waiter):
+            return entry
+        started = time.monotonic()
+        entry.event.wait(self.max_wait)
+        return self._finish(entry, started)
+
+    async def acquire_async(self, priority: int = Priority.NEW) -> bool:
+        """``acquire`` for the event loop; waiting holds no thread"""
+        entry = self._enter(priority, asyncio.get_running_loop())
+        if not isinstance(entry, _Waiter):
+            return entry
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(entry.future, self.max_wait)
+        except TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # The client went away; hand on a slot granted in the meantime
+            if self._finish(entry, started):
+                self.release()
+            raise
+        return self._finish(entry, started)
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the first waiter if there is one"""
+        with self._lock:
+            if self._waiters:
+                heapq.heappop(self._waiters).wake(ADMITTED)
+            else:
+                self._running -= 1
+            self._publish()
+
+
+@dataclass(frozen=True, slots=True)
+class AdmissionPolicy:
+    enabled: bool = True
+    groups: tuple[tuple[str, int, int, float], ...] = ()  # (name, concurrency, queue, max_wait)
+    retry_after: int = 1
+
+    @classmethod
+    def from_settings(cls) -> 'AdmissionPolicy':
+        gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+        return cls(
+            enabled=gmo_settings.get("admission_enabled", True),
+            groups=tuple(
+                (name, int(limits["concurrency"]), int(limits.get("queue", 0)), float(limits.get("max_wait", 0.0)))
+                for name, limits in (gmo_settings.get("admission_groups") or {}).items()
+            ),
+            retry_after=gmo_settings.get("admission_retry_after", 1),
+        )
+
+
+class AdmissionController:
+    """Maps requests to their endpoint group and priority"""
+
+    def __init__(self, policy: AdmissionPolicy | None = None):
+        self.policy = policy or AdmissionPolicy.from_settings()
+        self.groups = {name: AdmissionGroup(name, *limits) for name, *limits in self.policy.groups}
+        self._route = lru_cache(maxsize=1024)(self._route_path)
+
+    def _route_path(self, path: str) -> tuple[AdmissionGroup, int] | None:
+        try:
+            view = getattr(resolve(path).func, "view_class", None)
+        except Resolver404:
+            return None
+        group = self.groups.get(getattr(view, "admission_group", None))
+        if group is None:
+            return None
+        return group, getattr(view, "admission_priority", Priority.NEW)
+
+    def route(self, request) -> tuple[AdmissionGroup, int] | None:
+        """The group and priority gating ``request``, or ``None`` when it is not gated"""
+        if not self.policy.enabled or request.method not in GATED_METHODS:
+            return None
+        return self._route(request.path_info)
+
+
+@cache
+def get_controller() -> AdmissionController:
+    return AdmissionController()
@@ -0,0 +1,142 @@
+"""
+Incrementally maintained per-merchant daily transaction aggregates.
+
+Signal handlers keep ``MerchantDailyAggregate`` in step with ``Transaction``:
+a save moves the transaction's count and amount from the bucket it was in
+when loaded to the bucket it is in now, and a delete removes it. Buckets are
+updated with ``F()`` expressions in the same database transaction as the
+change. ``QuerySet.update()``, ``bulk_create()`` and raw SQL bypass the
+signals; run ``backfill_merchant_aggregates`` after such bulk changes.
+"""
+from collections.abc import Iterable
+from datetime import date, datetime
+from typing import Any, NamedTuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from GMOPayment.models.aggregate import MerchantDailyAggregate
+from GMOPayment.models.transaction import Transaction
+
+
+# Fields that decide a transaction's bucket and contribution
+AGGREGATED_FIELDS = frozenset({"merchant_account", "transaction_date", "created_at", "status", "job_cd", "currency", "amount"})
+
+_AGGREGATED_ATTNAMES = frozenset(Transaction._meta.get_field(name).attname for name in AGGREGATED_FIELDS)
+
+_UNKNOWN = object()
+
+
+class BucketKey(NamedTuple):
+    merchant_id: int
+    day: date
+    status: str
+    job_cd: str
+    currency: str
+
+
+def transaction_day(value: datetime | None) -> date:
+    """Local calendar day a transaction is reported under"""
+    value = value or timezone.now()
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def bucket_for(instance: Transaction) -> tuple[BucketKey, int] | None:
+    """The aggregate bucket and amount of a transaction, or ``None`` if it is not aggregated"""
+    if instance.merchant_account_id is None or instance.amount is None:
+        return None
+    key = BucketKey(
+        merchant_id=instance.merchant_account_id,
+        day=transaction_day(instance.transaction_date or instance.created_at),
+        status=instance.status,
+        job_cd=instance.job_cd,
+        currency=instance.currency,
+    )
+    return key, instance.amount
+
+
+def apply_delta(key: BucketKey, count: int, amount: int, using: str | None = None) -> None:
+    """Add ``count`` transactions and ``amount`` to a bucket, creating it if needed"""
+    buckets = MerchantDailyAggregate.objects.using(using) if using else MerchantDailyAggregate.objects
+    changes = {
+        "transaction_count": F("transaction_count") + count,
+        "total_amount": F("total_amount") + amount,
+        "updated_at": timezone.now(),
+    }
+    if buckets.filter(**key._asdict()).update(**changes):
+        return
+    try:
+        with transaction.atomic(using=using):
+            buckets.create(**key._asdict(), transaction_count=count, total_amount=amount)
+    except IntegrityError:
+        # Created concurrently since the update above
+        buckets.filter(**key._asdict()).update(**changes)
+
+
+@receiver(post_init, sender=Transaction)
+def remember_bucket(sender, instance: Transaction, **kwargs: Any) -> None:
+    if not instance.pk:
+        instance._aggregate_bucket = None
+    elif _AGGREGATED_ATTNAMES & instance.get_deferred_fields():
+        instance._aggregate_bucket = _UNKNOWN  # loaded with .only()/.defer(); resolved in pre_save
+    else:
+        instance._aggregate_bucket = bucket_for(instance)
+
+
+@receiver(pre_save, sender=Transaction)
+@receiver(pre_delete, sender=Transaction)
+def resolve_bucket(sender, instance: Transaction, raw: bool = False, using: str | None = None, **kwargs: Any) -> None:
+    if not raw and getattr(instance, "_aggregate_bucket", None) is _UNKNOWN:
+        stored = Transaction.objects.using(using).filter(pk=instance.pk).first()
+        instance._aggregate_bucket = bucket_for(stored) if stored else None
+
+
+@receiver(post_save, sender=Transaction)
+def update_aggregates_on_save(
+        sender,
+        instance: Transaction,
+        raw: bool = False,
+        using: str | None = None,
+        update_fields: frozenset[str] | None = None,
+        **kwargs: Any,
+) -> None:
+    if raw or (update_fields is not None and not AGGREGATED_FIELDS & update_fields):
+        return
+    before, after = getattr(instance, "_aggregate_bucket", None), bucket_for(instance)
+    if before == after:
+        return
+    with transaction.atomic(using=using):
+        if before is not None:
+            apply_delta(before[0], -1, -before[1], using)
+        if after is not None:
+            apply_delta(after[0], 1, after[1], using)
+    instance._aggregate_bucket = after
+
+
+@receiver(post_delete, sender=Transaction)
+def update_aggregates_on_delete(sender, instance: Transaction, using: str | None = None, **kwargs: Any) -> None:
+    if (before := getattr(instance, "_aggregate_bucket", None)) is not None:
+        apply_delta(before[0], -1, -before[1], using)
+    instance._aggregate_bucket = None
+
+
+def merchant_totals(
+        merchant_id: int,
+        since: date | None = None,
+        until: date | None = None,
+        statuses: Iterable[str] = ("SUCCESS",),
+        job_codes: Iterable[str] | None = None,
+) -> dict[str, dict[str, int]]:
+    """Transaction count and amount per currency for a merchant, read from the aggregates"""
+    buckets = MerchantDailyAggregate.objects.filter(merchant_id=merchant_id, status__in=list(statuses))
+    if since:
+        buckets = buckets.filter(day__gte=since)
+    if until:
+        buckets = buckets.filter(day__lte=until)
+    if job_codes is not None:
+        buckets = buckets.filter(job_cd__in=list(job_codes))
+    totals = buckets.values("currency").annotate(count=Sum("transaction_count"), amount=Sum("total_amount"))
+    return {row["currency"]: {"count": row["count"], "amount": row["amount"]} for row in totals.order_by("currency")}
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class GMOPaymentConfig(AppConfig):
+    name = "GMOPayment"
+    verbose_name = "GMO Payment"
+
+    def ready(self):
+        from GMOPayment import aggregates  # noqa: F401  connects the aggregate signal handlers
+
+        if settings.GMO_PAYMENT.get("warmup_on_ready"):
+            from GMOPayment.warmup import start_warm_up
+
+            start_warm_up(background=True)
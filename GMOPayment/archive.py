@@ -0,0 +1,187 @@
+"""
+Cold storage for old ``Transaction`` rows.
+
+``archive_transactions`` moves rows created and last updated before a cutoff
+out of the live table, a chunk at a time. Each chunk is written to
+``GMO_PAYMENT["archive_path"]`` as gzip-compressed NDJSON made of several
+independently compressed blocks, fsynced and renamed into place before any
+row is deleted. The rows are then indexed in ``ArchivedTransaction`` (order
+id, chunk file, block offset and length) and deleted in small batches, each
+in its own short database transaction, so no lock is held for long. A row
+updated after it was read stays live and is picked up by a later run.
+
+Archiving is not a cancellation: rows are removed with a plain ``DELETE``
+that bypasses the delete signals, so ``MerchantDailyAggregate`` keeps their
+totals. ``backfill_merchant_aggregates`` therefore leaves archived days
+alone.
+
+``find_transaction`` returns the live row for an order id and falls back to
+the archive, where a lookup is one indexed query plus one block read.
+"""
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+import gzip
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+
+from GMOPayment import metrics
+from GMOPayment.aggregates import transaction_day
+from GMOPayment.models.archive import ArchivedTransaction
+from GMOPayment.models.transaction import Transaction
+from GMOPayment.routers import PRIMARY
+
+
+CHUNK_PREFIX = "transactions-"
+CHUNK_SUFFIX = ".ndjson.gz"
+
+_FIELDS = Transaction._meta.concrete_fields
+_ATTNAMES = [field.attname for field in _FIELDS]
+_PK = Transaction._meta.pk.attname
+
+
+@dataclass(frozen=True, slots=True)
+class ArchivedChunk:
+    """Outcome of archiving one chunk"""
+
+    path: Path
+    rows: int
+    archived: int  # rows indexed and deleted; the rest changed after they were read
+    size: int
+
+
+def archive_directory() -> Path:
+    return Path(getattr(settings, "GMO_PAYMENT", {}).get("archive_path") or "archive")
+
+
+def _encode(row: dict[str, Any]) -> str:
+    return json.dumps(row, cls=DjangoJSONEncoder, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+def write_chunk(rows: list[dict[str, Any]], directory: Path, block_size: int = 500) -> tuple[Path, dict[str, tuple[int, int]]]:
+    """Write rows as gzip blocks of ``block_size`` rows; returns the file and each order id's (offset, length)"""
+    name = f"{CHUNK_PREFIX}{rows[0][_PK]:012d}-{rows[-1][_PK]:012d}-{time.time_ns()}{CHUNK_SUFFIX}"
+    locations: dict[str, tuple[int, int]] = {}
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f".{name}.")
+    try:
+        with os.fdopen(descriptor, "wb") as stream:
+            offset = 0
+            for start in range(0, len(rows), block_size):
+                block_rows = rows[start:start + block_size]
+                block = gzip.compress("".join(map(_encode, block_rows)).encode("utf-8"), compresslevel=9)
+                stream.write(block)
+                for row in block_rows:
+                    locations[row["order_id"]] = (offset, len(block))
+                offset += len(block)
+            stream.flush()
+            os.fsync(stream.fileno())
+        path = directory / name
+        os.replace(temporary, path)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
+    return path, locations
+
+
+def _delete_rows(pks: list[int], using: str) -> None:
+    """Plain DELETE: the delete signals would take archived rows out of the daily aggregates"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(Transaction._meta.db_table)} "
+            f"WHERE {quote(Transaction._meta.pk.column)} IN ({', '.join(['%s'] * len(pks))})",
+            pks,
+        )
+
+
+def _retire(batch: list[dict[str, Any]], chunk: str, locations: dict[str, tuple[int, int]], cutoff: datetime, using: str) -> int:
+    """Index and delete one batch of archived rows in a short transaction"""
+    with transaction.atomic(using=using):
+        unchanged = set(
+            Transaction.objects.using(using).select_for_update()
+            .filter(pk__in=[row[_PK] for row in batch], updated_at__lt=cutoff)
+            .values_list("pk", flat=True)
+        )
+        if not unchanged:
+            return 0
+        ArchivedTransaction.objects.using(using).bulk_create(
+            [
+                ArchivedTransaction(
+                    order_id=row["order_id"],
+                    day=transaction_day(row["transaction_date"] or row["created_at"]),
+                    chunk=chunk,
+                    offset=locations[row["order_id"]][0],
+                    length=locations[row["order_id"]][1],
+                )
+                for row in batch if row[_PK] in unchanged
+            ],
+            # An order id reused after it was archived points at its latest archived row
+            update_conflicts=True,
+            unique_fields=["order_id"],
+            update_fields=["day", "chunk", "offset", "length"],
+        )
+        _delete_rows(sorted(unchanged), using)
+    return len(unchanged)
+
+
+def archive_transactions(
+        cutoff: datetime,
+        chunk_size: int = 10000,
+        batch_size: int = 500,
+        block_size: int = 500,
+        directory: Path | None = None,
+        using: str = PRIMARY,
+) -> Iterator[ArchivedChunk]:
+    """Move transactions created and last updated before ``cutoff`` into archive chunks, oldest first"""
+    directory = directory or archive_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    candidates = Transaction.objects.using(using).filter(created_at__lt=cutoff, updated_at__lt=cutoff).order_by("pk")
+    last_pk = 0
+    while rows := list(candidates.filter(pk__gt=last_pk).values(*_ATTNAMES)[:chunk_size]):
+        last_pk = rows[-1][_PK]
+        path, locations = write_chunk(rows, directory, block_size)
+        archived = sum(
+            _retire(rows[start:start + batch_size], path.name, locations, cutoff, using)
+            for start in range(0, len(rows), batch_size)
+        )
+        metrics.increment("archive.rows", archived)
+        yield ArchivedChunk(path=path, rows=len(rows), archived=archived, size=path.stat().st_size)
+
+
+def _instance(row: dict[str, Any]) -> Transaction:
+    instance = Transaction.from_db(None, _ATTNAMES, [field.to_python(row[field.attname]) for field in _FIELDS])
+    instance.archived = True
+    return instance
+
+
+def read_archived(order_id: str, directory: Path | None = None) -> Transaction | None:
+    """The archived row for ``order_id`` as a read-only ``Transaction``, or ``None``"""
+    location = ArchivedTransaction.objects.filter(order_id=order_id).values_list("chunk", "offset", "length").first()
+    if location is None:
+        return None
+    chunk, offset, length = location
+    with open((directory or archive_directory()) / chunk, "rb") as stream:
+        stream.seek(offset)
+        block = stream.read(length)
+    for line in gzip.decompress(block).splitlines():
+        if (row := json.loads(line))["order_id"] == order_id:
+            metrics.increment("archive.hits")
+            return _instance(row)
+    return None
+
+
+def find_transaction(order_id: str) -> Transaction | None:
+    """The live transaction for ``order_id``, falling back to its archived copy"""
+    if (live := Transaction.objects.filter(order_id=order_id).first()) is not None:
+        return live
+    metrics.increment("archive.lookups")
+    return read_archived(order_id)
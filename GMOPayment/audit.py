@@ -0,0 +1,411 @@
+"""
+Append-only audit log of GMO request/response exchanges.
+
+``GMOHttpClient`` hands every exchange to ``AuditLog.record``, which only
+puts the raw pieces on a bounded queue; scrubbing, encoding, compression and
+file I/O happen on a background writer thread, so a request never waits for
+the audit trail. When the queue is full the record is dropped and counted
+under ``audit.dropped`` rather than slowing requests down.
+
+Attempts that urllib3 retries inside the connection pool never reach the
+client, so ``GMORetry`` records them through the request's ``AttemptTrail``
+(a context variable set by the client): each resent attempt gets its own
+record with its status or error. The body of a response that is discarded
+for a retry is not kept.
+
+The writer batches records into blocks. Each block is one gzip member of
+scrubbed NDJSON appended to the process's current segment
+(``audit-<opened>-<pid>-<n>.ndjson.gz``), so a segment is readable with
+``zcat`` and a crash loses at most the batch in flight. For every block a
+line is appended to the segment's sparse index (``.idx``) with the block's
+offset, length, time range and the order and access ids it contains;
+``AuditReader.find`` reads the small index files and decompresses only the
+blocks that mention the id. Segments are rotated by size and age, and
+closed segments older than the retention period are deleted.
+"""
+import atexit
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import cache
+import gzip
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+import queue
+import threading
+import time
+from typing import Any
+
+from django.conf import settings
+
+from GMOPayment import metrics
+from GMOPayment.scrubbing import scrub
+
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".ndjson.gz"
+INDEX_SUFFIX = ".idx"
+
+_STOP = object()
+
+
+@dataclass(frozen=True, slots=True)
+class AuditPolicy:
+    enabled: bool = True
+    path: Path = Path("audit")
+    segment_bytes: int = 64 * 1024 * 1024
+    segment_seconds: float = 3600.0
+    retention_days: float = 540.0  # 0 keeps segments forever
+    batch_size: int = 256
+    flush_interval: float = 1.0
+    queue_size: int = 10000
+
+    @classmethod
+    def from_settings(cls) -> 'AuditPolicy':
+        gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+        return cls(
+            enabled=gmo_settings.get("audit_enabled", True),
+            path=Path(gmo_settings.get("audit_path") or "audit"),
+            segment_bytes=gmo_settings.get("audit_segment_bytes", 64 * 1024 * 1024),
+            segment_seconds=gmo_settings.get("audit_segment_seconds", 3600.0),
+            retention_days=gmo_settings.get("audit_retention_days", 540.0),
+            batch_size=gmo_settings.get("audit_batch_size", 256),
+            flush_interval=gmo_settings.get("audit_flush_interval", 1.0),
+            queue_size=gmo_settings.get("audit_queue_size", 10000),
+        )
+
+
+def _decode(body: bytes | None) -> Any:
+    if not body:
+        return None
+    text = body.decode("utf-8", errors="replace")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _find_id(value: Any, key: str, depth: int = 3) -> str | None:
+    """First string under ``key`` in a JSON document, looking a few levels deep"""
+    if not isinstance(value, Mapping):
+        return None
+    if isinstance(found := value.get(key), str) and found:
+        return found
+    if depth:
+        for child in value.values():
+            if found := _find_id(child, key, depth - 1):
+                return found
+    return None
+
+
+def audit_document(
+        method: str,
+        endpoint: str,
+        request: Any,
+        sent_at: float,
+        elapsed: float,
+        status: int | None,
+        body: bytes | None,
+        error: str | None,
+) -> dict[str, Any]:
+    """The scrubbed record of one exchange"""
+    response = _decode(body)
+    return {
+        "at": round(sent_at, 6),
+        "method": method.upper(),
+        "endpoint": endpoint,
+        "status": status,
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "order_id": _find_id(request, "orderId") or _find_id(response, "orderId"),
+        "access_id": _find_id(request, "accessId") or _find_id(response, "accessId"),
+        "request": scrub(request),
+        "response": scrub(response),
+        "error": error,
+    }
+
+
+class _Segment:
+    """The segment and index file a writer is appending to"""
+
+    _numbers = itertools.count()
+
+    def __init__(self, directory: Path, opened_at: float):
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(opened_at))
+        stem = f"audit-{stamp}-{os.getpid()}-{next(self._numbers)}"
+        self.path = directory / f"{stem}{SEGMENT_SUFFIX}"
+        self.index_path = directory / f"{stem}{INDEX_SUFFIX}"
+        self.opened_at = opened_at
+        self._data = open(self.path, "ab")
+        self._index = open(self.index_path, "a", encoding="utf-8")
+        self.size = self._data.tell()
+
+    def append(self, block: bytes, entry: dict[str, Any]) -> None:
+        offset = self.size
+        self._data.write(block)
+        self._data.flush()
+        self.size += len(block)
+        # The index line follows its block, so every indexed offset is readable
+        self._index.write(json.dumps({"offset": offset, "length": len(block), **entry}, separators=(",", ":")) + "\n")
+        self._index.flush()
+
+    def close(self) -> None:
+        for stream in (self._data, self._index):
+            os.fsync(stream.fileno())
+            stream.close()
+
+
+class AuditLog:
+    """Queues exchanges and writes them from a background thread
+
+    The writer starts with the first record in each process, so pre-forking
+    servers get one writer and one segment per worker.
+    """
+
+    def __init__(self, policy: AuditPolicy | None = None):
+        self.policy = policy or AuditPolicy.from_settings()
+        self.queue: queue.Queue = queue.Queue(self.policy.queue_size)
+        self._segment: _Segment | None = None
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._start_lock = threading.Lock()
+
+    def record(
+            self,
+            method: str,
+            endpoint: str,
+            request: Any,
+            sent_at: float,
+            elapsed: float,
+            status: int | None = None,
+            body: bytes | None = None,
+            error: str | None = None,
+    ) -> None:
+        """Queue one exchange; never blocks"""
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait((method, endpoint, request, sent_at, elapsed, status, body, error))
+        except queue.Full:
+            metrics.increment("audit.dropped")
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child must not share the parent's queue or segment
+            self.queue = queue.Queue(self.policy.queue_size)
+            self._segment = None
+            self.policy.path.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="gmo-audit-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written"""
+        if self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stop(self) -> None:
+        """Write what is queued, close the segment and stop the writer"""
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        self.queue.put(_STOP)
+        self._thread.join()
+        self._pid = None
+
+    def _run(self) -> None:
+        batch: list[tuple] = []
+        flush_at = 0.0
+        while True:
+            try:
+                item = self.queue.get(timeout=max(flush_at - time.monotonic(), 0) if batch else None)
+            except queue.Empty:
+                item = None
+            if item is _STOP or isinstance(item, threading.Event):
+                self._write(batch)
+                batch = []
+                if item is _STOP:
+                    self._close()
+                    return
+                item.set()
+                continue
+            if item is not None:
+                if not batch:
+                    flush_at = time.monotonic() + self.policy.flush_interval
+                batch.append(item)
+                if len(batch) < self.policy.batch_size:
+                    continue
+            self._write(batch)
+            batch = []
+
+    def _write(self, batch: list[tuple]) -> None:
+        if not batch:
+            return
+        try:
+            documents, lines = [], []
+            for item in batch:
+                documents.append(document := audit_document(*item))
+                lines.append(json.dumps(document, separators=(",", ":"), ensure_ascii=False, default=str) + "\n")
+                # Yield the GIL after every record so request threads never wait out a whole batch
+                time.sleep(0)
+            payload = "".join(lines).encode("utf-8")
+            block = gzip.compress(payload, compresslevel=6)
+            keys = sorted({key for document in documents for key in (document["order_id"], document["access_id"]) if key})
+            self._current_segment().append(block, {
+                "records": len(documents),
+                "first_at": documents[0]["at"],
+                "last_at": documents[-1]["at"],
+                "keys": keys,
+            })
+        except Exception:
+            # The audit trail must never take the writer (or requests) down with it
+            logger.exception("Failed to write %d GMO audit records", len(batch))
+            metrics.increment("audit.write_errors")
+            return
+        metrics.increment("audit.records", len(documents))
+        metrics.increment("audit.bytes_raw", len(payload))
+        metrics.increment("audit.bytes_written", len(block))
+
+    def _current_segment(self) -> _Segment:
+        now = time.time()
+        segment = self._segment
+        if segment is not None and (
+                segment.size >= self.policy.segment_bytes or now - segment.opened_at >= self.policy.segment_seconds
+        ):
+            self._close()
+            segment = None
+        if segment is None:
+            segment = self._segment = _Segment(self.policy.path, now)
+            self.prune(now)
+        return segment
+
+    def _close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+            metrics.increment("audit.segments_closed")
+
+    def prune(self, now: float | None = None) -> int:
+        """Delete segments (and their indexes) last written before the retention period"""
+        if not self.policy.retention_days:
+            return 0
+        cutoff = (now or time.time()) - self.policy.retention_days * 86400
+        removed = 0
+        for path in self.policy.path.glob(f"audit-*{SEGMENT_SUFFIX}"):
+            if self._segment is not None and path == self._segment.path:
+                continue
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                path.unlink()
+                path.with_name(path.name.removesuffix(SEGMENT_SUFFIX) + INDEX_SUFFIX).unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue  # another worker pruned it first
+            removed += 1
+        if removed:
+            metrics.increment("audit.segments_pruned", removed)
+        return removed
+
+
+class AuditReader:
+    """Finds records by order or access id using the sparse block indexes"""
+
+    def __init__(self, directory: Path | None = None):
+        self.directory = Path(directory or AuditPolicy.from_settings().path)
+
+    def segments(self) -> list[Path]:
+        return sorted(self.directory.glob(f"audit-*{SEGMENT_SUFFIX}"))
+
+    def _blocks(self, segment: Path, key: str) -> Iterator[tuple[int, int]]:
+        index_path = segment.with_name(segment.name.removesuffix(SEGMENT_SUFFIX) + INDEX_SUFFIX)
+        needle = json.dumps(key)
+        try:
+            with open(index_path, encoding="utf-8") as index:
+                for line in index:
+                    # Cheap substring test first; most index lines never need parsing
+                    if needle not in line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line still being written
+                    if key in entry["keys"]:
+                        yield entry["offset"], entry["length"]
+        except FileNotFoundError:
+            return
+
+    def find(self, key: str) -> Iterator[dict[str, Any]]:
+        """Every record whose order id or access id is ``key``, oldest segment first"""
+        for segment in self.segments():
+            blocks = list(self._blocks(segment, key))
+            if not blocks:
+                continue
+            with open(segment, "rb") as data:
+                for offset, length in blocks:
+                    data.seek(offset)
+                    for line in gzip.decompress(data.read(length)).splitlines():
+                        document = json.loads(line)
+                        if key in (document["order_id"], document["access_id"]):
+                            yield document
+
+
+@cache
+def get_audit_log() -> AuditLog | None:
+    """The process-wide audit log, or ``None`` when ``GMO_PAYMENT["audit_enabled"]`` is off"""
+    policy = AuditPolicy.from_settings()
+    return AuditLog(policy) if policy.enabled else None
+
+
+@dataclass(slots=True)
+class AttemptTrail:
+    """Audit timing of the attempt a client request is on; retries start a new attempt"""
+
+    log: AuditLog
+    method: str
+    endpoint: str
+    request: Any
+    sent_at: float = field(default_factory=time.time)
+    started: float = field(default_factory=time.perf_counter)
+
+    def record(self, status: int | None = None, body: bytes | None = None, error: str | None = None) -> None:
+        elapsed = time.perf_counter() - self.started
+        self.log.record(self.method, self.endpoint, self.request, self.sent_at, elapsed, status, body, error)
+
+    def retried(self, status: int | None, error: str | None, backoff: float) -> None:
+        """Record an attempt that is about to be resent; the next one starts after ``backoff`` seconds"""
+        self.record(status, None, error)
+        self.sent_at = time.time() + backoff
+        self.started = time.perf_counter() + backoff
+
+
+_current_trail: ContextVar[AttemptTrail | None] = ContextVar("gmo_audit_trail", default=None)
+
+
+def current_trail() -> AttemptTrail | None:
+    return _current_trail.get()
+
+
+@contextmanager
+def audit_attempts(log: AuditLog | None, method: str, endpoint: str, request: Any) -> Iterator[AttemptTrail | None]:
+    """Track the attempts of one request for ``log``; yields ``None`` when auditing is off"""
+    if log is None:
+        yield None
+        return
+    trail = AttemptTrail(log, method, endpoint, request)
+    token = _current_trail.set(trail)
+    try:
+        yield trail
+    finally:
+        _current_trail.reset(token)
@@ -0,0 +1,286 @@
+"""
+Recurring billing of on-file cards.
+
+``BillingScheduler.run_once`` repeatedly claims a batch of due
+``BillingSchedule`` rows, charges them concurrently and writes the outcomes
+back. Claiming locks the rows with ``select_for_update(skip_locked=True)``
+and marks them ``claimed_until`` a lease, so several nodes (or ``--shard``
+partitions of the table) can bill in parallel without charging a schedule
+twice. Order ids are derived from the schedule, period and attempt, and the
+claim stores the order id before GMO is called; a schedule claimed again
+with that id still pending (a crash, a request GMO did not answer, or an
+outcome that could not be recorded) is looked up on GMO with ``order/inquiry`` and only charged if GMO
+never saw the order.
+
+Missed periods are not billed retroactively: after a successful charge the
+next run moves to the first period boundary after the scheduled run, so
+retries do not shift the billing date. Failed charges are retried with
+exponential backoff and the schedule is deactivated after ``max_failures``
+consecutive failures.
+"""
+import calendar
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from GMOPayment import metrics
+from GMOPayment.exceptions import GMOAPIException, GMODeadlineExceeded, GMONotFound
+from GMOPayment.models.billing import BillingSchedule
+from GMOPayment.models.payment_method import PaymentMethod
+from GMOPayment.models.transaction import Transaction
+from GMOPayment.responses import OrderResult
+from GMOPayment.services.transaction import GMOTransactionService
+
+
+logger = logging.getLogger(__name__)
+
+# order/inquiry statuses of an order that already holds the customer's money
+CHARGED_STATUSES = ("AUTHORIZED", "CAPTURED")
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Same day and time ``months`` later, clamped to the end of shorter months"""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def advance(value: datetime, interval: str, count: int) -> datetime:
+    """The run after ``value`` for a schedule interval"""
+    if interval == "DAY":
+        return value + timedelta(days=count)
+    if interval == "WEEK":
+        return value + timedelta(weeks=count)
+    if interval == "MONTH":
+        return add_months(value, count)
+    if interval == "YEAR":
+        return add_months(value, 12 * count)
+    raise ValueError(f"Unknown billing interval: {interval}")
+
+
+def scheduled_run(schedule: BillingSchedule) -> datetime:
+    """The run a schedule is billing for, whatever retry time it is due at"""
+    return schedule.scheduled_at or schedule.next_run_at
+
+
+def order_id_for(schedule: BillingSchedule) -> str:
+    return f"SUB{schedule.id}-{scheduled_run(schedule):%Y%m%d%H%M}-{schedule.failure_count}"
+
+
+def unanswered(error: Exception) -> bool:
+    """True when a request failed in transit, so GMO may have charged the order anyway"""
+    if isinstance(error, GMODeadlineExceeded):
+        return True
+    return isinstance(error, GMOAPIException) and getattr(error.detail, "code", None) in (
+        "request_timeout", "request_error"
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class Charge:
+    """A claimed schedule and the order it will be billed under"""
+
+    schedule: BillingSchedule
+    order_id: str
+    card: PaymentMethod | None
+    # The order id was already pending from an earlier claim, so GMO may have charged it
+    resumed: bool = False
+
+
+class ChargeUnresolved(Exception):
+    """GMO could not tell whether a resumed charge went through; the schedule is left pending"""
+
+
+@dataclass(slots=True)
+class BillingStats:
+    claimed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    # Charges left pending for the next run: unresolved on GMO or not recorded locally
+    deferred: int = 0
+
+    def summary(self) -> str:
+        return f"{self.claimed} claimed, {self.succeeded} charged, {self.failed} failed, {self.deferred} deferred"
+
+
+class BillingScheduler:
+    """Claims due schedules in batches and charges them with bounded concurrency"""
+
+    def __init__(
+            self,
+            service: GMOTransactionService | None = None,
+            concurrency: int = 8,
+            batch_size: int = 100,
+            shard: tuple[int, int] | None = None,
+            lease: timedelta = timedelta(minutes=10),
+            retry_delay: timedelta = timedelta(hours=1),
+            max_failures: int = 5,
+    ):
+        self.service = service or GMOTransactionService()
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.shard = shard
+        self.lease = lease
+        self.retry_delay = retry_delay
+        self.max_failures = max_failures
+
+    def due(self, now: datetime):
+        schedules = BillingSchedule.objects.filter(is_active=True, next_run_at__lte=now).filter(
+            Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+        )
+        if self.shard is not None:
+            index, count = self.shard
+            schedules = schedules.alias(shard=Mod("id", count)).filter(shard=index)
+        return schedules
+
+    def claim(self, now: datetime, exclude: Collection[int] = ()) -> list[Charge]:
+        """Lock and lease the next batch of due schedules, storing the order id each will be charged under"""
+        with transaction.atomic():
+            schedules = list(
+                self.due(now)
+                .exclude(id__in=exclude)
+                .select_for_update(skip_locked=True, of=("self",))
+                .select_related("member", "payment_method", "merchant_account")
+                .order_by("next_run_at", "id")[:self.batch_size]
+            )
+            if not schedules:
+                return []
+            resumed = {schedule.id for schedule in schedules if schedule.pending_order_id}
+            for schedule in schedules:
+                schedule.claimed_until = now + self.lease
+                schedule.pending_order_id = schedule.pending_order_id or order_id_for(schedule)
+            BillingSchedule.objects.bulk_update(schedules, ["claimed_until", "pending_order_id"])
+
+        defaults = {
+            card.member_id: card
+            for card in PaymentMethod.objects.filter(
+                member_id__in=[schedule.member_id for schedule in schedules if schedule.payment_method is None],
+                is_default=True,
+            )
+        }
+        return [
+            Charge(
+                schedule=schedule,
+                order_id=schedule.pending_order_id,
+                card=schedule.payment_method or defaults.get(schedule.member_id),
+                resumed=schedule.id in resumed,
+            )
+            for schedule in schedules
+        ]
+
+    def _resume(self, charge: Charge) -> OrderResult | Exception | None:
+        """What GMO knows of a pending order: the order if it was charged, None if it can be charged"""
+        try:
+            order = self.service.inquiry_order(charge.order_id)
+        except GMONotFound:
+            return None
+        except Exception as error:
+            return ChargeUnresolved(f"Inquiry of pending order {charge.order_id} failed: {error}")
+        if order.order_status in CHARGED_STATUSES:
+            return order
+        # GMO keeps the order id even though nothing was charged; the next attempt uses a new one
+        return LookupError(f"Pending order {charge.order_id} is {order.order_status} on GMO.")
+
+    def _charge(self, charge: Charge) -> Any:
+        """Runs on the pool; returns the GMO result or the exception raised"""
+        if charge.resumed and (known := self._resume(charge)) is not None:
+            return known
+        if charge.card is None or not charge.card.card_id:
+            return LookupError("No card is registered for this schedule.")
+        schedule = charge.schedule
+        try:
+            merchant = schedule.merchant_account
+            return self.service.create_transaction_with_registered_payment_method(
+                charge.order_id, schedule.member.member_id, charge.card.card_id, schedule.amount, schedule.currency,
+                authorization_mode=merchant.authorization_mode if merchant else None,
+            )
+        except Exception as error:
+            if unanswered(error):
+                return ChargeUnresolved(f"No answer from GMO for order {charge.order_id}: {error}")
+            return error
+
+    def record(self, charge: Charge, outcome: Any, now: datetime) -> bool:
+        """Write the charge outcome as a Transaction and move the schedule on; returns success"""
+        schedule = charge.schedule
+        succeeded = not isinstance(outcome, Exception)
+        updates: dict[str, Any] = {"claimed_until": None, "pending_order_id": None, "last_run_at": now}
+        if succeeded:
+            next_run_at = scheduled_run(schedule)
+            while next_run_at <= now:
+                next_run_at = advance(next_run_at, schedule.interval, schedule.interval_count)
+            updates.update(next_run_at=next_run_at, scheduled_at=None, failure_count=0, last_error=None)
+        else:
+            failures = schedule.failure_count + 1
+            updates.update(
+                next_run_at=now + self.retry_delay * 2 ** (failures - 1),
+                scheduled_at=scheduled_run(schedule),
+                failure_count=failures,
+                last_error=str(outcome),
+                is_active=failures < self.max_failures,
+            )
+
+        with transaction.atomic():
+            Transaction.objects.create(
+                order_id=charge.order_id,
+                access_id=(outcome.access_id or "") if succeeded else "",
+                access_pass="",
+                amount=schedule.amount,
+                currency=schedule.currency,
+                job_cd="SALES" if succeeded and outcome.order_status == "CAPTURED" else "AUTH",
+                status="SUCCESS" if succeeded else "FAILED",
+                member_id=schedule.member_id,
+                merchant_account_id=schedule.merchant_account_id,
+                payment_method=charge.card,
+                transaction_date=now,
+                error_code=None if succeeded else str(getattr(outcome, "status_code", ""))[:10] or None,
+                error_message=None if succeeded else str(outcome),
+            )
+            BillingSchedule.objects.filter(id=schedule.id).update(**updates)
+        return succeeded
+
+    def run_once(self, now: datetime | None = None) -> BillingStats:
+        """Bill every schedule due at ``now`` that this node can claim"""
+        now = now or timezone.now()
+        stats = BillingStats()
+        deferred: set[int] = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="gmo-billing") as pool:
+            while charges := self.claim(now, exclude=deferred):
+                stats.claimed += len(charges)
+                outcomes = pool.map(lambda charge: contextvars.copy_context().run(self._charge, charge), charges)
+                for charge, outcome in zip(charges, outcomes):
+                    try:
+                        if isinstance(outcome, ChargeUnresolved):
+                            raise outcome
+                        succeeded = self.record(charge, outcome, now)
+                    except Exception:
+                        logger.exception("Recurring charge %s left pending", charge.order_id)
+                        deferred.add(charge.schedule.id)
+                        stats.deferred += 1
+                        self.release(charge)
+                        continue
+                    if succeeded:
+                        stats.succeeded += 1
+                    else:
+                        stats.failed += 1
+                        logger.warning("Recurring charge %s failed: %s", charge.order_id, outcome)
+        metrics.increment("billing.charged", stats.succeeded)
+        metrics.increment("billing.failed", stats.failed)
+        metrics.increment("billing.deferred", stats.deferred)
+        return stats
+
+    @staticmethod
+    def release(charge: Charge) -> None:
+        """Drop the lease of a charge whose outcome was not recorded; its order id stays pending"""
+        try:
+            BillingSchedule.objects.filter(id=charge.schedule.id).update(claimed_until=None)
+        except Exception:
+            logger.exception("Could not release billing schedule %s; its lease will expire", charge.schedule.id)
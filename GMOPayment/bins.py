@@ -0,0 +1,201 @@
+"""
+BIN (IIN) range index for card brand and issuer detection.
+
+``build_index`` turns a CSV of ``start,end,brand,issuer`` prefix ranges into
+a compact binary file of disjoint, sorted ranges; where source ranges
+overlap, the narrowest one wins. ``BinIndex`` memory-maps that file and
+answers lookups with a binary search over the mapped range starts, so every
+worker process shares the same page-cache copy instead of loading the table.
+
+File layout (little-endian)::
+
+    header   magic, range count, string count, string table length
+    starts   uint64[count]   first key of each range
+    ends     uint64[count]   last key of each range
+    brands   uint32[count]   string ids
+    issuers  uint32[count]   string ids
+    strings  UTF-8, NUL-separated; id 0 is the empty string
+
+Keys are the first ``KEY_DIGITS`` digits of a card number, right-padded
+with zeros, so prefixes of any length compare correctly.
+"""
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+import csv
+from dataclasses import dataclass
+from functools import cache
+import heapq
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+import tempfile
+
+from django.conf import settings
+
+
+MAGIC = b"GMOBIN01"
+HEADER = struct.Struct("<8sIII")
+KEY_DIGITS = 12
+
+
+@dataclass(frozen=True, slots=True)
+class BinRange:
+    """A source range of card number prefixes"""
+
+    start: int
+    end: int
+    brand: str
+    issuer: str
+
+
+@dataclass(frozen=True, slots=True)
+class BinInfo:
+    """What the index knows about a card number"""
+
+    brand: str | None
+    issuer: str | None
+
+
+def prefix_key(prefix: str, fill: str = "0") -> int:
+    """The key of a digit prefix; ``fill="9"`` gives the last key it covers"""
+    return int(prefix[:KEY_DIGITS].ljust(KEY_DIGITS, fill))
+
+
+def card_key(card_number: str) -> int | None:
+    """The key of a card number, masked numbers (``411111******1111``) included; ``None`` without digits"""
+    head = card_number[:KEY_DIGITS]
+    if len(head) == KEY_DIGITS and head.isascii() and head.isdigit():
+        return int(head)
+    digits = []
+    for char in card_number:
+        if not char.isdigit():
+            if char in " -":
+                continue
+            break
+        digits.append(char)
+        if len(digits) == KEY_DIGITS:
+            break
+    return prefix_key("".join(digits)) if digits else None
+
+
+def read_ranges(path: Path) -> Iterator[BinRange]:
+    """Yield ranges from a CSV with ``start``, ``end`` (optional), ``brand`` and ``issuer`` columns"""
+    from GMOPayment.services.payment_method import CARD_BRANDS
+
+    with path.open(newline="", encoding="utf-8") as stream:
+        for row in csv.DictReader(stream):
+            start = (row.get("start") or "").strip()
+            if not start.isdigit():
+                continue
+            end = (row.get("end") or "").strip() or start
+            brand = (row.get("brand") or "").strip().upper()
+            yield BinRange(
+                start=prefix_key(start),
+                end=prefix_key(end, "9"),
+                brand=CARD_BRANDS.get(brand, brand),
+                issuer=(row.get("issuer") or "").strip(),
+            )
+
+
+def flatten(ranges: Iterable[BinRange]) -> list[BinRange]:
+    """Disjoint, sorted ranges where every key maps to the narrowest source range covering it"""
+    ranges = sorted(ranges, key=lambda item: item.start)
+    bounds = sorted({item.start for item in ranges} | {item.end + 1 for item in ranges})
+    active: list[tuple[int, int, BinRange]] = []
+    flat: list[BinRange] = []
+    position = 0
+    for index, point in enumerate(bounds[:-1]):
+        while position < len(ranges) and ranges[position].start == point:
+            item = ranges[position]
+            heapq.heappush(active, (item.end - item.start, position, item))
+            position += 1
+        while active and active[0][2].end < point:
+            heapq.heappop(active)
+        if not active:
+            continue
+        winner = active[0][2]
+        end = bounds[index + 1] - 1
+        previous = flat[-1] if flat else None
+        if previous and previous.end + 1 == point and (previous.brand, previous.issuer) == (winner.brand, winner.issuer):
+            flat[-1] = BinRange(previous.start, end, winner.brand, winner.issuer)
+        else:
+            flat.append(BinRange(point, end, winner.brand, winner.issuer))
+    return flat
+
+
+def build_index(ranges: Iterable[BinRange], output: Path) -> int:
+    """Write the binary index atomically, so processes mapping the old file keep a consistent view"""
+    flat = flatten(ranges)
+    strings = {"": 0}
+    for item in flat:
+        strings.setdefault(item.brand, len(strings))
+        strings.setdefault(item.issuer, len(strings))
+    table = b"\0".join(value.encode() for value in strings)
+
+    count = len(flat)
+    with tempfile.NamedTemporaryFile("wb", dir=output.parent, delete=False) as stream:
+        stream.write(HEADER.pack(MAGIC, count, len(strings), len(table)))
+        stream.write(struct.pack(f"<{count}Q", *(item.start for item in flat)))
+        stream.write(struct.pack(f"<{count}Q", *(item.end for item in flat)))
+        stream.write(struct.pack(f"<{count}I", *(strings[item.brand] for item in flat)))
+        stream.write(struct.pack(f"<{count}I", *(strings[item.issuer] for item in flat)))
+        stream.write(table)
+    os.chmod(stream.name, 0o644)
+    os.replace(stream.name, output)
+    return count
+
+
+class BinIndex:
+    """Read-only view of a binary BIN index"""
+
+    def __init__(self, path: Path):
+        if sys.byteorder != "little":
+            raise RuntimeError("BIN index files are little-endian")
+        with path.open("rb") as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, string_count, table_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a BIN index")
+
+        view = memoryview(self._map)
+        offset = HEADER.size
+        self._starts = view[offset:offset + 8 * count].cast("Q")
+        offset += 8 * count
+        self._ends = view[offset:offset + 8 * count].cast("Q")
+        offset += 8 * count
+        self._brands = view[offset:offset + 4 * count].cast("I")
+        offset += 4 * count
+        self._issuers = view[offset:offset + 4 * count].cast("I")
+        offset += 4 * count
+        # The string table is small (one entry per distinct brand and issuer), so decode it once
+        self._strings = bytes(view[offset:offset + table_length]).decode().split("\0")
+        self.path = path
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def lookup(self, card_number: str) -> BinInfo | None:
+        key = card_key(card_number)
+        if key is None:
+            return None
+        position = bisect_right(self._starts, key) - 1
+        if position < 0 or key > self._ends[position]:
+            return None
+        return BinInfo(self._strings[self._brands[position]] or None, self._strings[self._issuers[position]] or None)
+
+
+@cache
+def get_index() -> BinIndex | None:
+    """The configured index, opened once per process; ``None`` when no index file is installed"""
+    path = Path(settings.GMO_PAYMENT["bin_index_path"])
+    return BinIndex(path) if path.is_file() else None
+
+
+def lookup(card_number: str | None) -> BinInfo | None:
+    """Brand and issuer of a (possibly masked) card number from the configured index"""
+    index = get_index()
+    if index is None or not card_number:
+        return None
+    return index.lookup(card_number)
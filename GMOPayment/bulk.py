@@ -0,0 +1,163 @@
+"""
+Batch plumbing for the bulk member commands.
+
+``read_members`` streams member records from a CSV, JSON-lines or plain
+text file. ``BulkRunner`` consumes them in batches: each batch is filtered
+against the database, the remaining records are sent to GMO from a bounded
+thread pool, and the caller's ``commit`` applies the successful ones locally.
+After every committed batch the number of input records consumed is written
+to a checkpoint file, so an interrupted run resumes where it stopped.
+"""
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import csv
+from dataclasses import dataclass, field
+import itertools
+import json
+import os
+from pathlib import Path
+import time
+from typing import Any, TextIO
+
+
+@dataclass(frozen=True, slots=True)
+class MemberRecord:
+    member_id: str
+    name: str | None = None
+
+
+def read_members(path: Path) -> Iterator[MemberRecord]:
+    """Yield member records from ``.csv`` (``member_id,name``), ``.jsonl`` or one-id-per-line files"""
+    with path.open(newline="", encoding="utf-8") as stream:
+        if path.suffix == ".csv":
+            for row in csv.DictReader(stream):
+                if member_id := (row.get("member_id") or "").strip():
+                    yield MemberRecord(member_id, (row.get("name") or "").strip() or None)
+        elif path.suffix in (".jsonl", ".ndjson"):
+            for line in stream:
+                if line.strip():
+                    document = json.loads(line)
+                    yield MemberRecord(str(document["member_id"]), document.get("name"))
+        else:
+            for line in stream:
+                if member_id := line.strip():
+                    yield MemberRecord(member_id)
+
+
+@dataclass(slots=True)
+class BulkProgress:
+    """Running totals of a bulk run"""
+
+    processed: int = 0
+    succeeded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.processed} processed, {self.succeeded} succeeded, {self.skipped} skipped, "
+            f"{self.failed} failed ({self.rate:.1f}/s)"
+        )
+
+
+class Checkpoint:
+    """Number of input records fully handled, persisted next to the input file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def load(self) -> int:
+        try:
+            return int(self.path.read_text().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def save(self, position: int) -> None:
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        temporary.write_text(str(position))
+        os.replace(temporary, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class BulkRunner:
+    """Runs ``action`` for batches of records with bounded concurrency
+
+    ``pending`` receives a batch and returns the records still to process
+    (the rest count as skipped). ``action`` is called once per pending
+    record on the pool and raises on failure. ``commit`` receives the
+    records that succeeded. Failures are written to ``failures`` as JSON
+    lines when given.
+    """
+
+    def __init__(
+            self,
+            pending: Callable[[list[MemberRecord]], list[MemberRecord]],
+            action: Callable[[MemberRecord], Any],
+            commit: Callable[[list[MemberRecord]], None],
+            concurrency: int = 8,
+            batch_size: int = 500,
+            checkpoint: Checkpoint | None = None,
+            failures: TextIO | None = None,
+            report: Callable[[BulkProgress], None] | None = None,
+    ):
+        self.pending = pending
+        self.action = action
+        self.commit = commit
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.failures = failures
+        self.report = report
+        self.progress = BulkProgress()
+
+    def _attempt(self, record: MemberRecord) -> Exception | None:
+        try:
+            self.action(record)
+        except Exception as error:
+            return error
+        return None
+
+    def run(self, records: Iterable[MemberRecord], resume: bool = False) -> BulkProgress:
+        position = self.checkpoint.load() if resume and self.checkpoint else 0
+        records = itertools.islice(records, position, None)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="gmo-bulk") as pool:
+            while batch := list(itertools.islice(records, self.batch_size)):
+                todo = self.pending(batch)
+                self.progress.skipped += len(batch) - len(todo)
+                # Each attempt runs in a copy of this context so deadlines and similar state follow it
+                errors = pool.map(lambda record: contextvars.copy_context().run(self._attempt, record), todo)
+
+                succeeded = []
+                for record, error in zip(todo, errors):
+                    if error is None:
+                        succeeded.append(record)
+                        continue
+                    self.progress.failed += 1
+                    if self.failures is not None:
+                        self.failures.write(json.dumps({"member_id": record.member_id, "error": str(error)}) + "\n")
+                if succeeded:
+                    self.commit(succeeded)
+                if self.failures is not None:
+                    self.failures.flush()
+
+                self.progress.succeeded += len(succeeded)
+                self.progress.processed += len(batch)
+                position += len(batch)
+                if self.checkpoint:
+                    self.checkpoint.save(position)
+                if self.report:
+                    self.report(self.progress)
+
+        if self.checkpoint:
+            self.checkpoint.clear()
+        return self.progress
@@ -0,0 +1,195 @@
+"""
+Local card pre-validation.
+
+Card data is checked before it is RSA-encrypted and sent to GMO, so typos,
+wrong lengths and expired cards are rejected without a gateway round trip.
+The brand comes from the BIN index when one is installed (see
+``GMOPayment.bins``) and from well-known IIN prefixes otherwise; it picks the
+allowed number and security-code lengths. Numbers of an unknown brand get the
+generic ISO/IEC 7812 limits, since GMO remains the authority on what it
+accepts.
+"""
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from django.utils import timezone
+
+from GMOPayment import bins, metrics
+from GMOPayment.exceptions import GMOValidationError
+
+
+@dataclass(frozen=True, slots=True)
+class BrandRule:
+    """IIN prefix ranges and allowed lengths of a card brand"""
+
+    code: str
+    prefixes: tuple[tuple[int, int], ...]  # inclusive (low, high) ranges of equal digit count
+    lengths: frozenset[int]
+    security_code_lengths: frozenset[int] = frozenset({3})
+
+    def matches(self, number: str) -> bool:
+        for low, high in self.prefixes:
+            digits = len(str(low))
+            if len(number) >= digits and low <= int(number[:digits]) <= high:
+                return True
+        return False
+
+
+# Codes match PaymentMethod.CARD_BRAND_CHOICES where the model knows the brand
+BRAND_RULES = (
+    BrandRule("AMEX", ((34, 34), (37, 37)), frozenset({15}), frozenset({4})),
+    BrandRule("DINERS", ((300, 305), (3095, 3095), (36, 36), (38, 39)), frozenset(range(14, 20))),
+    BrandRule("JCB", ((3528, 3589),), frozenset(range(16, 20))),
+    BrandRule("DISC", ((6011, 6011), (622126, 622925), (644, 649), (65, 65)), frozenset(range(16, 20))),
+    BrandRule("MC", ((51, 55), (2221, 2720)), frozenset({16})),
+    BrandRule("VISA", ((4, 4),), frozenset({13, 16, 19})),
+)
+GENERIC_LENGTHS = frozenset(range(12, 20))
+GENERIC_SECURITY_CODE_LENGTHS = frozenset({3, 4})
+TEXT_FIELDS = ("card_number", "expire_month", "expire_year", "security_code")
+
+
+@dataclass(frozen=True, slots=True)
+class CardInput:
+    """Raw card fields as entered by the cardholder"""
+
+    card_number: str | None
+    card_holder_name: str | None
+    expire_month: str | None
+    expire_year: str | None
+    security_code: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ValidCard:
+    """Card fields that passed pre-validation; ``card_number`` has separators removed"""
+
+    card_number: str
+    card_holder_name: str | None
+    expire_month: str
+    expire_year: str
+    security_code: str | None
+    brand: str | None
+    issuer: str | None = None
+
+
+def normalize_number(card_number: str) -> str:
+    return card_number.replace(" ", "").replace("-", "")
+
+
+def luhn_valid(number: str) -> bool:
+    """Luhn (mod 10) checksum of a string of digits"""
+    total = 0
+    for position, char in enumerate(reversed(number)):
+        digit = ord(char) - 48
+        if position % 2:
+            digit = digit * 2 - 9 if digit > 4 else digit * 2
+        total += digit
+    return total % 10 == 0
+
+
+_RULES_BY_CODE = {rule.code: rule for rule in BRAND_RULES}
+
+
+def detect_brand(number: str, info: bins.BinInfo | None = None) -> BrandRule | None:
+    """The brand rule of a card number, preferring the BIN index's brand when it has a rule"""
+    if info is not None and info.brand in _RULES_BY_CODE:
+        return _RULES_BY_CODE[info.brand]
+    for rule in BRAND_RULES:
+        if rule.matches(number):
+            return rule
+    return None
+
+
+def card_errors(card: CardInput, today: date | None = None) -> tuple[dict[str, list[str]], ValidCard | None]:
+    """Field errors of ``card``, and the normalized card when there are none"""
+    errors: dict[str, list[str]] = {}
+    rule = info = None
+    # Fields come straight from the JSON body, so a number or object must be a field error, not a crash
+    for field in TEXT_FIELDS:
+        if not isinstance(getattr(card, field), str | None):
+            errors[field] = ["Not a valid string."]
+
+    if "card_number" not in errors:
+        number = normalize_number(card.card_number or "")
+        if not number:
+            errors["card_number"] = ["This field is required."]
+        elif not number.isascii() or not number.isdigit():
+            errors["card_number"] = ["Card number must contain only digits."]
+        else:
+            info = bins.lookup(number)
+            rule = detect_brand(number, info)
+            lengths = rule.lengths if rule else GENERIC_LENGTHS
+            if len(number) not in lengths:
+                allowed = ", ".join(str(length) for length in sorted(lengths))
+                brand = rule.code if rule else "this card"
+                errors["card_number"] = [f"Card number length must be one of {allowed} for {brand}."]
+            elif not luhn_valid(number):
+                errors["card_number"] = ["Card number is invalid."]
+
+    month = (card.expire_month or "").strip() if "expire_month" not in errors else ""
+    year = (card.expire_year or "").strip() if "expire_year" not in errors else ""
+    if "expire_month" not in errors and not (month.isascii() and month.isdigit() and 1 <= int(month) <= 12):
+        errors["expire_month"] = ["Expiry month must be between 01 and 12."]
+    if "expire_year" not in errors and not (year.isascii() and year.isdigit() and len(year) in (2, 4)):
+        errors["expire_year"] = ["Expiry year must have 2 or 4 digits."]
+    if "expire_month" not in errors and "expire_year" not in errors:
+        today = today or timezone.now().date()
+        full_year = int(year) + (today.year // 100 * 100 if len(year) == 2 else 0)
+        # Cards are valid through the last day of their expiry month
+        if (full_year, int(month)) < (today.year, today.month):
+            errors["expire_year"] = ["Card has expired."]
+
+    security_code = card.security_code.strip() if card.security_code and "security_code" not in errors else None
+    if security_code is not None:
+        allowed = rule.security_code_lengths if rule else GENERIC_SECURITY_CODE_LENGTHS
+        if not (security_code.isascii() and security_code.isdigit() and len(security_code) in allowed):
+            lengths = " or ".join(str(length) for length in sorted(allowed))
+            errors["security_code"] = [f"Security code must be {lengths} digits."]
+
+    if errors:
+        for field in errors:
+            metrics.increment(f"cards.rejected.{field}")
+        return errors, None
+    metrics.increment("cards.accepted")
+    brand = rule.code if rule else info and info.brand
+    return errors, ValidCard(number, card.card_holder_name, month, year, security_code, brand, info and info.issuer)
+
+
+def validate_card(card: CardInput, today: date | None = None) -> ValidCard:
+    """Validate one card, raising ``GMOValidationError`` with the field errors"""
+    errors, valid = card_errors(card, today)
+    if errors:
+        raise GMOValidationError(errors)
+    return valid
+
+
+def validate_cards(cards: Iterable[CardInput], today: date | None = None) -> tuple[list[ValidCard], dict[int, dict[str, list[str]]]]:
+    """Validate a batch; returns the valid cards and the field errors of the others by input position"""
+    today = today or timezone.now().date()
+    valid: list[ValidCard] = []
+    rejected: dict[int, dict[str, list[str]]] = {}
+    for position, card in enumerate(cards):
+        errors, card = card_errors(card, today)
+        if errors:
+            rejected[position] = errors
+        else:
+            valid.append(card)
+    return valid, rejected
+
+
+def require_batch(cards: Iterable[CardInput], today: date | None = None) -> list[ValidCard]:
+    """Validate a batch all-or-nothing, raising one ``GMOValidationError`` keyed by input position"""
+    valid, rejected = validate_cards(cards, today)
+    if rejected:
+        raise GMOValidationError({str(position): errors for position, errors in rejected.items()})
+    return valid
+
+
+def require_fields(**values: Any) -> None:
+    """Raise ``GMOValidationError`` for every blank keyword argument"""
+    missing = {name: ["This field is required."] for name, value in values.items() if value in (None, "")}
+    if missing:
+        raise GMOValidationError(missing)
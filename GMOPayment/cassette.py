@@ -0,0 +1,211 @@
+import atexit
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+import gzip
+import hashlib
+import json
+from pathlib import Path
+import threading
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from GMOPayment.scrubbing import scrub, scrub_headers
+
+
+@dataclass(frozen=True, slots=True)
+class Interaction:
+    """One recorded request/response pair, already scrubbed"""
+
+    method: str
+    path: str
+    request_body: Any
+    status: int
+    headers: dict[str, str]
+    body: str
+    elapsed: float
+    started_at: float
+
+    @property
+    def body_fingerprint(self) -> str:
+        return _fingerprint(self.request_body)
+
+
+def _fingerprint(body: Any) -> str:
+    return hashlib.blake2b(json.dumps(body, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def _decode_body(body: bytes | str | None) -> Any:
+    """Decode a request or response body into a JSON value where possible"""
+    if not body:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body
+
+
+def _scrubbed_text(body: bytes) -> str:
+    decoded = _decode_body(body)
+    if decoded is None:
+        return ""
+    if isinstance(decoded, str):
+        return scrub(decoded)
+    return json.dumps(scrub(decoded), separators=(",", ":"), ensure_ascii=False)
+
+
+def _path_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+def load_cassette(path: str | Path) -> list[Interaction]:
+    """Read every interaction from a gzip-compressed NDJSON cassette"""
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        return [Interaction(**json.loads(line)) for line in fh if line.strip()]
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTP adapter that forwards requests and records scrubbed interactions
+
+    Interactions are buffered and appended to the cassette as gzip members, so
+    several workers can share one cassette and it stays readable if a process
+    dies between flushes. ``started_at`` is wall-clock time, so the traffic
+    shape of a recording can be reconstructed across workers.
+    """
+
+    def __init__(self, cassette_path: str | Path, flush_every: int = 100, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.cassette_path = Path(cassette_path)
+        self.flush_every = flush_every
+        self._buffer: list[str] = []
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        sent_at = time.time()
+        response = super().send(request, **kwargs)
+        interaction = Interaction(
+            method=request.method or "GET",
+            path=_path_of(request.url or ""),
+            request_body=scrub(_decode_body(request.body)),
+            status=response.status_code,
+            headers=scrub_headers({"Content-Type": response.headers.get("Content-Type", "application/json")}),
+            body=_scrubbed_text(response.content),
+            elapsed=round(response.elapsed.total_seconds(), 6),
+            started_at=round(sent_at, 6),
+        )
+        with self._lock:
+            self._buffer.append(json.dumps(asdict(interaction), separators=(",", ":"), ensure_ascii=False))
+            if len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+        return response
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        self.cassette_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.cassette_path.open("ab") as fh:
+            fh.write(gzip.compress(("\n".join(self._buffer) + "\n").encode("utf-8")))
+        self._buffer.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that serves responses from a cassette without network I/O
+
+    Interactions are replayed in recorded order per ``(method, path)``. With
+    ``match_body`` the scrubbed request body must match as well. Exhausted
+    keys wrap around when ``loop`` is set.
+
+    With ``realtime`` the recorded traffic shape is kept: the first request
+    marks the start of the replay, each response is held until its
+    interaction's recorded ``started_at`` offset has passed and is then
+    delayed by its recorded latency, both divided by ``speed``. Each lap of
+    a looping key is offset by the length of the recording.
+    """
+
+    def __init__(
+            self,
+            cassette_path: str | Path,
+            realtime: bool = False,
+            speed: float = 1.0,
+            match_body: bool = False,
+            loop: bool = True,
+    ):
+        super().__init__()
+        self.interactions = load_cassette(cassette_path)
+        self.realtime = realtime
+        self.speed = speed
+        self.match_body = match_body
+        self.loop = loop
+        self._lock = threading.Lock()
+        self._queues: dict[tuple[str, ...], deque[Interaction]] = defaultdict(deque)
+        for interaction in self.interactions:
+            self._queues[self._key(interaction.method, interaction.path, interaction.body_fingerprint)].append(
+                interaction
+            )
+        self._sizes = {key: len(queue) for key, queue in self._queues.items()}
+        self._served: dict[tuple[str, ...], int] = defaultdict(int)
+        self._recorded_start = min((i.started_at for i in self.interactions), default=0.0)
+        self._recording_length = max((i.started_at + i.elapsed for i in self.interactions), default=0.0) - (
+            self._recorded_start
+        )
+        self._replay_start: float | None = None
+
+    def _key(self, method: str, path: str, fingerprint: str) -> tuple[str, ...]:
+        return (method, path, fingerprint) if self.match_body else (method, path)
+
+    def _next(self, request: requests.PreparedRequest) -> tuple[Interaction, float]:
+        """The interaction to serve and the monotonic time it was recorded to start at in this replay"""
+        fingerprint = _fingerprint(scrub(_decode_body(request.body))) if self.match_body else ""
+        key = self._key(request.method or "GET", _path_of(request.url or ""), fingerprint)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise requests.ConnectionError(f"No recorded interaction for {' '.join(key)}", request=request)
+            interaction = queue.popleft()
+            if self.loop:
+                queue.append(interaction)
+            lap = self._served[key] // self._sizes[key]
+            self._served[key] += 1
+            if self._replay_start is None:
+                self._replay_start = time.monotonic()
+        offset = interaction.started_at - self._recorded_start + lap * self._recording_length
+        return interaction, self._replay_start + offset / self.speed
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        interaction, scheduled_at = self._next(request)
+        if self.realtime:
+            # A request arriving ahead of its recorded start waits for it; a late one only pays its latency
+            delay = max(scheduled_at - time.monotonic(), 0.0) + interaction.elapsed / self.speed
+            if delay > 0:
+                time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = interaction.status
+        response.headers = CaseInsensitiveDict(interaction.headers)
+        response._content = interaction.body.encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url or ""
+        response.request = request
+        response.reason = "Replayed"
+        response.elapsed = timedelta(seconds=interaction.elapsed)
+        return response
+
+    def close(self) -> None:
+        pass
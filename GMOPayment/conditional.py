@@ -0,0 +1,46 @@
+"""
+Conditional GET for list endpoints.
+
+A list's validators come from one aggregate query over the filtered
+queryset: the newest ``updated_at`` and the row count. ``updated_at`` moves
+on every insert and update and the count moves on deletes, so together they
+change whenever the list does. When the client's ``If-None-Match`` still
+matches, the view answers 304 without loading or serializing a single row.
+
+``Last-Modified`` is sent for information only. HTTP dates have one-second
+resolution, so a change later in the same second as the client's copy would
+still satisfy ``If-Modified-Since``; only the microsecond ETag decides a 304.
+"""
+from datetime import datetime
+
+from django.db.models import Count, Max, QuerySet
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def list_validators(queryset: QuerySet) -> tuple[str, datetime | None]:
+    """Weak ETag and Last-Modified for a queryset"""
+    state = queryset.order_by().aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+    last_modified = state["last_modified"]
+    stamp = int(last_modified.timestamp() * 1_000_000) if last_modified else 0
+    tag = f"{queryset.model._meta.label_lower}-{state['count']}-{stamp}"
+    return f"W/{quote_etag(tag)}", last_modified
+
+
+class ConditionalListMixin:
+    """Adds ETag/Last-Modified validation and 304 responses to a DRF list view"""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = list_validators(queryset)
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response.headers["ETag"] = etag
+        if last_modified_ts is not None:
+            response.headers["Last-Modified"] = http_date(last_modified_ts)
+        # Let caches keep the body but revalidate it on every use
+        response.headers.setdefault("Cache-Control", "private, no-cache")
+        return response
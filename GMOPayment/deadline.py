@@ -0,0 +1,89 @@
+"""
+Per-request deadlines.
+
+A ``Deadline`` is bound to the current context with ``deadline_scope`` (the
+``DeadlineMiddleware`` opens one per inbound request), and ``GMOHttpClient``
+caps every authentication, request, retry and re-authentication by the time
+remaining; ``DeadlineTimeout`` re-caps the timeout of each attempt urllib3
+makes, so retries inside the connection pool stay within it too. Context variables follow the call from the view through the
+service into the client, including hedged attempts on worker threads.
+"""
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import time
+
+from urllib3.util import Timeout
+
+from GMOPayment.exceptions import GMODeadlineExceeded
+
+
+# urllib3 treats a zero timeout as non-blocking; an attempt started at the deadline gets this instead
+MIN_ATTEMPT_TIMEOUT = 0.001
+
+
+@dataclass(frozen=True, slots=True)
+class Deadline:
+    """Immutable point in ``time.monotonic()`` time by which work must finish"""
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> 'Deadline':
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self) -> None:
+        if self.expired:
+            raise GMODeadlineExceeded()
+
+    def cap(self, timeout: tuple[float, float]) -> tuple[float, float]:
+        """Bound a ``(connect, read)`` timeout by the time remaining"""
+        self.check()
+        remaining = self.remaining()
+        return min(timeout[0], remaining), min(timeout[1], remaining)
+
+
+class DeadlineTimeout(Timeout):
+    """urllib3 timeout capped by a deadline whenever an attempt starts
+
+    urllib3 clones the request's timeout at the start of every attempt,
+    including its own retries, so cloning recomputes the cap from the time
+    left instead of reusing the cap taken when the request was sent.
+    """
+
+    def __init__(self, deadline: Deadline, connect: float, read: float):
+        super().__init__(connect=connect, read=read)
+        self.deadline = deadline
+
+    def clone(self) -> Timeout:
+        remaining = max(self.deadline.remaining(), MIN_ATTEMPT_TIMEOUT)
+        return Timeout(connect=min(self._connect, remaining), read=min(self._read, remaining))
+
+
+_current_deadline: ContextVar[Deadline | None] = ContextVar("gmo_deadline", default=None)
+
+
+def current_deadline() -> Deadline | None:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(budget: float | Deadline | None) -> Iterator[Deadline | None]:
+    """Bind a deadline for the enclosed calls; an outer, earlier deadline still wins"""
+    deadline = Deadline.after(budget) if isinstance(budget, (int, float)) else budget
+    outer = _current_deadline.get()
+    if outer is not None and (deadline is None or outer.expires_at < deadline.expires_at):
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
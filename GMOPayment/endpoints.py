@@ -0,0 +1,50 @@
+from enum import Enum
+
+
+class EndpointFamily(str, Enum):
+    """Groups of GMO endpoints that share timeout and retry behaviour"""
+
+    AUTH = 'auth'
+    INQUIRY = 'inquiry'
+    MUTATION = 'mutation'
+    CHARGE = 'charge'
+    TOKEN = 'token'
+
+    def __str__(self) -> str:
+        return self.value
+
+
+ENDPOINT_FAMILIES: dict[str, EndpointFamily] = {
+    # Read-only calls
+    "order/inquiry": EndpointFamily.INQUIRY,
+    "member/inquiry": EndpointFamily.INQUIRY,
+    "credit/getCardDetails": EndpointFamily.INQUIRY,
+    "SearchMember.idPass": EndpointFamily.INQUIRY,
+    # Mutations that GMO applies at most once per access_id/member_id
+    "order/capture": EndpointFamily.MUTATION,
+    "order/cancel": EndpointFamily.MUTATION,
+    "order/update": EndpointFamily.MUTATION,
+    "tds2/finalizeCharge": EndpointFamily.MUTATION,
+    "member/delete": EndpointFamily.MUTATION,
+    "DeleteMember.idPass": EndpointFamily.MUTATION,
+    "DeleteCard.idPass": EndpointFamily.MUTATION,
+    # Calls that move money or create state on every invocation
+    "credit/charge": EndpointFamily.CHARGE,
+    "credit/on-file/charge": EndpointFamily.CHARGE,
+    "credit/verifyCard": EndpointFamily.CHARGE,
+    "credit/storeCard": EndpointFamily.CHARGE,
+    "member/create": EndpointFamily.CHARGE,
+    "SaveMember.idPass": EndpointFamily.CHARGE,
+    "ExecTranGooglePay.idPass": EndpointFamily.CHARGE,
+    "ExecTranApplePay.idPass": EndpointFamily.CHARGE,
+    "payment/CreateToken.json": EndpointFamily.TOKEN,
+}
+
+
+def endpoint_family(endpoint: str) -> EndpointFamily:
+    """Family of an endpoint path; unknown endpoints are treated as charges"""
+    return ENDPOINT_FAMILIES.get(endpoint.strip("/"), EndpointFamily.CHARGE)
+
+
+def is_read_only(endpoint: str) -> bool:
+    return endpoint_family(endpoint) is EndpointFamily.INQUIRY
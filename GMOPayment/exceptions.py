@@ -6,6 +6,7 @@ from rest_framework.exceptions import (
     NotAuthenticated,
     NotFound,
     PermissionDenied,
+    Throttled,
     ValidationError,
 )
 
@@ -62,3 +63,26 @@ class GMONotFound(NotFound):
 
     default_detail = 'The requested GMO Payment Gateway resource was not found.'
     default_code = 'gmo_not_found'
+
+
+class GMODeadlineExceeded(GMOAPIException):
+    """Raised when the request deadline expires before GMO answers"""
+
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT
+    default_detail = 'The GMO Payment Gateway request exceeded its deadline.'
+    default_code = 'gmo_deadline_exceeded'
+
+
+class GMOTooManyRequests(Throttled):
+    """Raised when a velocity limit rejects a request before it reaches GMO"""
+
+    default_detail = 'Too many payment attempts; please try again later.'
+    default_code = 'gmo_velocity_limited'
+
+
+class GMOServiceOverloaded(GMOAPIException):
+    """Raised when admission control sheds a request because its endpoint group is saturated"""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The payment service is busy; please try again shortly.'
+    default_code = 'gmo_overloaded'
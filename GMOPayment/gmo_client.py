@@ -2,21 +2,31 @@ import base64
 from collections.abc import Callable
 from dataclasses import dataclass
 from enum import Enum
-from functools import wraps
+from functools import partial, wraps
+import threading
+import time
 from typing import Any, TypeVar, cast
 from urllib.parse import urljoin
 
 from django.conf import settings
-from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from rest_framework import status
 
-from requests.adapters import HTTPAdapter
+from requests.adapters import BaseAdapter, HTTPAdapter
 import requests
 from urllib3 import Retry
 
+from GMOPayment import metrics
+from GMOPayment.audit import AuditLog, audit_attempts, get_audit_log
+from GMOPayment.deadline import DeadlineTimeout, current_deadline
+from GMOPayment.endpoints import EndpointFamily, endpoint_family
+from GMOPayment.hedging import HedgePolicy, Hedger
+from GMOPayment.responses import GMOResponse
+from GMOPayment.retry import GMORetry, get_retry_budget
+from GMOPayment.timeouts import TimeoutPolicy
+from GMOPayment.tokens import StoredToken, TokenStore, get_token_store
 from GMOPayment.exceptions import GMONotAuthenticated, GMOValidationError, GMOPermissionDenied, GMONotFound, \
-    GMOConfigurationError, GMOAPIException, GMOAuthenticationError
+    GMOConfigurationError, GMOAPIException, GMOAuthenticationError, GMODeadlineExceeded
 
 T = TypeVar('T', bound=Callable[..., Any])
 
@@ -77,16 +87,27 @@ class GMOHttpClient:
             credentials: GMOCredentials | None = None,
             environment: GMOEnvironment = GMOEnvironment.TEST,
             timeout: int = 30,
-            max_retries: int = 3
+            max_retries: int = 3,
+            transport: BaseAdapter | None = None,
+            hedge_policy: HedgePolicy | None = None,
+            timeout_policy: TimeoutPolicy | None = None,
+            token_store: TokenStore | None = None,
+            audit_log: AuditLog | None = None,
     ):
         """Initialize GMO HTTP client"""
         try:
             self.credentials = credentials or self._load_credentials_from_settings()
             self.environment = environment
             self.timeout = timeout
+            self.timeout_policy = timeout_policy or TimeoutPolicy.from_settings(default_read=timeout)
             self.urls = self._get_environment_urls()
-            self.session = self._configure_session(max_retries)
+            self.session = self._configure_session(max_retries, transport)
             self._access_token: str | None = None
+            self._token: StoredToken | None = None
+            self.token_store = token_store or get_token_store()
+            hedge_policy = hedge_policy or HedgePolicy.from_settings()
+            self.hedger = Hedger(hedge_policy) if hedge_policy.enabled else None
+            self.audit = audit_log or get_audit_log()
         except ImproperlyConfigured as e:
             raise GMOConfigurationError(str(e))
 
@@ -123,19 +144,54 @@ class GMOHttpClient:
             raise ImproperlyConfigured(f"Missing GMO Payment URLs: {e!s}")
 
     @staticmethod
-    def _configure_session(max_retries: int) -> requests.Session:
+    def _transport_from_settings(retry_strategy: Retry) -> BaseAdapter | None:
+        """Build the record/replay transport configured in Django settings, if any"""
+        gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+        mode = gmo_settings.get("cassette_mode")
+        if not mode:
+            return None
+
+        if not (path := gmo_settings.get("cassette_path")):
+            raise ImproperlyConfigured("GMO_PAYMENT['cassette_path'] is required when cassette_mode is set")
+
+        from GMOPayment.cassette import RecordingAdapter, ReplayAdapter
+
+        if mode == "record":
+            return RecordingAdapter(path, max_retries=retry_strategy)
+        if mode == "replay":
+            return ReplayAdapter(
+                path,
+                realtime=gmo_settings.get("cassette_realtime", False),
+                speed=gmo_settings.get("cassette_speed", 1.0),
+            )
+        raise ImproperlyConfigured(f"Unknown GMO cassette mode: {mode}")
+
+    @classmethod
+    def _configure_session(cls, max_retries: int, transport: BaseAdapter | None = None) -> requests.Session:
         """Configure requests session with retry logic"""
         session = requests.Session()
 
-        retry_strategy = Retry(
+        gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+        # GMORetry narrows these per endpoint family; see GMOPayment.retry
+        retry_strategy = GMORetry(
             total=max_retries,
-            backoff_factor=0.5,
+            backoff_base=gmo_settings.get("retry_backoff_base", 0.1),
+            backoff_max=gmo_settings.get("retry_backoff_cap", 2.0),
             status_forcelist=[500, 502, 503, 504],
-            allowed_methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
+            allowed_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
+            raise_on_status=False,
         )
 
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("https://", adapter)
+        transport = transport or cls._transport_from_settings(retry_strategy)
+        if transport is not None:
+            # Record/replay transports see every request, whatever the scheme
+            session.mount("https://", transport)
+            session.mount("http://", transport)
+        else:
+            pool_size = gmo_settings.get("pool_maxsize", 10)
+            adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
 
         session.headers.update({
             "Content-Type": "application/json",
@@ -149,6 +205,11 @@ class GMOHttpClient:
         """Get cache key for access token"""
         return f"gmo_token_{self.credentials.shop_id}_{self.environment}"
 
+    def _use_token(self, token: StoredToken) -> None:
+        self._token = token
+        self._access_token = token.value
+        self.session.headers["Authorization"] = f"Bearer {token.value}"
+
 
     def _handle_error_response(self, response: requests.Response) -> None:
         """Handle error responses from GMO API"""
@@ -170,17 +231,45 @@ class GMOHttpClient:
         raise exceptions(detail)
 
 
-    def authenticate(self) -> None:
-        """Authenticate with GMO API"""
-        if cached_token := cache.get(self._token_cache_key):
-            self._access_token = cached_token
-            self.session.headers["Authorization"] = f"Bearer {cached_token}"
+    def _timeout_for(self, endpoint: str, family: EndpointFamily) -> tuple[float, float]:
+        """(connect, read) timeout for an endpoint, capped by the current deadline"""
+        timeout = self.timeout_policy.timeout_for(endpoint, family)
+        if (deadline := current_deadline()) is not None:
+            timeout = deadline.cap(timeout)
+        return timeout
+
+    @staticmethod
+    def _attempt_timeout(timeout: tuple[float, float]) -> tuple[float, float] | DeadlineTimeout:
+        """The timeout handed to the session; under a deadline every retried attempt is capped afresh"""
+        if (deadline := current_deadline()) is not None:
+            return DeadlineTimeout(deadline, *timeout)
+        return timeout
+
+    @staticmethod
+    def _deadline_expired() -> bool:
+        return (deadline := current_deadline()) is not None and deadline.expired
+
+    def authenticate(self, stale: StoredToken | None = None) -> None:
+        """Authenticate with GMO API
+
+        Uses the shared token when it is usable and other than ``stale``;
+        otherwise refreshes it through the token store, which makes sure
+        only one worker calls OAuth for a given stale token.
+        """
+        if (token := self.token_store.current(self._token_cache_key)) is not None and (
+                stale is None or token.version != stale.version):
+            self._use_token(token)
             return
+        self._use_token(self.token_store.refresh(self._token_cache_key, stale or token, self._fetch_token))
 
+    def _fetch_token(self) -> tuple[str, float]:
+        """Request a new access token from GMO's OAuth endpoint; returns it with its lifetime"""
+        timeout = self._timeout_for("oauth", EndpointFamily.AUTH)
         try:
             auth_string = f"{self.credentials.shop_id}:{self.credentials.shop_password}"
             encoded_auth = base64.b64encode(auth_string.encode()).decode()
 
+            started = time.perf_counter()
             response = self.session.post(
                 self.urls.oauth_url,
                 headers={
@@ -191,8 +280,9 @@ class GMOHttpClient:
                     "grant_type": "client_credentials",
                     "scope": "openapi"
                 },
-                timeout=self.timeout
+                timeout=self._attempt_timeout(timeout)
             )
+            metrics.gateway_latency.record("oauth", time.perf_counter() - started)
 
             if not response.ok:
                 raise GMOAuthenticationError(
@@ -203,11 +293,11 @@ class GMOHttpClient:
             if not (access_token := token_data.get("access_token")):
                 raise GMOAuthenticationError("No access token in response")
 
-            cache.set(self._token_cache_key, access_token, timeout=3600)
-            self._access_token = access_token
-            self.session.headers["Authorization"] = f"Bearer {access_token}"
+            return access_token, float(token_data.get("expires_in") or 3600)
 
         except requests.RequestException as e:
+            if self._deadline_expired():
+                raise GMODeadlineExceeded()
             raise GMOAuthenticationError(f"Authentication request failed: {e!s}")
 
     def get_endpoint_type(self, endpoint_type: str) -> str:
@@ -230,46 +320,83 @@ class GMOHttpClient:
             endpoint_type: str,
             params: dict[str, Any] | None = None,
             json_data: dict[str, Any] | None = None,
+            response_class: type[GMOResponse] | None = None,
+            _reauthenticate: bool = True,
             **kwargs: Any,
-    ) -> dict[str, Any]:
-        """Make an authenticated request to the GMO API"""
-        # Check for cached token first
-        if cached_token := cache.get(self._token_cache_key):
-            self._access_token = cached_token
-            self.session.headers["Authorization"] = f"Bearer {cached_token}"
-        elif not self._access_token:
+    ) -> Any:
+        """Make an authenticated request to the GMO API
+
+        Returns the decoded JSON body, or an undecoded ``response_class``
+        instance when one is given.
+        """
+        if (deadline := current_deadline()) is not None:
+            deadline.check()
+
+        # Use the shared token, refreshing it when it is missing or about to expire
+        if (token := self.token_store.current(self._token_cache_key)) is not None:
+            if self._token is None or token.version != self._token.version:
+                self._use_token(token)
+        else:
             self.authenticate()
+        used_token = self._token
 
         base_url = self.get_endpoint_type(endpoint_type)
+        timeout = self._timeout_for(endpoint, endpoint_family(endpoint))
+        get_retry_budget().record_request()
 
         try:
             url = urljoin(base_url, endpoint)
 
-            response = self.session.request(
+            send = partial(
+                self.session.request,
                 method=method.upper(),
                 url=url,
                 params=params,
                 json=json_data,
-                timeout=self.timeout,
+                timeout=self._attempt_timeout(timeout),
                 **kwargs
             )
 
-            if response.status_code == status.HTTP_401_UNAUTHORIZED:
-                cache.delete(self._token_cache_key)
-                self.authenticate()
-                return self.request(method, endpoint, endpoint_type, params, json_data, **kwargs)
+            started = time.perf_counter()
+            # GMORetry records the attempts urllib3 retries through the trail
+            with audit_attempts(self.audit, method, endpoint, json_data) as trail:
+                try:
+                    if self.hedger is not None and self.hedger.applies_to(endpoint):
+                        response = self.hedger.execute(endpoint, send)
+                    else:
+                        response = send()
+                except requests.RequestException as e:
+                    if trail is not None:
+                        trail.record(error=repr(e))
+                    raise
+            metrics.gateway_latency.record(endpoint, time.perf_counter() - started)
+            if trail is not None:
+                trail.record(response.status_code, response.content)
+
+            if response.status_code == status.HTTP_401_UNAUTHORIZED and _reauthenticate:
+                # Re-authenticate once; the retried request runs against the same deadline
+                self.authenticate(stale=used_token)
+                return self.request(
+                    method, endpoint, endpoint_type, params, json_data, response_class, _reauthenticate=False, **kwargs
+                )
 
             if not response.ok:
                 self._handle_error_response(response)
 
+            if response_class is not None:
+                return response_class(response.content)
             return response.json()
 
         except requests.Timeout:
+            if self._deadline_expired():
+                raise GMODeadlineExceeded()
             raise GMOAPIException(
-                detail=f"Request timed out after {self.timeout}s",
+                detail=f"Request timed out after {timeout[1]}s",
                 code='request_timeout'
             )
         except requests.RequestException as e:
+            if self._deadline_expired():
+                raise GMODeadlineExceeded()
             raise GMOAPIException(
                 detail=f"Request failed: {e!s}",
                 code='request_error'
@@ -280,7 +407,7 @@ class GMOHttpClient:
         """Send GET request"""
         return self.request("GET", endpoint, **kwargs)
 
-    def post(self, endpoint: str, data: dict[str, Any], endpoint_type: str = "default", **kwargs: Any) -> dict[str, Any]:
+    def post(self, endpoint: str, data: dict[str, Any], endpoint_type: str = "default", **kwargs: Any) -> Any:
         """Send POST request"""
         return self.request("POST", endpoint, endpoint_type, json_data=data, **kwargs)
 
@@ -291,3 +418,29 @@ class GMOHttpClient:
     def delete(self, endpoint: str, **kwargs: Any) -> dict[str, Any]:
         """Send DELETE request"""
         return self.request("DELETE", endpoint, **kwargs)
+
+
+_shared_client: GMOHttpClient | None = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client() -> GMOHttpClient:
+    """Return the process-wide client, creating it on first use
+
+    Sharing one client gives every service the same connection pool and token.
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = GMOHttpClient()
+    return _shared_client
+
+
+def reset_shared_client() -> None:
+    """Drop the process-wide client, e.g. after forking a worker"""
+    global _shared_client
+    with _shared_client_lock:
+        client, _shared_client = _shared_client, None
+    if client is not None:
+        client.session.close()
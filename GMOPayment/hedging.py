@@ -0,0 +1,146 @@
+"""
+Hedged requests for read-only GMO endpoints.
+
+When a read has not answered within the hedge delay, an identical request is
+sent and whichever response arrives first is used. The delay is either fixed
+or the observed latency percentile of the endpoint. A token bucket limits
+hedges to a fraction of traffic so a slow gateway is not hit twice as hard.
+A losing attempt is cancelled if it has not started yet; otherwise its
+response is discarded and the connection returned to the pool.
+
+Attempts only run on the hedge pool while it has an idle worker: a read
+arriving when every worker is busy is sent on the calling thread without a
+hedge, so the pool size never caps or queues concurrent reads.
+"""
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import contextvars
+from dataclasses import dataclass
+import threading
+
+from django.conf import settings
+import requests
+
+from GMOPayment import metrics
+from GMOPayment.endpoints import is_read_only
+
+
+@dataclass(frozen=True, slots=True)
+class HedgePolicy:
+    """Immutable hedging configuration"""
+
+    enabled: bool = False
+    delay: float | None = None
+    percentile: float = 95.0
+    min_delay: float = 0.05
+    min_samples: int = 20
+    budget_ratio: float = 0.05
+    budget_burst: float = 10.0
+    max_workers: int = 32
+
+    @classmethod
+    def from_settings(cls) -> 'HedgePolicy':
+        gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+        delay_ms = gmo_settings.get("hedge_delay_ms") or 0
+        return cls(
+            enabled=gmo_settings.get("hedge_enabled", False),
+            delay=delay_ms / 1000 if delay_ms else None,
+            percentile=gmo_settings.get("hedge_percentile", 95.0),
+            min_delay=gmo_settings.get("hedge_min_delay_ms", 50) / 1000,
+            budget_ratio=gmo_settings.get("hedge_budget_ratio", 0.05),
+            max_workers=gmo_settings.get("hedge_max_workers", 32),
+        )
+
+
+class HedgeBudget:
+    """Token bucket earning ``ratio`` tokens per request; a hedge spends one"""
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+def _discard(future: Future) -> None:
+    """Release the connection held by a losing attempt"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class Hedger:
+    """Runs read-only requests with a hedged duplicate after the hedge delay"""
+
+    def __init__(self, policy: HedgePolicy, latency: metrics.LatencyTracker | None = None):
+        self.policy = policy
+        self.latency = latency or metrics.gateway_latency
+        self.budget = HedgeBudget(policy.budget_ratio, policy.budget_burst)
+        self._executor = ThreadPoolExecutor(max_workers=policy.max_workers, thread_name_prefix="gmo-hedge")
+        self._idle_workers = threading.BoundedSemaphore(policy.max_workers)
+
+    def applies_to(self, endpoint: str) -> bool:
+        return self.policy.enabled and is_read_only(endpoint)
+
+    def hedge_delay(self, endpoint: str) -> float | None:
+        """Seconds to wait before hedging, or ``None`` if there is not enough data yet"""
+        if self.policy.delay is not None:
+            return self.policy.delay
+        if self.latency.count(endpoint) < self.policy.min_samples:
+            return None
+        observed = self.latency.percentile(endpoint, self.policy.percentile)
+        return max(observed or 0.0, self.policy.min_delay)
+
+    def _submit(self, send: Callable[[], requests.Response]) -> Future | None:
+        """Start an attempt on an idle pool worker; ``None`` when every worker is busy"""
+        if not self._idle_workers.acquire(blocking=False):
+            metrics.increment("hedge.pool_busy")
+            return None
+        # Run in a copy of the caller's context so request-scoped state follows the attempt
+        future = self._executor.submit(contextvars.copy_context().run, send)
+        future.add_done_callback(lambda _: self._idle_workers.release())
+        return future
+
+    def execute(self, endpoint: str, send: Callable[[], requests.Response]) -> requests.Response:
+        """Send a request, hedging it if it is slower than the hedge delay"""
+        self.budget.on_request()
+        delay = self.hedge_delay(endpoint)
+        if delay is None or (primary := self._submit(send)) is None:
+            return send()
+
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        if not self.budget.try_acquire():
+            metrics.increment("hedge.budget_exhausted")
+            return primary.result()
+
+        if (hedge := self._submit(send)) is None:
+            return primary.result()
+        metrics.increment("hedge.sent")
+        pending, finished = {primary, hedge}, []
+        winner: Future | None = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            finished.extend(done)
+            winner = next((future for future in done if future.exception() is None), None)
+        if winner is None:
+            winner = finished[-1]  # every attempt failed; surface the last error
+
+        for loser in (*finished, *pending):
+            if loser is not winner:
+                loser.cancel()
+                loser.add_done_callback(_discard)
+        metrics.increment("hedge.won" if winner is hedge else "hedge.lost")
+        return winner.result()
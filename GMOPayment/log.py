@@ -0,0 +1,174 @@
+import atexit
+from collections.abc import Mapping
+import copy
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import os
+import queue
+import random
+import threading
+from typing import Any
+from uuid import UUID
+
+from GMOPayment.scrubbing import is_sensitive_key, mask_pan, scrub, scrub_value
+
+
+# Attributes present on every LogRecord; anything else was passed through ``extra``
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+# Argument types that cannot change after the log call, so they need no snapshot
+_IMMUTABLE_TYPES = frozenset({str, int, float, bool, bytes, type(None), Decimal, UUID, date, datetime, time, timedelta})
+
+
+def record_extras(record: logging.LogRecord) -> dict[str, Any]:
+    """Structured fields passed to the logger through ``extra``"""
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS and not k.startswith("_")}
+
+
+def _snapshot(value: Any) -> Any:
+    """``value`` as it is now; raises when it cannot be copied"""
+    if type(value) in _IMMUTABLE_TYPES:
+        return value
+    if type(value) is tuple and all(type(item) in _IMMUTABLE_TYPES for item in value):
+        return value
+    return copy.deepcopy(value)
+
+
+class MaskingFilter(logging.Filter):
+    """Masks card numbers, tokens and security codes in messages, arguments and extras"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.args:
+            args = record.args
+            if isinstance(args, Mapping):
+                record.args = scrub(args)
+            else:
+                record.args = tuple(scrub(arg) if isinstance(arg, (Mapping, list, tuple)) else arg for arg in args)
+        record.msg = mask_pan(record.getMessage())
+        record.args = None
+        for key, value in record_extras(record).items():
+            setattr(record, key, scrub_value(key, value) if is_sensitive_key(key) else scrub(value))
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of INFO and lower records for the configured loggers
+
+    ``rates`` maps logger names to the fraction kept (``0.1`` keeps one in ten);
+    a rate applies to the named logger and its children. Warnings and errors
+    are never sampled.
+    """
+
+    def __init__(self, rates: Mapping[str, float] | None = None, name: str = ""):
+        super().__init__(name)
+        self.rates = dict(rates or {})
+        self._cache: dict[str, float] = {}
+
+    def _rate_for(self, logger_name: str) -> float:
+        if (rate := self._cache.get(logger_name)) is None:
+            name, rate = logger_name, 1.0
+            while name:
+                if name in self.rates:
+                    rate = self.rates[name]
+                    break
+                name = name.rpartition(".")[0]
+            self._cache[logger_name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **record_extras(record),
+        }
+        if record.exc_info:
+            document["exc_info"] = self.formatException(record.exc_info)
+        return mask_pan(json.dumps(document, default=str, ensure_ascii=False))
+
+
+class GMOQueueHandler(QueueHandler):
+    """Hands records to a background ``QueueListener`` so callers never block on log I/O
+
+    ``handlers`` names handlers from the same ``LOGGING`` config. They are
+    resolved when the first record is emitted, and the listener is restarted
+    after a fork so pre-forking servers get one listener per worker. Message
+    formatting and masking run on the listener thread, on a snapshot of the
+    arguments and extras taken at the log call.
+    """
+
+    def __init__(self, handlers: list[str], maxsize: int = 10000):
+        super().__init__(queue.Queue(maxsize))
+        self.handler_names = handlers
+        self.dropped = 0
+        self._listener: QueueListener | None = None
+        self._pid: int | None = None
+        self._start_lock = threading.Lock()
+
+    def _resolve_handlers(self) -> list[logging.Handler]:
+        get_handler = getattr(logging, "getHandlerByName", None) or logging._handlers.get  # type: ignore[attr-defined]
+        handlers = [get_handler(name) for name in self.handler_names]
+        if missing := [name for name, handler in zip(self.handler_names, handlers) if handler is None]:
+            raise ValueError(f"Unknown log handlers: {', '.join(missing)}")
+        return handlers
+
+    def _ensure_listener(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._listener = QueueListener(self.queue, *self._resolve_handlers(), respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener thread"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so formatting can wait for the listener thread, but
+        # mutable arguments (payloads, model instances) must be logged as they are now
+        record = copy.copy(record)
+        if not isinstance(record.msg, str):
+            record.msg = str(record.msg)
+        try:
+            record.args = _snapshot(record.args)
+        except Exception:
+            # Arguments that cannot be copied (locks, open files) are rendered now instead
+            record.msg = record.getMessage()
+            record.args = None
+        for key, value in record_extras(record).items():
+            try:
+                setattr(record, key, _snapshot(value))
+            except Exception:
+                setattr(record, key, repr(value))
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._ensure_listener()
+        super().emit(record)
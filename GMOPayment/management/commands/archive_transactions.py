@@ -0,0 +1,50 @@
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from GMOPayment.archive import archive_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        "Move transactions created and last updated before the cutoff into compressed NDJSON archive chunks. "
+        "Rows are deleted in small batches, each in its own database transaction, after their chunk is on disk; "
+        "the command can be interrupted and rerun."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than", type=int, default=None,
+            help="archive rows older than this many days (default: GMO_PAYMENT['archive_after_days'])",
+        )
+        parser.add_argument("--chunk-size", type=int, default=10000, help="rows per archive file")
+        parser.add_argument("--batch-size", type=int, default=500, help="rows deleted per database transaction")
+        parser.add_argument("--block-size", type=int, default=500, help="rows per compressed block")
+        parser.add_argument(
+            "--path", type=Path, default=None,
+            help="archive directory (default: GMO_PAYMENT['archive_path'])",
+        )
+
+    def handle(self, *args, **options):
+        days = options["older_than"] if options["older_than"] is not None else settings.GMO_PAYMENT["archive_after_days"]
+        if days < 1:
+            raise CommandError("--older-than must be at least 1 day.")
+        if min(options["chunk_size"], options["batch_size"], options["block_size"]) < 1:
+            raise CommandError("--chunk-size, --batch-size and --block-size must be at least 1.")
+        cutoff = timezone.now() - timedelta(days=days)
+
+        archived = 0
+        for chunk in archive_transactions(
+                cutoff,
+                chunk_size=options["chunk_size"],
+                batch_size=options["batch_size"],
+                block_size=options["block_size"],
+                directory=options["path"],
+        ):
+            archived += chunk.archived
+            self.stdout.write(f"{chunk.path.name}: {chunk.archived}/{chunk.rows} rows, {chunk.size} bytes")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} transactions older than {cutoff:%Y-%m-%d %H:%M}."))
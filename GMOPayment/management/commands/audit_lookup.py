@@ -0,0 +1,32 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from GMOPayment.audit import AuditReader
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the audited GMO exchanges of an order id or access id as JSON lines, oldest first. "
+        "Only the segment blocks whose index mentions the id are decompressed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("id", help="order id or access id")
+        parser.add_argument(
+            "--path", type=Path, default=None,
+            help="audit directory (default: GMO_PAYMENT['audit_path'])",
+        )
+
+    def handle(self, *args, **options):
+        reader = AuditReader(options["path"])
+        if not reader.directory.is_dir():
+            raise CommandError(f"{reader.directory} does not exist.")
+
+        found = 0
+        for document in reader.find(options["id"]):
+            self.stdout.write(json.dumps(document, ensure_ascii=False))
+            found += 1
+        if not found:
+            raise CommandError(f"No audited exchanges for {options['id']}.")
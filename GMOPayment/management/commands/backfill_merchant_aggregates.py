@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from GMOPayment.models.aggregate import MerchantDailyAggregate
+from GMOPayment.models.archive import ArchivedTransaction
+from GMOPayment.models.transaction import Transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-merchant daily transaction aggregates from Transaction, one chunk of days at a time. "
+        "Each chunk is replaced in its own database transaction, so the command can be interrupted and rerun. "
+        "Days with archived transactions are kept as they are, since their rows are no longer in Transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat, help="first day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--until", type=date.fromisoformat, help="last day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--merchant", help="rebuild only this merchant_id")
+        parser.add_argument("--chunk-days", type=int, default=7, help="days rebuilt per database transaction")
+        parser.add_argument("--batch-size", type=int, default=1000, help="rows per bulk insert")
+
+    def handle(self, *args, **options):
+        if options["chunk_days"] < 1:
+            raise CommandError("--chunk-days must be at least 1.")
+
+        transactions = Transaction.objects.filter(merchant_account__isnull=False).annotate(
+            day=TruncDate(Coalesce("transaction_date", "created_at"), tzinfo=timezone.get_current_timezone())
+        )
+        aggregates = MerchantDailyAggregate.objects.all()
+        if options["merchant"]:
+            transactions = transactions.filter(merchant_account__merchant_id=options["merchant"])
+            aggregates = aggregates.filter(merchant__merchant_id=options["merchant"])
+
+        bounds = transactions.aggregate(first=Min("day"), last=Max("day"))
+        since = options["since"] or bounds["first"]
+        until = options["until"] or bounds["last"]
+        if since is None or until is None:
+            self.stdout.write("No transactions to aggregate.")
+            return
+        if (archived_until := ArchivedTransaction.objects.aggregate(last=Max("day"))["last"]) and since <= archived_until:
+            since = archived_until + timedelta(days=1)
+            self.stdout.write(f"Keeping aggregates up to {archived_until}, which include archived transactions.")
+            if since > until:
+                return
+
+        chunk = timedelta(days=options["chunk_days"])
+        start, rebuilt = since, 0
+        while start <= until:
+            end = min(start + chunk - timedelta(days=1), until)
+            rows = (
+                transactions.filter(day__range=(start, end))
+                .values("merchant_account_id", "day", "status", "job_cd", "currency")
+                .annotate(transaction_count=Count("id"), total_amount=Sum("amount"))
+                .order_by()
+            )
+            with transaction.atomic():
+                aggregates.filter(day__range=(start, end)).delete()
+                created = MerchantDailyAggregate.objects.bulk_create(
+                    (
+                        MerchantDailyAggregate(
+                            merchant_id=row["merchant_account_id"],
+                            day=row["day"],
+                            status=row["status"],
+                            job_cd=row["job_cd"],
+                            currency=row["currency"],
+                            transaction_count=row["transaction_count"],
+                            total_amount=row["total_amount"],
+                        )
+                        for row in rows
+                    ),
+                    batch_size=options["batch_size"],
+                )
+            rebuilt += len(created)
+            self.stdout.write(f"{start} .. {end}: {len(created)} aggregate rows")
+            start = end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} aggregate rows from {since} to {until}."))
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from GMOPayment.bins import BinIndex, build_index, read_ranges
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the memory-mapped BIN index from a CSV with start, end, brand and issuer columns "
+        "(start/end are card number prefixes; end defaults to start). Running workers pick up the "
+        "new file when they restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", type=Path)
+        parser.add_argument(
+            "--output", type=Path, default=None,
+            help="index file to write (default: GMO_PAYMENT['bin_index_path'])",
+        )
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        if not source.is_file():
+            raise CommandError(f"{source} does not exist.")
+        output = options["output"] or Path(settings.GMO_PAYMENT["bin_index_path"])
+
+        count = build_index(read_ranges(source), output)
+        index = BinIndex(output)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} ranges ({output.stat().st_size} bytes) to {output}."
+        ))
+        if len(index) != count:
+            raise CommandError(f"{output} holds {len(index)} ranges, expected {count}.")
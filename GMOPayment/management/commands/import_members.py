@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from GMOPayment.bulk import BulkRunner, Checkpoint, MemberRecord, read_members
+from GMOPayment.exceptions import GMOAPIException, GMONotFound, GMOValidationError
+from GMOPayment.models.member import Member
+from GMOPayment.services.member import GMOMemberService, gateway_member_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Create members on GMO and locally from a .csv (member_id,name), .jsonl or one-id-per-line file. "
+        "Members that already exist locally are skipped; --resume continues an interrupted run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument("--concurrency", type=int, default=8, help="GMO requests in flight")
+        parser.add_argument("--batch-size", type=int, default=500, help="members per database round trip")
+        parser.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+        parser.add_argument("--failures", type=Path, help="append failed members to this JSON-lines file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not path.is_file():
+            raise CommandError(f"{path} does not exist.")
+        service = GMOMemberService()
+
+        def pending(batch: list[MemberRecord]) -> list[MemberRecord]:
+            existing = set(
+                Member.objects.filter(member_id__in=[record.member_id for record in batch])
+                .values_list("member_id", flat=True)
+            )
+            unique = {record.member_id: record for record in batch if record.member_id not in existing}
+            return list(unique.values())
+
+        def create(record: MemberRecord) -> None:
+            try:
+                service.create_member(record.member_id, record.name)
+            except (GMOValidationError, GMOAPIException) as error:
+                # A run killed after GMO created a member but before its batch was committed left it
+                # on GMO only; when GMO already knows the member, resume records it locally instead
+                try:
+                    service.get_member(gateway_member_id(record.member_id))
+                except GMONotFound:
+                    raise error from None
+
+        def commit(records: list[MemberRecord]) -> None:
+            Member.objects.bulk_create(
+                [Member(member_id=record.member_id, name=record.name) for record in records],
+                ignore_conflicts=True,
+            )
+
+        failures = options["failures"].open("a", encoding="utf-8") if options["failures"] else None
+        try:
+            runner = BulkRunner(
+                pending=pending,
+                action=create,
+                commit=commit,
+                concurrency=options["concurrency"],
+                batch_size=options["batch_size"],
+                checkpoint=Checkpoint(path.with_name(path.name + ".import-checkpoint")),
+                failures=failures,
+                report=lambda progress: self.stdout.write(progress.summary()),
+            )
+            progress = runner.run(read_members(path), resume=options["resume"])
+        finally:
+            if failures is not None:
+                failures.close()
+
+        style = self.style.WARNING if progress.failed else self.style.SUCCESS
+        self.stdout.write(style(f"Import finished: {progress.summary()}"))
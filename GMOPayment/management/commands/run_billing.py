@@ -0,0 +1,51 @@
+from datetime import timedelta
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from GMOPayment.billing import BillingScheduler
+
+
+def parse_shard(value):
+    index, _, count = value.partition("/")
+    try:
+        shard = int(index), int(count)
+    except ValueError:
+        raise CommandError("--shard must look like INDEX/COUNT, e.g. 0/4.")
+    if not 0 <= shard[0] < shard[1]:
+        raise CommandError("--shard INDEX must be between 0 and COUNT - 1.")
+    return shard
+
+
+class Command(BaseCommand):
+    help = (
+        "Charge due recurring billing schedules. Any number of nodes may run this at once: due rows are claimed "
+        "with SELECT ... FOR UPDATE SKIP LOCKED and leased while they are charged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=8, help="charges in flight")
+        parser.add_argument("--batch-size", type=int, default=100, help="schedules claimed per round")
+        parser.add_argument("--shard", type=parse_shard, help="only bill schedules with id %% COUNT == INDEX")
+        parser.add_argument("--lease", type=int, default=600, help="seconds a claimed schedule is reserved")
+        parser.add_argument("--retry-delay", type=int, default=3600, help="seconds before the first retry")
+        parser.add_argument("--max-failures", type=int, default=5, help="consecutive failures before deactivating")
+        parser.add_argument("--loop", type=int, default=0, help="keep polling every N seconds instead of exiting")
+
+    def handle(self, *args, **options):
+        scheduler = BillingScheduler(
+            concurrency=options["concurrency"],
+            batch_size=options["batch_size"],
+            shard=options["shard"],
+            lease=timedelta(seconds=options["lease"]),
+            retry_delay=timedelta(seconds=options["retry_delay"]),
+            max_failures=options["max_failures"],
+        )
+        while True:
+            started = time.monotonic()
+            stats = scheduler.run_once()
+            if stats.claimed or not options["loop"]:
+                self.stdout.write(f"Billing run: {stats.summary()} in {time.monotonic() - started:.1f}s")
+            if not options["loop"]:
+                break
+            time.sleep(options["loop"])
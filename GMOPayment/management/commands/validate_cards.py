@@ -0,0 +1,66 @@
+from collections.abc import Iterator
+import csv
+import itertools
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from GMOPayment.cards import CardInput, validate_cards
+
+FIELDS = ("card_number", "card_holder_name", "expire_month", "expire_year", "security_code")
+
+
+def read_cards(path: Path) -> Iterator[CardInput]:
+    """Yield cards from a ``.csv`` with a header row or a JSON-lines file using the ``FIELDS`` names"""
+    with path.open(newline="", encoding="utf-8") as stream:
+        if path.suffix == ".csv":
+            rows = csv.DictReader(stream)
+        else:
+            rows = (json.loads(line) for line in stream if line.strip())
+        for row in rows:
+            yield CardInput(*(str(row[name]) if row.get(name) not in (None, "") else None for name in FIELDS))
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-validate a card file for a bulk import without contacting GMO: Luhn checksum, number and "
+        "security-code length by brand, and expiry. Exits non-zero when any card is rejected."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path, help=f".csv or .jsonl file with {', '.join(FIELDS)}")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--rejects", type=Path, help="write rejected lines and their errors to this JSON-lines file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not path.is_file():
+            raise CommandError(f"{path} does not exist.")
+
+        today = timezone.now().date()
+        cards = read_cards(path)
+        accepted = rejected = offset = 0
+        rejects = options["rejects"].open("w", encoding="utf-8") if options["rejects"] else None
+        try:
+            while batch := list(itertools.islice(cards, options["batch_size"])):
+                valid, errors = validate_cards(batch, today)
+                accepted += len(valid)
+                rejected += len(errors)
+                for position, card_errors in errors.items():
+                    # Record numbers count from 1, like the lines of a file without a header
+                    record = offset + position + 1
+                    if rejects is not None:
+                        rejects.write(json.dumps({"record": record, "errors": card_errors}) + "\n")
+                    else:
+                        self.stdout.write(f"record {record}: {card_errors}")
+                offset += len(batch)
+        finally:
+            if rejects is not None:
+                rejects.close()
+
+        summary = f"{accepted} valid, {rejected} rejected"
+        if rejected:
+            raise CommandError(f"Card validation failed: {summary}")
+        self.stdout.write(self.style.SUCCESS(f"Card validation passed: {summary}"))
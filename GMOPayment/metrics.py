@@ -0,0 +1,80 @@
+"""
+In-process metrics: counters, gauges and rolling latency windows.
+
+Values are per worker process and exposed at ``/health/metrics``.
+"""
+from collections import Counter, defaultdict, deque
+import threading
+from typing import Any
+
+
+_lock = threading.Lock()
+_counters: Counter[str] = Counter()
+_gauges: dict[str, float] = {}
+
+
+def increment(name: str, amount: int = 1) -> None:
+    with _lock:
+        _counters[name] += amount
+
+
+def set_gauge(name: str, value: float) -> None:
+    with _lock:
+        _gauges[name] = value
+
+
+def get_counter(name: str) -> int:
+    return _counters[name]
+
+
+class LatencyTracker:
+    """Keeps the most recent latencies per key for percentile estimates"""
+
+    def __init__(self, window: int = 512):
+        self.window = window
+        self._samples: defaultdict[str, deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def count(self, key: str) -> int:
+        return len(self._samples.get(key, ()))
+
+    def percentile(self, key: str, pct: float) -> float | None:
+        """Latency in seconds at ``pct`` for ``key``, or ``None`` without samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        return samples[min(int(len(samples) * pct / 100), len(samples) - 1)]
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            key: {f"p{pct}_ms": round((self.percentile(key, pct) or 0) * 1000, 2) for pct in (50, 95, 99)}
+            for key in keys
+        }
+
+
+gateway_latency = LatencyTracker()
+admission_wait = LatencyTracker()
+
+
+def snapshot() -> dict[str, Any]:
+    with _lock:
+        counters, gauges = dict(_counters), dict(_gauges)
+    return {
+        "counters": counters,
+        "gauges": gauges,
+        "gateway_latency": gateway_latency.snapshot(),
+        "admission_wait": admission_wait.snapshot(),
+    }
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
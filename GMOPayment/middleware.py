@@ -0,0 +1,208 @@
+from abc import ABC, abstractmethod
+from functools import cache
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from GMOPayment.admission import get_controller
+from GMOPayment.deadline import deadline_scope
+from GMOPayment.exceptions import GMOServiceOverloaded
+from GMOPayment.routers import is_pinned, replica_reads
+
+
+class HybridMiddleware(ABC):
+    """Base for middleware that runs natively under both WSGI and ASGI
+
+    Under ASGI, async views such as the order-status long poll would
+    otherwise be forced onto a worker thread by a sync-only middleware.
+    Subclasses implement both ``handle`` (sync) and ``__acall__`` (async).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.handle(request)
+
+    @abstractmethod
+    def handle(self, request):
+        """Process a request under WSGI"""
+
+    @abstractmethod
+    async def __acall__(self, request):
+        """Process a request under ASGI"""
+
+
+class AdmissionControlMiddleware(HybridMiddleware):
+    """Bounds the gateway-bound requests running per endpoint group and sheds the excess with 503
+
+    See ``GMOPayment.admission``. It sits near the top of the stack so a
+    shed request costs no session, auth or database work.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.controller = get_controller()
+
+    def _overloaded(self):
+        error = GMOServiceOverloaded()
+        response = JsonResponse({"detail": error.detail}, status=error.status_code)
+        response.headers["Retry-After"] = str(self.controller.policy.retry_after)
+        return response
+
+    def handle(self, request):
+        if (route := self.controller.route(request)) is None:
+            return self.get_response(request)
+        group, priority = route
+        if not group.acquire(priority):
+            return self._overloaded()
+        try:
+            return self.get_response(request)
+        finally:
+            group.release()
+
+    async def __acall__(self, request):
+        if (route := self.controller.route(request)) is None:
+            return await self.get_response(request)
+        group, priority = route
+        if not await group.acquire_async(priority):
+            return self._overloaded()
+        try:
+            return await self.get_response(request)
+        finally:
+            group.release()
+
+
+class DeadlineMiddleware(HybridMiddleware):
+    """Gives every inbound request a deadline that bounds all GMO calls it makes"""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.budget = settings.GMO_PAYMENT.get("request_budget")
+
+    def handle(self, request):
+        with deadline_scope(self.budget or None):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with deadline_scope(self.budget or None):
+            return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """Serves safe requests from read replicas, except shortly after the client wrote
+
+    A mutating request sets a short-lived cookie; while it is present the
+    client's reads stay on the primary so it sees its own writes.
+    """
+
+    SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+    PIN_COOKIE = "gmo_primary_pin"
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.pin_seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+
+    def _use_replica(self, request) -> bool:
+        return request.method in self.SAFE_METHODS and self.PIN_COOKIE not in request.COOKIES
+
+    def _pin(self, request, response, wrote: bool):
+        if (wrote or request.method not in self.SAFE_METHODS) and self.pin_seconds:
+            response.set_cookie(self.PIN_COOKIE, "1", max_age=self.pin_seconds, httponly=True, samesite="Lax")
+        return response
+
+    def handle(self, request):
+        with replica_reads(self._use_replica(request)):
+            response = self.get_response(request)
+            wrote = is_pinned()
+        return self._pin(request, response, wrote)
+
+    async def __acall__(self, request):
+        with replica_reads(self._use_replica(request)):
+            response = await self.get_response(request)
+            wrote = is_pinned()
+        return self._pin(request, response, wrote)
+
+
+@cache
+def _brotli():
+    """The optional ``brotli`` module, or ``None`` when it is not installed"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+_ACCEPT_ENCODING_RE = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*")
+
+
+def negotiate_encoding(accept_encoding: str, available: tuple[str, ...]) -> str | None:
+    """Best of ``available`` (in server preference order) allowed by an Accept-Encoding header"""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        if match := _ACCEPT_ENCODING_RE.fullmatch(part):
+            try:
+                weights[match[1].lower()] = float(match[2]) if match[2] else 1.0
+            except ValueError:
+                continue
+    wildcard = weights.get("*", 0.0)
+    candidates = [(weights.get(coding, wildcard), -rank, coding) for rank, coding in enumerate(available)]
+    weight, _, coding = max(candidates, default=(0.0, 0, None))
+    return coding if weight > 0 else None
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """Compresses large responses with brotli (when installed) or gzip, as the client accepts
+
+    Responses smaller than ``GMO_PAYMENT["compression_min_size"]`` bytes,
+    streaming responses and responses that already carry a
+    Content-Encoding are left alone.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = settings.GMO_PAYMENT.get("compression_min_size", 1024)
+        self.brotli_quality = settings.GMO_PAYMENT.get("compression_brotli_quality", 5)
+        self.encodings = ("br", "gzip") if _brotli() else ("gzip",)
+
+    def _compress(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding") or len(response.content) < self.min_size:
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        coding = negotiate_encoding(request.headers.get("Accept-Encoding", ""), self.encodings)
+        if coding is None:
+            return response
+
+        if coding == "br":
+            body = _brotli().compress(response.content, quality=self.brotli_quality)
+        else:
+            body = compress_string(response.content)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response.headers["Content-Length"] = str(len(body))
+        response.headers["Content-Encoding"] = coding
+        # The compressed body is a different representation of the same entity
+        if (etag := response.get("ETag")) and etag.startswith('"'):
+            response.headers["ETag"] = f"W/{etag}"
+        return response
+
+    def handle(self, request):
+        return self._compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._compress(request, await self.get_response(request))
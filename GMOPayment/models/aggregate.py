@@ -0,0 +1,29 @@
+from django.db import models
+
+from GMOPayment.models.merchant import Merchant
+from GMOPayment.models.transaction import Transaction
+
+
+class MerchantDailyAggregate(models.Model):
+    """Transaction count and amount per merchant, day, status, job code and currency"""
+
+    merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE, related_name='daily_aggregates')
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Transaction.TRANSACTION_STATUS_CHOICES)
+    job_cd = models.CharField(max_length=10, choices=Transaction.JOB_CODE_CHOICES)
+    currency = models.CharField(max_length=3, default='JPY')
+    transaction_count = models.BigIntegerField(default=0)
+    total_amount = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['merchant', 'day', 'status', 'job_cd', 'currency'],
+                name='unique_merchant_daily_aggregate',
+            ),
+        ]
+        indexes = [models.Index(fields=['merchant', 'day'])]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.day} {self.status}/{self.job_cd}: {self.transaction_count}"
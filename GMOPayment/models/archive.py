@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class ArchivedTransaction(models.Model):
+    """Where an archived ``Transaction`` row lives: a gzip block inside an archive chunk file"""
+
+    order_id = models.CharField(max_length=50, unique=True)
+    day = models.DateField()
+    chunk = models.CharField(max_length=255)
+    offset = models.PositiveBigIntegerField()
+    length = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['day'])]
+
+    def __str__(self):
+        return f"{self.order_id} in {self.chunk}@{self.offset}"
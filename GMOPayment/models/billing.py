@@ -0,0 +1,43 @@
+from django.db import models
+
+from GMOPayment.models.base import BaseModel
+from GMOPayment.models.member import Member
+from GMOPayment.models.merchant import Merchant
+from GMOPayment.models.payment_method import PaymentMethod
+
+
+class BillingSchedule(BaseModel):
+    INTERVAL_CHOICES = [
+        ('DAY', 'Daily'),
+        ('WEEK', 'Weekly'),
+        ('MONTH', 'Monthly'),
+        ('YEAR', 'Yearly'),
+    ]
+
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='billing_schedules')
+    merchant_account = models.ForeignKey(Merchant, on_delete=models.SET_NULL, null=True, blank=True)
+    # Charged card; the member's default card when empty
+    payment_method = models.ForeignKey(PaymentMethod, on_delete=models.SET_NULL, null=True, blank=True)
+    amount = models.PositiveIntegerField()
+    currency = models.CharField(max_length=3, default='JPY')
+    interval = models.CharField(max_length=5, choices=INTERVAL_CHOICES, default='MONTH')
+    interval_count = models.PositiveSmallIntegerField(default=1)
+    next_run_at = models.DateTimeField()
+    # Scheduled run a failing charge belongs to while next_run_at holds its retry time;
+    # empty when next_run_at is the scheduled run itself
+    scheduled_at = models.DateTimeField(null=True, blank=True)
+    # Set while a scheduler node is charging this schedule; other nodes skip it until then
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    # Order id of a charge that was sent but whose outcome is not recorded yet; the next
+    # claim asks GMO about it instead of charging again
+    pending_order_id = models.CharField(max_length=50, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    failure_count = models.PositiveSmallIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['is_active', 'next_run_at'])]
+
+    def __str__(self):
+        return f"{self.member} {self.amount} {self.currency} every {self.interval_count} {self.interval.lower()}"
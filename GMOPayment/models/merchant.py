@@ -5,11 +5,18 @@ from GMOPayment.models.base import BaseModel, ContactInfoMixin
 
 
 class Merchant(BaseModel, ContactInfoMixin):
+    AUTHORIZATION_MODE_CHOICES = [
+        ('AUTH', 'Authorize only'),
+        ('CAPTURE', 'Authorize and capture'),
+    ]
+
     merchant_id = models.CharField(max_length=50, unique=True, validators=[MinLengthValidator(5)])
     name = models.CharField(max_length=255)
     site_id = models.CharField(max_length=50)
     shop_id = models.CharField(max_length=50)
     shop_password = models.CharField(max_length=100)
+    # Charge mode for this merchant's charges; empty falls back to GMO_PAYMENT["authorization_mode"]
+    authorization_mode = models.CharField(max_length=10, choices=AUTHORIZATION_MODE_CHOICES, null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -13,6 +13,7 @@ class PaymentMethod(BaseModel):
         ('DISC', 'Discover'),
         ('JCB', 'JCB'),
     ]
+    CARD_BRAND_LABELS = dict(CARD_BRAND_CHOICES)
 
     member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='payment_methods')
     card_no = models.CharField(max_length=20, validators=[MinLengthValidator(13)])
@@ -20,10 +21,23 @@ class PaymentMethod(BaseModel):
     security_code = models.CharField(max_length=6, null=True, blank=True, validators=[MinLengthValidator(3)])
     cardholder_name = models.CharField(max_length=255, null=True, blank=True)
     brand = models.CharField(max_length=10, choices=CARD_BRAND_CHOICES, null=True, blank=True)
+    issuer = models.CharField(max_length=255, null=True, blank=True)
     is_default = models.BooleanField(default=False)
+    card_id = models.CharField(max_length=50, null=True, blank=True)  # GMO on-file card reference
+    card_type = models.CharField(max_length=20, default='CREDIT_CARD')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['member'],
+                condition=models.Q(is_default=True),
+                name='unique_default_payment_method',
+            ),
+            models.UniqueConstraint(fields=['member', 'card_id'], name='unique_member_card_id'),
+        ]
 
     def __str__(self):
         return f"{self.get_brand_display()} - {self.card_no[-4:]}"
 
     def get_brand_display(self):
-        return dict(self.CARD_BRAND_CHOICES).get(self.brand, "Unknown")
+        return self.CARD_BRAND_LABELS.get(self.brand, "Unknown")
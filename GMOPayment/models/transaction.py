@@ -20,6 +20,8 @@ class Transaction(BaseModel):
         ('RETURN', 'Refund'),
         ('SAUTH', 'Secure Authorize')
     ]
+    TRANSACTION_STATUS_LABELS = dict(TRANSACTION_STATUS_CHOICES)
+    JOB_CODE_LABELS = dict(JOB_CODE_CHOICES)
 
     order_id = models.CharField(max_length=50, unique=True)
     access_id = models.CharField(max_length=50)
@@ -40,4 +42,4 @@ class Transaction(BaseModel):
         return f"Transaction {self.order_id} - {self.get_status_display()}"
 
     def get_status_display(self):
-        return dict(self.TRANSACTION_STATUS_CHOICES).get(self.status, "Unknown")
+        return self.TRANSACTION_STATUS_LABELS.get(self.status, "Unknown")
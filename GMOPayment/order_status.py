@@ -0,0 +1,146 @@
+"""
+Order status board for long-polling clients.
+
+Services and the GMO webhook publish the latest known status of an order
+(keyed by access id) to the Django cache and hand it straight to the
+waiters in this process, waking them through an ``asyncio.Event`` each.
+``wait_for_change`` runs on the event loop, so a waiting request holds no
+worker thread. When the cache is shared between processes (e.g. Redis),
+waiters also re-read it every ``poll_interval`` seconds to pick up changes
+published elsewhere; with the per-process default cache they never poll.
+Cache reads run on the default executor rather than through the single
+thread ``cache.aget`` uses, so many waiters do not queue behind each other.
+"""
+import asyncio
+from dataclasses import asdict, dataclass
+import threading
+import time
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from GMOPayment import metrics
+from GMOPayment.responses import OrderResult
+
+
+CACHE_PREFIX = "gmo_order_status"
+CACHE_TIMEOUT = 60 * 60
+
+
+@dataclass(frozen=True, slots=True)
+class OrderStatus:
+    """Latest known status of an order"""
+
+    access_id: str
+    status: str | None
+    order_id: str | None
+    version: int
+    source: str
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _cache_key(access_id: str) -> str:
+    return f"{CACHE_PREFIX}:{access_id}"
+
+
+def _cache_is_shared() -> bool:
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+async def _read(access_id: str) -> OrderStatus | None:
+    return await sync_to_async(lambda: cache.get(_cache_key(access_id)), thread_sensitive=False)()
+
+
+def _newer(state: OrderStatus | None, other: OrderStatus | None) -> OrderStatus | None:
+    if state is None or (other is not None and other.version > state.version):
+        return other
+    return state
+
+
+class _Waiter:
+    """One waiting coroutine: the latest status handed to it and the event that wakes it"""
+
+    __slots__ = ("loop", "event", "state")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.state: OrderStatus | None = None
+
+    def deliver(self, state: OrderStatus) -> None:
+        """Runs on the waiter's loop"""
+        self.state = _newer(self.state, state)
+        self.event.set()
+
+
+class OrderStatusBoard:
+    """Publishes order statuses and wakes the coroutines waiting on them"""
+
+    def __init__(self):
+        self._waiters: dict[str, set[_Waiter]] = {}
+        self._lock = threading.Lock()
+
+    def current(self, access_id: str) -> OrderStatus | None:
+        return cache.get(_cache_key(access_id))
+
+    def publish(self, access_id: str, status: str | None, order_id: str | None = None, source: str = "service") -> OrderStatus:
+        """Record a status and notify local waiters; safe to call from any thread"""
+        state = OrderStatus(access_id, status, order_id, time.time_ns(), source)
+        cache.set(_cache_key(access_id), state, CACHE_TIMEOUT)
+        with self._lock:
+            waiters = list(self._waiters.get(access_id, ()))
+        for waiter in waiters:
+            waiter.loop.call_soon_threadsafe(waiter.deliver, state)
+        metrics.increment(f"order_status.published.{source}")
+        return state
+
+    def publish_result(self, result: OrderResult, source: str = "service") -> OrderStatus | None:
+        """Publish the order section of a GMO result, if it identifies an order"""
+        if not result.access_id:
+            return None
+        return self.publish(result.access_id, result.order_status, result.order.order_id, source)
+
+    async def wait_for_change(
+            self,
+            access_id: str,
+            known_status: str | None,
+            timeout: float,
+            poll_interval: float = 1.0,
+    ) -> OrderStatus | None:
+        """Return the order's status once it differs from ``known_status``, or ``None`` on timeout"""
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop)
+        with self._lock:
+            self._waiters.setdefault(access_id, set()).add(waiter)
+        metrics.increment("order_status.waits")
+        deadline = loop.time() + timeout
+        poll = poll_interval if poll_interval > 0 and _cache_is_shared() else None
+        try:
+            state = await _read(access_id)
+            while True:
+                state = _newer(state, waiter.state)
+                if state is not None and state.status != known_status:
+                    return state
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                waiter.event.clear()
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), min(poll, remaining) if poll else remaining)
+                except TimeoutError:
+                    if poll:
+                        state = _newer(state, await _read(access_id))
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(access_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[access_id]
+
+
+board = OrderStatusBoard()
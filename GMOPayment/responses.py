@@ -0,0 +1,237 @@
+"""
+Typed GMO response objects.
+
+A response keeps the raw body bytes and decodes them only when a field is
+first read; typed sections (``order``, ``card_result`` ...) are built on
+first access and cached. Views hand the raw bytes straight back to the
+client with ``to_response``, so a response that is only passed through is
+never decoded or re-encoded. Responses are read-only ``Mapping``s, so code
+that indexes them like the plain ``dict`` GMO returns keeps working.
+"""
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+import json
+from typing import Any
+
+from django.http import HttpResponse
+
+
+@dataclass(frozen=True, slots=True)
+class OrderSection:
+    """The ``order`` section of a GMO response"""
+
+    order_id: str | None
+    access_id: str | None
+    amount: str | None
+    currency: str | None
+    order_status: str | None
+    charge_type: str | None
+    transaction_type: str | None
+    created_at: str | None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> 'OrderSection':
+        return cls(
+            order_id=data.get("orderId"),
+            access_id=data.get("accessId"),
+            amount=data.get("amount"),
+            currency=data.get("currency"),
+            order_status=data.get("orderStatus"),
+            charge_type=data.get("chargeType"),
+            transaction_type=data.get("transactionType"),
+            created_at=data.get("createdDateTime"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CardSection:
+    """Masked card information (``cardResult`` and card detail entries)"""
+
+    card_number: str | None
+    cardholder_name: str | None
+    expiry_month: str | None
+    expiry_year: str | None
+    brand: str | None
+    issuer_code: str | None
+    funding_type: str | None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> 'CardSection':
+        return cls(
+            card_number=data.get("cardNumber") or data.get("maskedCardNumber"),
+            cardholder_name=data.get("cardholderName"),
+            expiry_month=data.get("expiryMonth"),
+            expiry_year=data.get("expiryYear"),
+            brand=data.get("brand"),
+            issuer_code=data.get("issuerCode"),
+            funding_type=data.get("fundingType"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class OnfileCardSection:
+    """Reference to a card stored on file at GMO"""
+
+    member_id: str | None
+    card_id: str | None
+    type: str | None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> 'OnfileCardSection':
+        return cls(member_id=data.get("memberId"), card_id=data.get("cardId"), type=data.get("type"))
+
+
+_MISSING = object()
+
+
+class GMOResponse(Mapping[str, Any]):
+    """Raw GMO response body, decoded on first access"""
+
+    __slots__ = ("raw", "_data", "_sections")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._data: dict[str, Any] | None = None
+        self._sections: dict[str, Any] | None = None
+
+    @classmethod
+    def from_data(cls, data: Mapping[str, Any]) -> 'GMOResponse':
+        return cls(json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode())
+
+    @property
+    def data(self) -> dict[str, Any]:
+        if self._data is None:
+            self._data = json.loads(self.raw) if self.raw else {}
+        return self._data
+
+    def _section(self, name: str, build: Any) -> Any:
+        """Build and cache a typed view of part of the body"""
+        if self._sections is None:
+            self._sections = {}
+        if (value := self._sections.get(name, _MISSING)) is _MISSING:
+            value = self._sections[name] = build(self.data)
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.raw[:80]!r})"
+
+    def to_response(self, status: int) -> HttpResponse:
+        """Pass the body through to the client without re-serializing it"""
+        return HttpResponse(self.raw, status=status, content_type="application/json")
+
+
+def _optional(section_cls: Any, data: Any) -> Any:
+    return section_cls.from_dict(data) if isinstance(data, Mapping) else None
+
+
+class OrderResult(GMOResponse):
+    """``order/*`` results"""
+
+    __slots__ = ()
+
+    @property
+    def order(self) -> OrderSection | None:
+        return self._section("order", lambda data: _optional(OrderSection, data.get("order")))
+
+    @property
+    def access_id(self) -> str | None:
+        return self.order.access_id if self.order else None
+
+    @property
+    def order_status(self) -> str | None:
+        return self.order.order_status if self.order else None
+
+
+class ChargeResult(OrderResult):
+    """``credit/charge``, ``credit/on-file/charge`` and ``tds2/finalizeCharge`` results"""
+
+    __slots__ = ()
+
+    @property
+    def credit_result(self) -> Mapping[str, Any]:
+        return self.data.get("creditResult") or {}
+
+    @property
+    def authorization_mode(self) -> str | None:
+        return self.credit_result.get("authorizationMode")
+
+    @property
+    def card(self) -> CardSection | None:
+        return self._section("card", lambda data: _optional(CardSection, self.credit_result.get("cardResult")))
+
+    @property
+    def redirect_url(self) -> str | None:
+        """3DS challenge URL when GMO requires authentication before finalizing"""
+        return (self.data.get("tds2Result") or {}).get("redirectUrl") or self.data.get("redirectUrl")
+
+
+class MemberResult(GMOResponse):
+    """``member/*`` results"""
+
+    __slots__ = ()
+
+    @property
+    def member_id(self) -> str | None:
+        return self.data.get("memberId")
+
+    @property
+    def member_name(self) -> str | None:
+        return self.data.get("memberName")
+
+
+class CardDetailsResult(GMOResponse):
+    """``credit/getCardDetails`` and ``credit/verifyCard`` results"""
+
+    __slots__ = ()
+
+    @property
+    def cards(self) -> list[CardSection]:
+        def build(data: dict[str, Any]) -> list[CardSection]:
+            details = data.get("cardDetails", data.get("cardResult"))
+            if isinstance(details, Mapping):
+                details = [details]
+            return [CardSection.from_dict(item) for item in details or () if isinstance(item, Mapping)]
+
+        return self._section("cards", build)
+
+
+class StoreCardResult(GMOResponse):
+    """``credit/storeCard`` results"""
+
+    __slots__ = ()
+
+    @property
+    def onfile_card(self) -> OnfileCardSection | None:
+        return self._section("onfile_card", lambda data: _optional(OnfileCardSection, data.get("onfileCard")))
+
+    @property
+    def card(self) -> CardSection | None:
+        return self._section("card", lambda data: _optional(CardSection, data.get("cardResult")))
+
+
+class TokenResult(GMOResponse):
+    """``payment/CreateToken.json`` results"""
+
+    __slots__ = ()
+
+    @property
+    def token_object(self) -> Mapping[str, Any]:
+        return self.data.get("tokenObject") or {}
+
+    @property
+    def tokens(self) -> list[str]:
+        tokens = self.token_object.get("token") or []
+        return [tokens] if isinstance(tokens, str) else list(tokens)
+
+    @property
+    def masked_card_number(self) -> str | None:
+        return self.token_object.get("maskedCardNumber")
@@ -0,0 +1,163 @@
+"""
+Endpoint-aware retries for the GMO session.
+
+``GMORetry`` decides per endpoint family whether a failed attempt may be
+resent:
+
+* inquiries and authentication retry connection errors, read errors and 5xx
+* idempotent mutations and token creation retry connection errors and
+  502/503/504, but not read errors or 500s, where GMO may already have acted
+* charges retry only connection errors, i.e. when the request never left
+
+Backoff uses decorrelated jitter, and every retry spends from a process-wide
+``RetryBudget`` capped at a ratio of recent requests, so retries cannot
+multiply the load on GMO during an incident.
+"""
+from collections import deque
+import random
+import threading
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from urllib3 import Retry
+from urllib3.exceptions import MaxRetryError, ResponseError
+
+from GMOPayment import metrics
+from GMOPayment.audit import current_trail
+from GMOPayment.deadline import current_deadline
+from GMOPayment.endpoints import ENDPOINT_FAMILIES, EndpointFamily
+
+
+GATEWAY_ERROR_STATUSES = frozenset({502, 503, 504})
+
+
+def family_for_url(url: str | None) -> EndpointFamily:
+    """Endpoint family of a request URL; the OAuth endpoint is ``AUTH``"""
+    path = urlsplit(url or "").path.rstrip("/")
+    for endpoint, family in ENDPOINT_FAMILIES.items():
+        if path.endswith(f"/{endpoint}"):
+            return family
+    if path.endswith(("/token", "/oauth2/token", "/oauth")):
+        return EndpointFamily.AUTH
+    return EndpointFamily.CHARGE
+
+
+class RetryBudget:
+    """Allows retries up to ``ratio`` of the requests seen in the last ``window`` seconds
+
+    ``min_per_second`` keeps a trickle of retries available at low traffic.
+    """
+
+    def __init__(self, ratio: float = 0.1, window: float = 10.0, min_per_second: float = 1.0):
+        self.ratio = ratio
+        self.window = window
+        self.min_per_second = min_per_second
+        self._requests: deque[float] = deque()
+        self._retries: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        horizon = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < horizon:
+                events.popleft()
+
+    def record_request(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._requests.append(now)
+            self._trim(now)
+
+    def try_spend(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            allowed = len(self._requests) * self.ratio + self.min_per_second * self.window
+            if len(self._retries) < allowed:
+                self._retries.append(now)
+                return True
+            return False
+
+
+_budget: RetryBudget | None = None
+_budget_lock = threading.Lock()
+
+
+def get_retry_budget() -> RetryBudget:
+    """Process-wide retry budget configured from ``GMO_PAYMENT``"""
+    global _budget
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+                _budget = RetryBudget(
+                    ratio=gmo_settings.get("retry_budget_ratio", 0.1),
+                    min_per_second=gmo_settings.get("retry_budget_min_per_second", 1.0),
+                )
+    return _budget
+
+
+class GMORetry(Retry):
+    """urllib3 retry strategy applying the endpoint rules, jitter, budget and request deadline"""
+
+    def __init__(self, *args: Any, backoff_base: float = 0.1, jittered_backoff: float = 0.0, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.backoff_base = backoff_base
+        self.jittered_backoff = jittered_backoff
+
+    def new(self, **kwargs: Any) -> 'GMORetry':
+        kwargs.setdefault("backoff_base", self.backoff_base)
+        kwargs.setdefault("jittered_backoff", self.jittered_backoff)
+        return super().new(**kwargs)
+
+    def get_backoff_time(self) -> float:
+        return self.jittered_backoff if self.history else 0.0
+
+    def _allows(self, family: EndpointFamily, response: Any, error: Exception | None) -> bool:
+        if error is not None and self._is_connection_error(error):
+            return True
+        if family in (EndpointFamily.INQUIRY, EndpointFamily.AUTH):
+            return True
+        if family in (EndpointFamily.MUTATION, EndpointFamily.TOKEN):
+            return response is not None and response.status in GATEWAY_ERROR_STATUSES
+        return False
+
+    def _give_up(self, reason: str, url: str | None, error: Exception | None, _pool: Any) -> MaxRetryError:
+        metrics.increment(f"retry.denied.{reason}")
+        return MaxRetryError(_pool, url or "", error or ResponseError(f"retry denied: {reason}"))
+
+    def increment(
+            self,
+            method: str | None = None,
+            url: str | None = None,
+            response: Any = None,
+            error: Exception | None = None,
+            _pool: Any = None,
+            _stacktrace: Any = None,
+    ) -> Retry:
+        family = family_for_url(url)
+        if not self._allows(family, response, error):
+            raise self._give_up("not_retryable", url, error, _pool)
+
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+
+        # Decorrelated jitter: sleep = min(cap, uniform(base, previous * 3))
+        previous = max(self.jittered_backoff, self.backoff_base)
+        new_retry.jittered_backoff = min(self.backoff_max, random.uniform(self.backoff_base, previous * 3))
+
+        deadline = current_deadline()
+        if deadline is not None and deadline.remaining() <= new_retry.get_backoff_time():
+            raise self._give_up("deadline", url, error, _pool)
+        if not get_retry_budget().try_spend():
+            raise self._give_up("budget", url, error, _pool)
+
+        if (trail := current_trail()) is not None:
+            trail.retried(
+                response.status if response is not None else None,
+                repr(error) if error is not None else None,
+                new_retry.get_backoff_time(),
+            )
+        metrics.increment(f"retry.attempt.{family}")
+        return new_retry
@@ -0,0 +1,83 @@
+"""
+Read-replica database routing.
+
+Reads go to a replica only inside a ``replica_reads`` scope, which the
+``ReplicaRoutingMiddleware`` opens for safe (read-only) requests. Everything
+else, including every write, uses ``default``. A write pins the rest of the
+current context to ``default``, and the middleware pins the client for a
+short window after a mutating request, so clients read their own writes
+despite replication lag.
+"""
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import random
+
+from django.conf import settings
+
+from GMOPayment import metrics
+
+
+PRIMARY = "default"
+
+
+class _RoutingState:
+    """Mutable, so a write made in a copied context (e.g. a sync view under ASGI) still pins the request"""
+
+    __slots__ = ("replica_reads", "pinned")
+
+    def __init__(self, replica_reads: bool):
+        self.replica_reads = replica_reads
+        self.pinned = False
+
+
+_state: ContextVar[_RoutingState | None] = ContextVar("gmo_routing_state", default=None)
+
+
+def replica_aliases() -> list[str]:
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+@contextmanager
+def replica_reads(enabled: bool = True) -> Iterator[None]:
+    """Allow reads in the enclosed block to be served by a replica"""
+    token = _state.set(_RoutingState(enabled))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def pin_primary() -> None:
+    """Send the remaining reads of the current scope to ``default``"""
+    if (state := _state.get()) is not None:
+        state.pinned = True
+
+
+def is_pinned() -> bool:
+    return (state := _state.get()) is not None and state.pinned
+
+
+class ReplicaRouter:
+    """Routes replica-eligible reads across the replicas and everything else to ``default``"""
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if not self.replicas or state is None or not state.replica_reads or state.pinned:
+            return PRIMARY
+        metrics.increment("db.read.replica")
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary, so objects may relate across aliases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
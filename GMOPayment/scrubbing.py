@@ -0,0 +1,109 @@
+from collections.abc import Mapping
+from functools import lru_cache
+import re
+from typing import Any
+
+from GMOPayment.cards import luhn_valid
+
+
+FILTERED = "[FILTERED]"
+
+# Keys whose values are secrets or card data, compared case-insensitively without separators
+SENSITIVE_KEYS = frozenset({
+    "accesspass",
+    "accountnumber",
+    "accesstoken",
+    "apikey",
+    "authorization",
+    "cardno",
+    "cardnumber",
+    "cookie",
+    "cvc",
+    "cvv",
+    "encrypteddata",
+    "password",
+    "pmtokenapikey",
+    "pmtokenpublickey",
+    "securitycode",
+    "shoppass",
+    "shoppassword",
+    "sitepass",
+    "sitepassword",
+    "token",
+    "cardtoken",
+})
+
+# Keys kept partially visible so log lines and cassettes stay correlatable
+PAN_KEYS = frozenset({"cardno", "cardnumber"})
+TOKEN_KEYS = frozenset({"token", "cardtoken"})
+
+# 13-19 digit runs, optionally grouped by spaces or dashes, not part of a longer number; free
+# text only masks the runs that also pass the Luhn check, which leaves most order ids and timestamps alone
+PAN_PATTERN = re.compile(r"(?<![\d*])\d(?:[ -]?\d){12,18}(?![\d*])")
+
+
+@lru_cache(maxsize=4096)
+def _normalize_key(key: str) -> str:
+    return key.replace("_", "").replace("-", "").casefold()
+
+
+def is_sensitive_key(key: Any) -> bool:
+    """Whether a mapping key holds a secret or card data"""
+    return isinstance(key, str) and _normalize_key(key) in SENSITIVE_KEYS
+
+
+def _mask_digits(match: re.Match[str]) -> str:
+    digits = sum(c.isdigit() for c in match[0])
+    seen, masked = 0, []
+    for char in match[0]:
+        if char.isdigit():
+            seen += 1
+            masked.append(char if seen <= 6 or seen > digits - 4 else "*")
+        else:
+            masked.append(char)
+    return "".join(masked)
+
+
+def _mask_match(match: re.Match[str]) -> str:
+    if not luhn_valid("".join(c for c in match[0] if c.isdigit())):
+        return match[0]
+    return _mask_digits(match)
+
+
+def mask_pan(text: str) -> str:
+    """Mask Luhn-valid card numbers in free text, keeping the first six and last four digits"""
+    return PAN_PATTERN.sub(_mask_match, text)
+
+
+def mask_token(token: str) -> str:
+    """Mask a card token, keeping its last four characters"""
+    return f"****{token[-4:]}" if len(token) > 8 else FILTERED
+
+
+def scrub_value(key: str, value: Any) -> Any:
+    """Mask the value stored under a sensitive key"""
+    if value in (None, ""):
+        return value
+    normalized = _normalize_key(key)
+    if normalized in PAN_KEYS and isinstance(value, str) and PAN_PATTERN.fullmatch(value.strip()):
+        # The key says it is a card number, so mask it even if the checksum is off
+        return PAN_PATTERN.sub(_mask_digits, value.strip())
+    if normalized in TOKEN_KEYS and isinstance(value, str):
+        return mask_token(value)
+    return FILTERED
+
+
+def scrub(value: Any) -> Any:
+    """Return a copy of ``value`` with secrets filtered and card numbers masked"""
+    if isinstance(value, Mapping):
+        return {k: scrub_value(k, v) if is_sensitive_key(k) else scrub(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [scrub(item) for item in value]
+    if isinstance(value, str):
+        return mask_pan(value)
+    return value
+
+
+def scrub_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    """Return headers with credentials filtered"""
+    return {k: FILTERED if is_sensitive_key(k) else v for k, v in headers.items()}
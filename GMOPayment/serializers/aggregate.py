@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from GMOPayment.models.aggregate import MerchantDailyAggregate
+from GMOPayment.serializers.values import ValuesSerializer
+
+
+class MerchantDailyAggregateSerializer(serializers.ModelSerializer):
+    merchant_id = serializers.CharField(source='merchant.merchant_id', read_only=True)
+
+    class Meta:
+        model = MerchantDailyAggregate
+        fields = ['merchant_id', 'day', 'status', 'job_cd', 'currency', 'transaction_count', 'total_amount']
+
+
+class MerchantDailyAggregateValuesSerializer(ValuesSerializer):
+    """Read-only, ``values()``-based equivalent of ``MerchantDailyAggregateSerializer``"""
+
+    model = MerchantDailyAggregate
+    fields = {
+        'merchant_id': 'merchant__merchant_id',
+        'day': 'day',
+        'status': 'status',
+        'job_cd': 'job_cd',
+        'currency': 'currency',
+        'transaction_count': 'transaction_count',
+        'total_amount': 'total_amount',
+    }
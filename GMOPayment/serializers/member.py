@@ -1,9 +1,16 @@
 from rest_framework import serializers
 
 from GMOPayment.models.member import Member
+from GMOPayment.serializers.values import ValuesSerializer
 
 
 class MemberSerializer(serializers.ModelSerializer):
     class Meta:
         model = Member
         fields = '__all__'
+
+
+class MemberValuesSerializer(ValuesSerializer):
+    """Read-only, ``values()``-based equivalent of ``MemberSerializer`` for list endpoints"""
+
+    model = Member
@@ -1,9 +1,16 @@
 from rest_framework import serializers
 
 from GMOPayment.models.merchant import Merchant
+from GMOPayment.serializers.values import ValuesSerializer
 
 
 class MerchantSerializer(serializers.ModelSerializer):
     class Meta:
         model = Merchant
         fields = '__all__'
+
+
+class MerchantValuesSerializer(ValuesSerializer):
+    """Read-only, ``values()``-based equivalent of ``MerchantSerializer`` for list endpoints"""
+
+    model = Merchant
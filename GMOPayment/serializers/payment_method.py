@@ -1,9 +1,16 @@
 from rest_framework import serializers
 
 from GMOPayment.models.payment_method import PaymentMethod
+from GMOPayment.serializers.values import ValuesSerializer
 
 
 class PaymentMethodSerializer(serializers.ModelSerializer):
     class Meta:
         model = PaymentMethod
         fields = '__all__'
+
+
+class PaymentMethodValuesSerializer(ValuesSerializer):
+    """Read-only, ``values()``-based equivalent of ``PaymentMethodSerializer`` for list endpoints"""
+
+    model = PaymentMethod
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from GMOPayment.models.transaction import Transaction
+from GMOPayment.serializers.values import ValuesSerializer
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -10,3 +11,13 @@ class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = '__all__'
+
+
+class TransactionValuesSerializer(ValuesSerializer):
+    """Read-only, ``values()``-based equivalent of ``TransactionSerializer`` for list endpoints"""
+
+    model = Transaction
+    choice_labels = {
+        'job_cd_display': ('job_cd', Transaction.JOB_CODE_LABELS, None),
+        'status_display': ('status', Transaction.TRANSACTION_STATUS_LABELS),
+    }
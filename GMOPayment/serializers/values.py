@@ -0,0 +1,137 @@
+"""
+Read-only serializers that work from ``QuerySet.values()`` rows.
+
+List endpoints only ever render rows, so they do not need model instances,
+per-field ``Field`` objects or validation. A ``ValuesSerializer`` compiles
+its fields once per class into ``(output, lookup, converter)`` triples and
+turns each ``values()`` row into a dict with a single pass. Output matches
+the corresponding ``ModelSerializer``: foreign keys render as primary keys,
+datetimes and dates as DRF formats them, and choice labels come from
+precomputed lookup tables.
+"""
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+from django.db import models
+from rest_framework import fields as drf_fields
+from rest_framework.response import Response
+
+
+Converter = Callable[[Any], Any] | None
+
+
+def _converter(model_field: models.Field | None) -> Converter:
+    """The DRF representation of a model field value, or ``None`` when it is used as is"""
+    if isinstance(model_field, models.DateTimeField):
+        to_representation = drf_fields.DateTimeField().to_representation
+    elif isinstance(model_field, models.DateField):
+        to_representation = drf_fields.DateField().to_representation
+    elif isinstance(model_field, models.DecimalField):
+        to_representation = drf_fields.DecimalField(
+            max_digits=model_field.max_digits, decimal_places=model_field.decimal_places
+        ).to_representation
+    elif isinstance(model_field, models.UUIDField):
+        to_representation = str
+    else:
+        return None
+    return lambda value: None if value is None else to_representation(value)
+
+
+def _resolve_field(model: type[models.Model], lookup: str) -> models.Field | None:
+    """The model field at the end of a ``values()`` lookup such as ``merchant__merchant_id``"""
+    *path, name = lookup.split("__")
+    for part in path:
+        model = model._meta.get_field(part).related_model
+    field = model._meta.get_field(name)
+    return None if field.is_relation else field
+
+
+class _Labels(dict):
+    """Choice labels; unknown values render as ``unknown``, or as themselves when it is ``None``"""
+
+    def __init__(self, table: Mapping[Any, str], unknown: str | None):
+        super().__init__(table)
+        self.unknown = unknown
+
+    def __missing__(self, key: Any) -> Any:
+        return key if self.unknown is None else self.unknown
+
+
+class ValuesSerializer:
+    """Renders ``values()`` rows of ``model``
+
+    ``fields`` maps output names to ``values()`` lookups. By default every
+    concrete field is rendered, in ``ModelSerializer`` order: primary key,
+    choice labels, plain fields, then foreign keys. ``choice_labels`` maps
+    output names to ``(lookup, labels)`` or ``(lookup, labels, unknown)``;
+    values missing from ``labels`` render as ``unknown`` (``None`` keeps
+    the raw value, like Django's ``get_FOO_display``), by default
+    ``unknown_label``.
+    """
+
+    model: type[models.Model]
+    fields: Mapping[str, str] | None = None
+    choice_labels: Mapping[str, tuple[Any, ...]] = {}
+    unknown_label = "Unknown"
+
+    def __init__(self, queryset: Iterable[Any], many: bool = True):
+        self.queryset = queryset
+
+    @classmethod
+    def plan(cls) -> tuple[tuple[str, str, Converter], ...]:
+        """``(output, lookup, converter)`` for every rendered field, compiled once per class"""
+        if (plan := cls.__dict__.get("_plan")) is not None:
+            return plan
+
+        labels = [
+            (output, lookup, _Labels(table, unknown[0] if unknown else cls.unknown_label).__getitem__)
+            for output, (lookup, table, *unknown) in cls.choice_labels.items()
+        ]
+        if cls.fields is None:
+            meta = cls.model._meta
+            plain = [field.name for field in meta.concrete_fields if not field.is_relation and not field.primary_key]
+            relations = [field.name for field in meta.concrete_fields if field.is_relation]
+            fields = [(meta.pk.name, meta.pk.name)] + labels + [(name, name) for name in plain + relations]
+        else:
+            fields = list(cls.fields.items()) + labels
+
+        plan = tuple(
+            entry if len(entry) == 3 else (entry[0], entry[1], _converter(_resolve_field(cls.model, entry[1])))
+            for entry in fields
+        )
+        cls._plan = plan
+        return plan
+
+    @classmethod
+    def lookups(cls) -> list[str]:
+        return list(dict.fromkeys(lookup for _, lookup, _ in cls.plan()))
+
+    @classmethod
+    def render(cls, rows: Iterable[Mapping[str, Any]]) -> list[dict[str, Any]]:
+        """Turn ``values()`` rows into output dicts"""
+        plan = cls.plan()
+        return [
+            {output: row[lookup] if convert is None else convert(row[lookup]) for output, lookup, convert in plan}
+            for row in rows
+        ]
+
+    @property
+    def data(self) -> list[dict[str, Any]]:
+        queryset = self.queryset
+        if isinstance(queryset, models.QuerySet):
+            queryset = queryset.values(*self.lookups())
+        return self.render(queryset)
+
+
+class ValuesListMixin:
+    """Lets a DRF list view render with ``values_serializer_class`` instead of its model serializer"""
+
+    values_serializer_class: type[ValuesSerializer]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            # Pagination has already loaded instances; render them through the model serializer
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.values_serializer_class(queryset).data)
@@ -0,0 +1,45 @@
+from collections.abc import Callable
+from functools import cached_property
+import threading
+from typing import Generic, TypeVar
+
+from ..gmo_client import GMOHttpClient, get_shared_client
+
+
+S = TypeVar('S')
+
+
+class GMOService:
+    """Base class for services; the HTTP client is created on first use"""
+
+    def __init__(self, client: GMOHttpClient | None = None):
+        if client is not None:
+            self.client = client
+
+    @cached_property
+    def client(self) -> GMOHttpClient:
+        return get_shared_client()
+
+
+class LazyService(Generic[S]):
+    """Class attribute descriptor that builds a service on first access
+
+    Keeps ``service = LazyService(GMOMemberService)`` on a view as cheap as a
+    plain reference at import time; one instance is shared by every request.
+    """
+
+    def __init__(self, factory: Callable[[], S]):
+        self.factory = factory
+        self._instance: S | None = None
+        self._lock = threading.Lock()
+
+    def __get__(self, instance: object, owner: type | None = None) -> S:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self.factory()
+        return self._instance
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instance = None
@@ -1,57 +1,61 @@
 from typing import Any
 import logging
 
-from ..gmo_client import GMOHttpClient
+from .base import GMOService
 from GMOPayment.exceptions import GMOAPIException
+from GMOPayment.responses import MemberResult
 
 
 logger = logging.getLogger(__name__)
 
 
-class GMOMemberService:
-    def __init__(self):
-        self.client = GMOHttpClient()
+def gateway_member_id(member_id: str) -> str:
+    """The memberId GMO knows a local member by; ``create_member`` registers members under it"""
+    return f"MEM-{member_id}"
 
-    def create_member(self, member_id: str, member_name: str | None = None) -> dict[str, Any]:
+
+class GMOMemberService(GMOService):
+
+    def create_member(self, member_id: str, member_name: str | None = None) -> MemberResult:
         """Creates a member in the GMO Payment Gateway."""
         payload = {
-            "memberId": f"MEM-{member_id}",
+            "memberId": gateway_member_id(member_id),
         }
         if member_name:
             payload["memberName"] = member_name
 
         try:
-            response = self.client.post("member/create", payload)
-            logger.info(f"Successfully created member: {member_id}")
+            response = self.client.post("member/create", payload, response_class=MemberResult)
+            logger.info("Successfully created member: %s", member_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to create member {member_id}: {e!s}")
+            logger.error("Failed to create member %s: %s", member_id, e)
             raise
 
-    def get_member(self, member_id: str) -> dict[str, Any]:
+    def get_member(self, member_id: str) -> MemberResult:
         """Retrieves a member from the GMO Payment Gateway."""
         payload = {
             "memberId": member_id,
         }
 
         try:
-            response = self.client.post("member/inquiry", payload)
-            logger.info(f"Successfully retrieved member: {member_id}")
+            response = self.client.post("member/inquiry", payload, response_class=MemberResult)
+            logger.info("Successfully retrieved member: %s", member_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to retrieve member {member_id}: {e!s}")
+            logger.error("Failed to retrieve member %s: %s", member_id, e)
             raise
 
-    def delete_member(self, member_id: str) -> dict[str, Any]:
+    def delete_member(self, member_id: str) -> MemberResult:
         """Deletes a member from the GMO Payment Gateway."""
         payload = {
             "memberId": member_id,
         }
 
         try:
-            response = self.client.post("member/delete", payload)
-            logger.info(f"Successfully deleted member: {member_id}")
+            response = self.client.post("member/delete", payload, response_class=MemberResult)
+            logger.info("Successfully deleted member: %s", member_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to delete member {member_id}: {e!s}")
+            logger.error("Failed to delete member %s: %s", member_id, e)
             raise
@@ -1,18 +1,21 @@
 from typing import Any
 import logging
 
-from ..gmo_client import GMOHttpClient
+from .base import GMOService
 from GMOPayment.exceptions import GMOAPIException
 
 
 logger = logging.getLogger(__name__)
 
 
-class GMOMerchantService:
-    def __init__(self):
-        self.client = GMOHttpClient()
-        self.site_id = self.client.credentials.site_id  # Use separate SiteID for merchants
-        self.site_pass = self.client.credentials.site_id
+class GMOMerchantService(GMOService):
+    @property
+    def site_id(self) -> str:
+        return self.client.credentials.site_id  # Use separate SiteID for merchants
+
+    @property
+    def site_pass(self) -> str:
+        return self.client.credentials.site_id
 
     def create_merchant_account(self, merchant_id: str, merchant_name: str | None = None) -> dict[str, Any]:
         """Creates a merchant account in GMO (Managed as a special member)."""
@@ -26,10 +29,10 @@ class GMOMerchantService:
 
         try:
             response = self.client.post("SaveMember.idPass", payload)
-            logger.info(f"Successfully created merchant account: {merchant_id}")
+            logger.info("Successfully created merchant account: %s", merchant_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to create merchant account {merchant_id}: {e!s}")
+            logger.error("Failed to create merchant account %s: %s", merchant_id, e)
             raise
 
     def get_merchant_account(self, merchant_id: str) -> dict[str, Any]:
@@ -42,10 +45,10 @@ class GMOMerchantService:
 
         try:
             response = self.client.post("SearchMember.idPass", payload)
-            logger.info(f"Successfully retrieved merchant account: {merchant_id}")
+            logger.info("Successfully retrieved merchant account: %s", merchant_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to retrieve merchant account {merchant_id}: {e!s}")
+            logger.error("Failed to retrieve merchant account %s: %s", merchant_id, e)
             raise
 
     def delete_merchant_account(self, merchant_id: str) -> dict[str, Any]:
@@ -58,20 +61,20 @@ class GMOMerchantService:
 
         try:
             response = self.client.post("DeleteMember.idPass", payload)
-            logger.info(f"Successfully deleted merchant account: {merchant_id}")
+            logger.info("Successfully deleted merchant account: %s", merchant_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to delete merchant account {merchant_id}: {e!s}")
+            logger.error("Failed to delete merchant account %s: %s", merchant_id, e)
             raise
 
     def process_payout(self, merchant_id: str, amount: int, bank_details: dict[str, Any]) -> dict[str, Any]:
         """Handles manual payouts for merchants (must integrate external banking API)."""
-        logger.info(f"Processing payout of {amount} to merchant: {merchant_id} with bank details: {bank_details}")
+        logger.info("Processing payout of %s to merchant: %s", amount, merchant_id, extra={"bank_details": bank_details})
         # Since GMO does not support direct payouts, you must integrate a banking API
         return {"status": "success", "message": "Payout initiated manually."}
 
     def save_merchant_bank_details(self, merchant_id: str, bank_details: dict[str, Any]) -> dict[str, Any]:
         """Saves merchant's bank details for payouts (Handled externally)."""
         # This would typically be stored in your database
-        logger.info(f"Saving bank details for merchant {merchant_id}: {bank_details}")
+        logger.info("Saving bank details for merchant %s", merchant_id, extra={"bank_details": bank_details})
         return {"status": "success", "message": "Bank details saved."}
@@ -1,24 +1,57 @@
 import base64
+from functools import lru_cache
 import json
 from typing import Any
 import logging
 from decouple import config
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.backends import default_backend
-from ..gmo_client import GMOHttpClient
+from django.db import transaction
+from .base import GMOService
+from GMOPayment import bins
+from GMOPayment.cards import CardInput, require_fields, validate_card
 from GMOPayment.exceptions import GMOAPIException
+from GMOPayment.models.member import Member
+from GMOPayment.models.payment_method import PaymentMethod
+from GMOPayment.responses import CardDetailsResult, StoreCardResult, TokenResult
 
 
 logger = logging.getLogger(__name__)
 
+# GMO card brands mapped to PaymentMethod.CARD_BRAND_CHOICES
+CARD_BRANDS = {
+    "VISA": "VISA",
+    "MASTER": "MC",
+    "MASTERCARD": "MC",
+    "AMEX": "AMEX",
+    "DISCOVER": "DISC",
+    "JCB": "JCB",
+}
 
-class GMOPaymentMethodService:
-    def __init__(self):
-        self.client = GMOHttpClient()
+
+def _known_brand(info: bins.BinInfo | None) -> str | None:
+    """The BIN index brand when PaymentMethod has a choice for it"""
+    brand = info and info.brand
+    return brand if brand in PaymentMethod.CARD_BRAND_LABELS else None
+
+
+@lru_cache(maxsize=4)
+def load_public_key(public_key_string: str) -> Any:
+    """Load the Base64 DER card-encryption public key, importing cryptography on first use"""
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+
+    # Decode the Base64 encoded public key
+    decoded_public_key = base64.b64decode(public_key_string)
+
+    # Load the public key
+    return serialization.load_der_public_key(decoded_public_key, backend=default_backend())
+
+
+class GMOPaymentMethodService(GMOService):
 
     @staticmethod
     def encrypt_card(card_no: str, card_holder_name: str, expire_month: str, expire_year: str, security_code: str | None = None) -> str:
+        from cryptography.hazmat.primitives.asymmetric import padding
+
         # Public key string from the management screen (Base64 encoded)
         public_key_string = config("PM_TOKEN_PUBLIC_KEY")
 
@@ -33,11 +66,7 @@ class GMOPaymentMethodService:
             }
         })
 
-        # Decode the Base64 encoded public key
-        decoded_public_key = base64.b64decode(public_key_string)
-
-        # Load the public key
-        public_key = serialization.load_der_public_key(decoded_public_key, backend=default_backend())
+        public_key = load_public_key(public_key_string)
 
         # Encrypt the card information
         encrypted_bytes = public_key.encrypt(
@@ -50,9 +79,13 @@ class GMOPaymentMethodService:
 
         return encrypted_data
 
-    def create_token(self, card_no: str, card_holder_name: str, expire_month: str, expire_year: str, security_code: str | None = None) -> dict[str, Any]:
+    def create_token(self, card_no: str, card_holder_name: str, expire_month: str, expire_year: str, security_code: str | None = None) -> TokenResult:
         """Creates a token for a credit card in the GMO Payment Gateway."""
-        card_encrypted_data = self.encrypt_card(card_no, card_holder_name, expire_month, expire_year, security_code)
+        # Reject malformed cards before paying for the encryption and the gateway call
+        card = validate_card(CardInput(card_no, card_holder_name, expire_month, expire_year, security_code))
+        card_encrypted_data = self.encrypt_card(
+            card.card_number, card.card_holder_name, card.expire_month, card.expire_year, card.security_code
+        )
         payload = {
             "encryptionParameters": {
                 "type": "UNIQUE_PK",
@@ -63,14 +96,17 @@ class GMOPaymentMethodService:
         }
 
         try:
-            response = self.client.post("payment/CreateToken.json", payload, "pm_token")
-            logger.info(f"Successfully created token for card: {card_no}")
+            response = self.client.post("payment/CreateToken.json", payload, "pm_token", response_class=TokenResult)
+            logger.info(
+                "Successfully created token for %s card issued by %s", card.brand or "unknown", card.issuer or "unknown",
+                extra={"card_no": card_no},
+            )
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to create token for card {card_no}: {e!s}")
+            logger.error("Failed to create token for card: %s", e, extra={"card_no": card_no})
             raise
 
-    def verify_card(self, order_id: str, card_token: str) -> dict[str, Any]:
+    def verify_card(self, order_id: str, card_token: str) -> CardDetailsResult:
         payload = {
             "merchant": {
                 "name": "Binod Test Store",
@@ -128,14 +164,15 @@ class GMOPaymentMethodService:
             }
         }
         try:
-            response = self.client.post("credit/verifyCard", payload)
+            response = self.client.post("credit/verifyCard", payload, response_class=CardDetailsResult)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to verify card for token {card_token}: {e!s}")
+            logger.error("Failed to verify card: %s", e, extra={"card_token": card_token})
             raise
 
-    def save_card(self, member_id: str, card_token: str) -> dict[str, Any]:
-        """Saves a credit card for a member in the GMO Payment Gateway."""
+    def save_card(self, member_id: str, card_token: str, make_default: bool = False) -> StoreCardResult:
+        """Saves a credit card for a member in the GMO Payment Gateway and indexes it locally."""
+        require_fields(member_id=member_id, card_token=card_token)
         payload = {
             "merchant": {
                 "name": "Merchant Binod",
@@ -159,14 +196,54 @@ class GMOPaymentMethodService:
         }
 
         try:
-            response = self.client.post("credit/storeCard", payload)
-            logger.info(f"Successfully saved card for member: {member_id}")
-            return response
+            response = self.client.post("credit/storeCard", payload, response_class=StoreCardResult)
+            logger.info("Successfully saved card for member: %s", member_id)
         except GMOAPIException as e:
-            logger.error(f"Failed to save card for member {member_id}: {e!s}")
+            logger.error("Failed to save card for member %s: %s", member_id, e)
             raise
 
-    def get_card_details_by_token(self, token: str) -> dict[str, Any]:
+        try:
+            self.index_card(member_id, response, make_default)
+        except Exception:
+            # The card is stored at GMO either way; failing here would invite a duplicate save
+            logger.exception("Failed to index saved card for member %s", member_id)
+        return response
+
+    @staticmethod
+    def index_card(member_id: str, result: StoreCardResult, make_default: bool = False) -> PaymentMethod | None:
+        """Record a stored card in the local index; the first card of a member becomes the default."""
+        onfile = result.onfile_card
+        if onfile is None or not onfile.card_id:
+            logger.warning("storeCard result for member %s has no card reference", member_id)
+            return None
+
+        card = result.card
+        details = {"card_type": onfile.type or "CREDIT_CARD"}
+        if card is not None:
+            # GMO's brand wins; the BIN index fills in what the result leaves out
+            info = bins.lookup(card.card_number)
+            details.update(
+                card_no=card.card_number or "",
+                expire=f"{card.expiry_year or ''}{card.expiry_month or ''}",
+                cardholder_name=card.cardholder_name,
+                brand=CARD_BRANDS.get((card.brand or "").upper()) or _known_brand(info),
+                issuer=(info and info.issuer) or card.issuer_code,
+            )
+
+        with transaction.atomic():
+            member, _ = Member.objects.get_or_create(member_id=member_id)
+            # Lock the member so concurrent saves cannot both claim the default
+            member = Member.objects.select_for_update().get(pk=member.pk)
+            current_default = member.payment_methods.filter(is_default=True).exclude(card_id=onfile.card_id)
+            if make_default or not member.payment_methods.filter(is_default=True).exists():
+                current_default.update(is_default=False)
+                details["is_default"] = True
+            payment_method, _ = PaymentMethod.objects.update_or_create(
+                member=member, card_id=onfile.card_id, defaults=details
+            )
+        return payment_method
+
+    def get_card_details_by_token(self, token: str) -> CardDetailsResult:
         """Retrieves saved cards for a member."""
         payload = {
               "cardInformation": {
@@ -179,15 +256,15 @@ class GMOPaymentMethodService:
         }
 
         try:
-            response = self.client.post("credit/getCardDetails", payload)
-            logger.info(f"Successfully retrieved cards for token: {token}")
+            response = self.client.post("credit/getCardDetails", payload, response_class=CardDetailsResult)
+            logger.info("Successfully retrieved cards for token", extra={"card_token": token})
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to retrieve cards for token {token}: {e!s}")
+            logger.error("Failed to retrieve cards for token: %s", e, extra={"card_token": token})
             raise
 
 
-    def get_card_details_by_member(self, member_id: str, card_type: str, card_id: str) -> dict[str, Any]:
+    def get_card_details_by_member(self, member_id: str, card_type: str, card_id: str) -> CardDetailsResult:
         """Retrieves saved cards for a member."""
         payload = {
             "cardInformation": {
@@ -200,11 +277,11 @@ class GMOPaymentMethodService:
         }
 
         try:
-            response = self.client.post("credit/getCardDetails", payload)
-            logger.info(f"Successfully retrieved cards for member_id: {member_id}")
+            response = self.client.post("credit/getCardDetails", payload, response_class=CardDetailsResult)
+            logger.info("Successfully retrieved cards for member_id: %s", member_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to retrieve cards for member_id: {member_id}: {e!s}")
+            logger.error("Failed to retrieve cards for member_id: %s: %s", member_id, e)
             raise
 
     def delete_card(self, member_id: str, card_seq: str) -> dict[str, Any]:
@@ -218,10 +295,10 @@ class GMOPaymentMethodService:
 
         try:
             response = self.client.post("DeleteCard.idPass", payload)
-            logger.info(f"Successfully deleted card {card_seq} for member: {member_id}")
+            logger.info("Successfully deleted card %s for member: %s", card_seq, member_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to delete card {card_seq} for member {member_id}: {e!s}")
+            logger.error("Failed to delete card %s for member %s: %s", card_seq, member_id, e)
             raise
 
     def process_google_pay(self, order_id: str, token: str) -> dict[str, Any]:
@@ -235,10 +312,10 @@ class GMOPaymentMethodService:
 
         try:
             response = self.client.post("ExecTranGooglePay.idPass", payload)
-            logger.info(f"Successfully processed Google Pay transaction for order: {order_id}")
+            logger.info("Successfully processed Google Pay transaction for order: %s", order_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to process Google Pay transaction for order {order_id}: {e!s}")
+            logger.error("Failed to process Google Pay transaction for order %s: %s", order_id, e)
             raise
 
     def process_apple_pay(self, order_id: str, token: str) -> dict[str, Any]:
@@ -252,8 +329,8 @@ class GMOPaymentMethodService:
 
         try:
             response = self.client.post("ExecTranApplePay.idPass", payload)
-            logger.info(f"Successfully processed Apple Pay transaction for order: {order_id}")
+            logger.info("Successfully processed Apple Pay transaction for order: %s", order_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to process Apple Pay transaction for order {order_id}: {e!s}")
+            logger.error("Failed to process Apple Pay transaction for order %s: %s", order_id, e)
             raise
@@ -1,17 +1,51 @@
 import logging
 from typing import Any
 
-from ..gmo_client import GMOHttpClient
-from GMOPayment.exceptions import GMOAPIException
+from django.conf import settings
+
+from .base import GMOService
+from GMOPayment.exceptions import GMOAPIException, GMONotFound, GMOValidationError
+from GMOPayment.models.merchant import Merchant
+from GMOPayment.models.payment_method import PaymentMethod
+from GMOPayment.order_status import board
+from GMOPayment.responses import ChargeResult, OrderResult
 
 logger = logging.getLogger(__name__)
 
-class GMOTransactionService:
-    def __init__(self):
-        self.client = GMOHttpClient()
+# GMO authorizationMode values: AUTH reserves the amount until order/capture,
+# CAPTURE authorizes and captures in the same call
+AUTHORIZATION_MODES = tuple(mode for mode, _ in Merchant.AUTHORIZATION_MODE_CHOICES)
+
+
+def resolve_authorization_mode(authorization_mode: str | None = None, merchant_id: str | None = None) -> str:
+    """The requested mode, else the merchant's default, else GMO_PAYMENT["authorization_mode"]"""
+    error = GMOValidationError({"authorization_mode": [f"Must be one of {', '.join(AUTHORIZATION_MODES)}."]})
+    # Views pass request data through, which may hold any JSON value
+    if authorization_mode is not None and not isinstance(authorization_mode, str):
+        raise error
+    if not authorization_mode and merchant_id:
+        authorization_mode = (
+            Merchant.objects.filter(merchant_id=merchant_id).values_list("authorization_mode", flat=True).first()
+        )
+    authorization_mode = (authorization_mode or settings.GMO_PAYMENT.get("authorization_mode") or "AUTH").upper()
+    if authorization_mode not in AUTHORIZATION_MODES:
+        raise error
+    return authorization_mode
+
+
+class GMOTransactionService(GMOService):
 
-    def create_transaction_with_new_payment_method(self, order_id: int, card_token: str) -> dict[str, Any]:
-        """Creates a transaction equivalent in GMO (EntryTran)."""
+    def _post(self, endpoint: str, payload: dict[str, Any], response_class: type[OrderResult]) -> Any:
+        """Send an order request and publish the resulting order status to long-polling clients"""
+        response = self.client.post(endpoint, payload, response_class=response_class)
+        board.publish_result(response)
+        return response
+
+    def create_transaction_with_new_payment_method(
+            self, order_id: int, card_token: str, authorization_mode: str | None = None, merchant_id: str | None = None
+    ) -> ChargeResult:
+        """Creates a transaction equivalent in GMO (EntryTran); CAPTURE mode also captures it."""
+        authorization_mode = resolve_authorization_mode(authorization_mode, merchant_id)
         payload = {
               "merchant": {
                 "name": "Binod Test Store",
@@ -66,7 +100,7 @@ class GMOTransactionService:
                   "token": card_token
                 },
                 "creditChargeOptions": {
-                  "authorizationMode": "AUTH",
+                  "authorizationMode": authorization_mode,
                   "useTds2": True,
                   "useFraudDetection": True,
                   "paymentMethod": "ONE_TIME",
@@ -75,15 +109,25 @@ class GMOTransactionService:
             }
 
         try:
-            response = self.client.post("credit/charge", payload)
-            logger.info(f"Successfully created transaction for order: {order_id}")
+            response = self._post("credit/charge", payload, ChargeResult)
+            logger.info("Successfully created %s transaction for order: %s", authorization_mode, order_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to create transaction for order {order_id}: {e!s}")
+            logger.error("Failed to create transaction for order %s: %s", order_id, e)
             raise
 
-    def create_transaction_with_registered_payment_method(self, order_id: int, member_id: str, card_id: str) -> dict[str, Any]:
-        """Creates a transaction equivalent in GMO (EntryTran)."""
+    def create_transaction_with_registered_payment_method(
+            self,
+            order_id: int | str,
+            member_id: str,
+            card_id: str,
+            amount: int | str = "1000",
+            currency: str = "JPY",
+            authorization_mode: str | None = None,
+            merchant_id: str | None = None,
+    ) -> ChargeResult:
+        """Creates a transaction equivalent in GMO (EntryTran); CAPTURE mode also captures it."""
+        authorization_mode = resolve_authorization_mode(authorization_mode, merchant_id)
         payload = {
               "merchant": {
                 "name": "Binod Test Store",
@@ -101,8 +145,8 @@ class GMOTransactionService:
               },
               "order": {
                 "orderId": order_id,
-                "amount": "1000",
-                "currency": "JPY",
+                "amount": str(amount),
+                "currency": currency,
                 "clientFields": {
                   "clientField1": "Test 1",
                 },
@@ -139,7 +183,7 @@ class GMOTransactionService:
                     "cardId": card_id,
                 },
                 "creditChargeOptions": {
-                  "authorizationMode": "AUTH",
+                  "authorizationMode": authorization_mode,
                   "useTds2": True,
                   "useFraudDetection": True,
                   "paymentMethod": "ONE_TIME",
@@ -148,77 +192,112 @@ class GMOTransactionService:
             }
 
         try:
-            response = self.client.post("credit/on-file/charge", payload)
-            logger.info(f"Successfully created transaction for order: {order_id}")
+            response = self._post("credit/on-file/charge", payload, ChargeResult)
+            logger.info("Successfully created %s transaction for order: %s", authorization_mode, order_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to create transaction for order {order_id}: {e!s}")
+            logger.error("Failed to create transaction for order %s: %s", order_id, e)
             raise
 
-    def finalize_3d_secure_payment(self, access_id: str):
+    def charge_default_card(
+            self, order_id: int, member_id: str, authorization_mode: str | None = None, merchant_id: str | None = None
+    ) -> ChargeResult:
+        """Charges the member's default card, resolved from the local card index (one GMO call)."""
+        card = (
+            PaymentMethod.objects.filter(member__member_id=member_id, is_default=True, card_id__isnull=False)
+            .only("card_id")
+            .first()
+        )
+        if card is None:
+            raise GMONotFound("No default card is registered for this member.")
+        return self.create_transaction_with_registered_payment_method(
+            order_id, member_id, card.card_id, authorization_mode=authorization_mode, merchant_id=merchant_id
+        )
+
+    def finalize_3d_secure_payment(self, access_id: str) -> ChargeResult:
         payload = {
             "accessId": access_id,
         }
 
         try:
-            response = self.client.post("tds2/finalizeCharge", payload)
-            logger.info(f"Finalize 3ds charge")
+            response = self._post("tds2/finalizeCharge", payload, ChargeResult)
+            logger.info("Finalized 3ds charge for access_id: %s", access_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to finalize transaction {e!s}")
+            logger.error("Failed to finalize transaction %s: %s", access_id, e)
             raise
 
-    def update_order(self, access_id: str, amount: str):
+    def update_order(self, access_id: str, amount: str, authorization_mode: str = "CAPTURE") -> OrderResult:
+        """Changes the amount of an order; the default CAPTURE mode also captures it in the same call."""
         payload = {
             "accessId": access_id,
             "amount": amount,
-            "authorizationMode": "CAPTURE",
+            "authorizationMode": resolve_authorization_mode(authorization_mode),
         }
         try:
-            response = self.client.post("order/update", payload)
-            logger.info(f"Successfully updated order for access_id: {access_id}")
+            response = self._post("order/update", payload, OrderResult)
+            logger.info("Successfully updated order for access_id: %s", access_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to update order for access_id {access_id}: {e!s}")
+            logger.error("Failed to update order for access_id %s: %s", access_id, e)
             raise
 
-    def capture_transaction(self, access_id: str) -> dict[str, Any]:
+    def capture_transaction(self, access_id: str) -> OrderResult:
         """Captures an authorized transaction with a different amount in GMO (AlterTran)."""
         payload = {
             "accessId": access_id,
         }
 
         try:
-            response = self.client.post("order/capture", payload)
-            logger.info(f"Successfully captured transaction")
+            response = self._post("order/capture", payload, OrderResult)
+            logger.info("Successfully captured transaction for access_id: %s", access_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to capture transaction {e!s}")
+            logger.error("Failed to capture transaction %s: %s", access_id, e)
             raise
 
-    def cancel_transaction(self, access_id: str) -> dict[str, Any]:
+    def update_and_capture(self, access_id: str, amount: str | None = None) -> OrderResult:
+        """Captures an authorized order, changing its amount first if given, in one GMO call."""
+        if amount is None:
+            return self.capture_transaction(access_id)
+        # order/update with CAPTURE changes the amount and captures; no separate order/capture
+        return self.update_order(access_id, amount, authorization_mode="CAPTURE")
+
+    def cancel_transaction(self, access_id: str) -> OrderResult:
         """Cancels a transaction equivalent in GMO (AlterTran)."""
         payload = {
             "accessId": access_id,
         }
 
         try:
-            response = self.client.post("order/cancel", payload)
-            logger.info(f"Successfully cancelled transaction")
+            response = self._post("order/cancel", payload, OrderResult)
+            logger.info("Successfully cancelled transaction for access_id: %s", access_id)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to cancel transaction")
+            logger.error("Failed to cancel transaction %s: %s", access_id, e)
             raise
 
-    def inquiry_transaction_order(self, access_id: str) -> dict[str, Any]:
+    def inquiry_transaction_order(self, access_id: str) -> OrderResult:
         """Cancels a transaction equivalent in GMO (AlterTran)."""
         payload = {
             "accessId": access_id,
         }
 
         try:
-            response = self.client.post("order/inquiry", payload)
+            response = self._post("order/inquiry", payload, OrderResult)
             return response
         except GMOAPIException as e:
-            logger.error(f"Failed to inquiry transaction")
+            logger.error("Failed to inquiry transaction %s: %s", access_id, e)
+            raise
+
+    def inquiry_order(self, order_id: str) -> OrderResult:
+        """Looks an order up by the orderId it was charged under; GMONotFound when GMO never saw it."""
+        payload = {
+            "orderId": order_id,
+        }
+
+        try:
+            return self._post("order/inquiry", payload, OrderResult)
+        except GMOAPIException as e:
+            logger.error("Failed to inquiry order %s: %s", order_id, e)
             raise
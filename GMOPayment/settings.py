@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,12 +43,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "GMOPayment.middleware.AdmissionControlMiddleware",
+    "GMOPayment.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "GMOPayment.middleware.DeadlineMiddleware",
+    "GMOPayment.middleware.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "GMOPayment.urls"
@@ -74,10 +78,52 @@ WSGI_APPLICATION = "GMOPayment.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Persistent connections are reused for CONN_MAX_AGE seconds and checked
+# before reuse. DATABASE_REPLICAS lists read replicas: host names for network
+# engines, or file paths for SQLite (e.g. db-replica.sqlite3 locally); they
+# share the primary's engine and credentials. See GMOPayment.routers.
+
+DATABASE_DEFAULTS = {
+    "ENGINE": config("DATABASE_ENGINE", default="django.db.backends.sqlite3"),
+    "USER": config("DATABASE_USER", default=""),
+    "PASSWORD": config("DATABASE_PASSWORD", default=""),
+    "PORT": config("DATABASE_PORT", default=""),
+    "CONN_MAX_AGE": config("DATABASE_CONN_MAX_AGE", default=60, cast=int),
+    "CONN_HEALTH_CHECKS": config("DATABASE_CONN_HEALTH_CHECKS", default=True, cast=bool),
+}
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        **DATABASE_DEFAULTS,
+        "NAME": config("DATABASE_NAME", default=str(BASE_DIR / "db.sqlite3")),
+        "HOST": config("DATABASE_HOST", default=""),
+    }
+}
+
+for index, replica in enumerate(config("DATABASE_REPLICAS", default="", cast=Csv()), start=1):
+    if DATABASE_DEFAULTS["ENGINE"].endswith("sqlite3"):
+        location = {"NAME": str(BASE_DIR / replica), "HOST": ""}
+    else:
+        location = {"NAME": DATABASES["default"]["NAME"], "HOST": replica}
+    DATABASES[f"replica_{index}"] = {**DATABASE_DEFAULTS, **location, "TEST": {"MIRROR": "default"}}
+
+DATABASE_ROUTERS = ["GMOPayment.routers.ReplicaRouter"]
+
+# Seconds a client's reads stay on the primary after it made a change
+DATABASE_REPLICA_PIN_SECONDS = config("DATABASE_REPLICA_PIN_SECONDS", default=5, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/ref/settings/#caches
+#
+# The default is per process. Point CACHE_BACKEND/CACHE_LOCATION at a shared cache
+# (e.g. django.core.cache.backends.redis.RedisCache, redis://cache:6379/0) so velocity
+# limits, order statuses and the "cache" token store are shared by every worker.
+
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default=""),
     }
 }
 
@@ -137,4 +183,147 @@ GMO_PAYMENT = {
     "test_payment_method_token_url": config("TEST_PAYMENT_METHOD_TOKEN_URL"),
     "pm_token_public_key": config("PM_TOKEN_PUBLIC_KEY"),
     "pm_token_api_key": config("PM_TOKEN_API_KEY"),
+    # Record/replay transport: "record", "replay" or empty for live traffic
+    "cassette_mode": config("GMO_CASSETTE_MODE", default=""),
+    "cassette_path": config("GMO_CASSETTE_PATH", default=""),
+    "cassette_realtime": config("GMO_CASSETTE_REALTIME", default=False, cast=bool),
+    "cassette_speed": config("GMO_CASSETTE_SPEED", default=1.0, cast=float),
+    # Connections kept per GMO host; raise it with the bulk commands' --concurrency
+    "pool_maxsize": config("GMO_POOL_MAXSIZE", default=10, cast=int),
+    # Worker warm-up (see GMOPayment.warmup)
+    "warmup_on_ready": config("GMO_WARMUP_ON_READY", default=False, cast=bool),
+    "warmup_connections": config("GMO_WARMUP_CONNECTIONS", default=1, cast=int),
+    # Hedged requests for read-only endpoints (see GMOPayment.hedging);
+    # a zero delay hedges at the observed latency percentile instead
+    "hedge_enabled": config("GMO_HEDGE_ENABLED", default=False, cast=bool),
+    "hedge_delay_ms": config("GMO_HEDGE_DELAY_MS", default=0, cast=int),
+    "hedge_percentile": config("GMO_HEDGE_PERCENTILE", default=95.0, cast=float),
+    "hedge_min_delay_ms": config("GMO_HEDGE_MIN_DELAY_MS", default=50, cast=int),
+    "hedge_budget_ratio": config("GMO_HEDGE_BUDGET_RATIO", default=0.05, cast=float),
+    "hedge_max_workers": config("GMO_HEDGE_MAX_WORKERS", default=32, cast=int),
+    # Token scrapers send in the X-Metrics-Token header for /health/metrics; empty leaves it to staff users
+    "metrics_token": config("GMO_METRICS_TOKEN", default=""),
+    # Deadline for all GMO calls made while serving one inbound request, in seconds
+    "request_budget": config("GMO_REQUEST_BUDGET", default=25.0, cast=float),
+    # Per-family (connect, read) overrides, e.g. {"charge": (3.05, 30)}; see GMOPayment.timeouts
+    "timeouts": {},
+    "timeouts_adaptive": config("GMO_TIMEOUTS_ADAPTIVE", default=False, cast=bool),
+    "timeouts_adaptive_multiplier": config("GMO_TIMEOUTS_ADAPTIVE_MULTIPLIER", default=3.0, cast=float),
+    "timeouts_adaptive_min_read": config("GMO_TIMEOUTS_ADAPTIVE_MIN_READ", default=1.0, cast=float),
+    # Retries (see GMOPayment.retry): decorrelated jitter between base and cap seconds,
+    # limited to ratio x recent requests plus min_per_second
+    "retry_backoff_base": config("GMO_RETRY_BACKOFF_BASE", default=0.1, cast=float),
+    "retry_backoff_cap": config("GMO_RETRY_BACKOFF_CAP", default=2.0, cast=float),
+    "retry_budget_ratio": config("GMO_RETRY_BUDGET_RATIO", default=0.1, cast=float),
+    "retry_budget_min_per_second": config("GMO_RETRY_BUDGET_MIN_PER_SECOND", default=1.0, cast=float),
+    # Order-status long poll (see GMOPayment.order_status); keep the wait below request_budget.
+    # Waiters re-read a shared cache every poll interval (0 disables); a per-process cache is never polled
+    "order_status_wait_max": config("GMO_ORDER_STATUS_WAIT_MAX", default=20.0, cast=float),
+    "order_status_poll_interval": config("GMO_ORDER_STATUS_POLL_INTERVAL", default=1.0, cast=float),
+    # Shared secret expected in the X-GMO-Webhook-Secret header; webhooks are rejected while it is empty
+    "webhook_secret": config("GMO_WEBHOOK_SECRET", default=""),
+    # Response compression (GMOPayment.middleware.CompressionMiddleware); brotli is
+    # offered when the optional ``brotli`` package is installed
+    "compression_min_size": config("GMO_COMPRESSION_MIN_SIZE", default=1024, cast=int),
+    "compression_brotli_quality": config("GMO_COMPRESSION_BROTLI_QUALITY", default=5, cast=int),
+    # BIN range index built by ``manage.py build_bin_index`` (see GMOPayment.bins); lookups
+    # are skipped while the file does not exist
+    "bin_index_path": config("GMO_BIN_INDEX_PATH", default=str(BASE_DIR / "bin_index.bin")),
+    # Velocity limits checked before card encryption and GMO calls (see GMOPayment.velocity):
+    # (action, dimension, limit, window seconds); action is "create_token", "verify_card",
+    # "save_card", "charge" or "*", dimension is "member", "ip", "card" or "merchant"
+    "velocity_enabled": config("GMO_VELOCITY_ENABLED", default=True, cast=bool),
+    "velocity_cache": config("GMO_VELOCITY_CACHE", default="default"),
+    "velocity_rules": [
+        ("*", "ip", 30, 60),
+        ("*", "member", 20, 60),
+        ("*", "card", 5, 600),
+        ("*", "merchant", 600, 60),
+    ],
+    # Behind proxies, the header carrying the client address (e.g. "X-Forwarded-For") and how many
+    # proxies append to it; empty uses REMOTE_ADDR. Only set it when every request passes those proxies
+    "client_ip_header": config("GMO_CLIENT_IP_HEADER", default=""),
+    "trusted_proxy_count": config("GMO_TRUSTED_PROXY_COUNT", default=1, cast=int),
+    # Default GMO authorizationMode of charges: "AUTH" (capture later with order/capture) or
+    # "CAPTURE" (capture in the charge call); Merchant.authorization_mode overrides it
+    "authorization_mode": config("GMO_AUTHORIZATION_MODE", default="AUTH"),
+    # Where workers share the OAuth token (see GMOPayment.tokens): "file" shares it between the
+    # processes of one host, "cache" through the ``token_cache`` cache (shared across hosts when
+    # that cache is, e.g. Redis), "local" keeps it per process
+    "token_store": config("GMO_TOKEN_STORE", default="file"),
+    # The "file" store's directory must be owned by this user and closed to others (mode 700)
+    "token_store_path": config("GMO_TOKEN_STORE_PATH", default=str(BASE_DIR / "tokens")),
+    "token_cache": config("GMO_TOKEN_CACHE", default="default"),
+    # Admission control per worker process (see GMOPayment.admission): per endpoint group at most
+    # ``concurrency`` POST requests run and ``queue`` more wait up to ``max_wait`` seconds; the
+    # rest get 503 with Retry-After of ``admission_retry_after`` seconds
+    "admission_enabled": config("GMO_ADMISSION_ENABLED", default=True, cast=bool),
+    "admission_groups": {
+        "transactions": {
+            "concurrency": config("GMO_ADMISSION_TRANSACTIONS_CONCURRENCY", default=16, cast=int),
+            "queue": config("GMO_ADMISSION_TRANSACTIONS_QUEUE", default=32, cast=int),
+            "max_wait": config("GMO_ADMISSION_TRANSACTIONS_MAX_WAIT", default=5.0, cast=float),
+        },
+        "payment_methods": {
+            "concurrency": config("GMO_ADMISSION_PAYMENT_METHODS_CONCURRENCY", default=8, cast=int),
+            "queue": config("GMO_ADMISSION_PAYMENT_METHODS_QUEUE", default=16, cast=int),
+            "max_wait": config("GMO_ADMISSION_PAYMENT_METHODS_MAX_WAIT", default=5.0, cast=float),
+        },
+    },
+    "admission_retry_after": config("GMO_ADMISSION_RETRY_AFTER", default=1, cast=int),
+    # Audit log of scrubbed GMO exchanges (see GMOPayment.audit): gzip segments under audit_path,
+    # rotated by size and age; closed segments older than audit_retention_days (0 keeps them) are deleted
+    "audit_enabled": config("GMO_AUDIT_ENABLED", default=True, cast=bool),
+    "audit_path": config("GMO_AUDIT_PATH", default=str(BASE_DIR / "audit")),
+    "audit_segment_bytes": config("GMO_AUDIT_SEGMENT_BYTES", default=64 * 1024 * 1024, cast=int),
+    "audit_segment_seconds": config("GMO_AUDIT_SEGMENT_SECONDS", default=3600.0, cast=float),
+    "audit_retention_days": config("GMO_AUDIT_RETENTION_DAYS", default=540.0, cast=float),
+    "audit_batch_size": config("GMO_AUDIT_BATCH_SIZE", default=256, cast=int),
+    "audit_flush_interval": config("GMO_AUDIT_FLUSH_INTERVAL", default=1.0, cast=float),
+    # Records waiting for the writer per process; beyond it records are dropped (audit.dropped)
+    "audit_queue_size": config("GMO_AUDIT_QUEUE_SIZE", default=10000, cast=int),
+    # Transaction archive written by ``manage.py archive_transactions`` (see GMOPayment.archive);
+    # every node serving lookups must see the same directory
+    "archive_path": config("GMO_ARCHIVE_PATH", default=str(BASE_DIR / "archive")),
+    "archive_after_days": config("GMO_ARCHIVE_AFTER_DAYS", default=400, cast=int),
+}
+
+# Logging
+# Records from the GMOPayment loggers go through a queue to a background listener
+# thread, which masks card data and does the actual I/O.
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "mask_sensitive": {"()": "GMOPayment.log.MaskingFilter"},
+        "sample_success": {
+            "()": "GMOPayment.log.SamplingFilter",
+            "rates": {
+                "GMOPayment.services": config("GMO_LOG_SUCCESS_SAMPLE_RATE", default=1.0, cast=float),
+            },
+        },
+    },
+    "formatters": {
+        "structured": {"()": "GMOPayment.log.StructuredFormatter"},
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "formatter": "structured",
+            "filters": ["mask_sensitive"],
+        },
+        "gmo_queue": {
+            "()": "GMOPayment.log.GMOQueueHandler",
+            "handlers": ["console"],
+            "filters": ["sample_success"],
+        },
+    },
+    "loggers": {
+        "GMOPayment": {
+            "handlers": ["gmo_queue"],
+            "level": config("GMO_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+    },
 }
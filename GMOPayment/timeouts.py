@@ -0,0 +1,54 @@
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from GMOPayment import metrics
+from GMOPayment.endpoints import EndpointFamily
+
+
+# (connect, read) seconds per endpoint family
+DEFAULT_TIMEOUTS: dict[EndpointFamily, tuple[float, float]] = {
+    EndpointFamily.AUTH: (3.05, 10.0),
+    EndpointFamily.INQUIRY: (3.05, 10.0),
+    EndpointFamily.MUTATION: (3.05, 20.0),
+    EndpointFamily.CHARGE: (3.05, 30.0),
+    EndpointFamily.TOKEN: (3.05, 10.0),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class TimeoutPolicy:
+    """Connect/read timeouts per endpoint family, optionally tightened from observed latency
+
+    With ``adaptive`` set, the read timeout of an endpoint with enough samples
+    is ``multiplier`` times its observed p99, clamped between ``min_read`` and
+    the configured read timeout of its family.
+    """
+
+    timeouts: dict[EndpointFamily, tuple[float, float]] = field(default_factory=lambda: dict(DEFAULT_TIMEOUTS))
+    adaptive: bool = False
+    multiplier: float = 3.0
+    min_read: float = 1.0
+    min_samples: int = 50
+
+    @classmethod
+    def from_settings(cls, default_read: float | None = None) -> 'TimeoutPolicy':
+        gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+        timeouts = dict(DEFAULT_TIMEOUTS)
+        if default_read is not None:
+            timeouts = {family: (connect, min(read, default_read)) for family, (connect, read) in timeouts.items()}
+        for family, value in (gmo_settings.get("timeouts") or {}).items():
+            timeouts[EndpointFamily(family)] = (float(value[0]), float(value[1]))
+        return cls(
+            timeouts=timeouts,
+            adaptive=gmo_settings.get("timeouts_adaptive", False),
+            multiplier=gmo_settings.get("timeouts_adaptive_multiplier", 3.0),
+            min_read=gmo_settings.get("timeouts_adaptive_min_read", 1.0),
+        )
+
+    def timeout_for(self, endpoint: str, family: EndpointFamily) -> tuple[float, float]:
+        connect, read = self.timeouts.get(family, DEFAULT_TIMEOUTS[EndpointFamily.CHARGE])
+        if self.adaptive and metrics.gateway_latency.count(endpoint) >= self.min_samples:
+            observed = metrics.gateway_latency.percentile(endpoint, 99) or 0.0
+            read = min(max(observed * self.multiplier, self.min_read), read)
+        return connect, read
@@ -0,0 +1,230 @@
+"""
+Shared storage for the GMO OAuth access token.
+
+Every worker process needs the same bearer token, and fetching one costs an
+OAuth round trip. A ``TokenStore`` keeps the current token where all
+workers can see it and serializes refreshes with compare-and-set semantics:
+``refresh`` is given the token the caller found stale (or ``None``) and only
+fetches a new one while the store still holds that token. Callers that lose
+the race get the token the winner stored, so one expiry or 401 costs one
+OAuth call per host (``FileTokenStore``) or per deployment
+(``CacheTokenStore`` on a shared cache) instead of one per worker.
+
+The ``token.*`` counters at ``/health/metrics`` show hits, OAuth calls and
+refreshes that were satisfied by another worker.
+"""
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from functools import cache
+import json
+import os
+from pathlib import Path
+import stat
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from GMOPayment import metrics
+
+
+# Tokens are treated as expired this many seconds early, so requests never race the expiry
+EXPIRY_MARGIN = 60.0
+
+# Returns the new access token and its lifetime in seconds
+Fetch = Callable[[], tuple[str, float]]
+
+
+@dataclass(frozen=True, slots=True)
+class StoredToken:
+    value: str
+    version: int
+    expires_at: float
+
+    @property
+    def usable(self) -> bool:
+        return self.expires_at - EXPIRY_MARGIN > time.time()
+
+
+def _supersedes(current: StoredToken | None, stale: StoredToken | None) -> bool:
+    """Whether ``current`` is a usable token other than the one the caller found stale"""
+    return current is not None and current.usable and (stale is None or current.version != stale.version)
+
+
+def _issue(fetch: Fetch) -> StoredToken:
+    metrics.increment("token.auth_calls")
+    value, lifetime = fetch()
+    return StoredToken(value, time.time_ns(), time.time() + lifetime)
+
+
+class TokenStore(ABC):
+    """Where workers share the access token for a credentials/environment key"""
+
+    @abstractmethod
+    def get(self, key: str) -> StoredToken | None:
+        """The stored token, which may have expired"""
+
+    @abstractmethod
+    def refresh(self, key: str, stale: StoredToken | None, fetch: Fetch) -> StoredToken:
+        """Replace ``stale`` with a fetched token, unless another worker already did"""
+
+    def current(self, key: str) -> StoredToken | None:
+        """The stored token if it is still usable"""
+        token = self.get(key)
+        if token is not None and token.usable:
+            metrics.increment("token.hits")
+            return token
+        metrics.increment("token.misses")
+        return None
+
+
+class LocalTokenStore(TokenStore):
+    """Per-process store; threads share the token, processes do not"""
+
+    def __init__(self):
+        self._tokens: dict[str, StoredToken] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> StoredToken | None:
+        return self._tokens.get(key)
+
+    def refresh(self, key: str, stale: StoredToken | None, fetch: Fetch) -> StoredToken:
+        with self._lock:
+            if _supersedes(current := self._tokens.get(key), stale):
+                metrics.increment("token.refresh_shared")
+                return current
+            token = self._tokens[key] = _issue(fetch)
+            return token
+
+
+class FileTokenStore(TokenStore):
+    """One JSON file per key, refreshed under an exclusive ``flock``; shared by the processes of a host"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._check_private(directory)
+        self._seen: dict[str, tuple[tuple[int, int], StoredToken]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _check_private(directory: Path) -> None:
+        """Refuse a directory other users could plant or read tokens in"""
+        info = directory.lstat()
+        if not stat.S_ISDIR(info.st_mode):
+            raise ImproperlyConfigured(f"GMO token store {directory} is not a directory")
+        if info.st_uid != os.geteuid():
+            raise ImproperlyConfigured(f"GMO token store {directory} is owned by uid {info.st_uid}, not this user")
+        if info.st_mode & 0o077:
+            raise ImproperlyConfigured(
+                f"GMO token store {directory} is accessible by other users (mode {stat.S_IMODE(info.st_mode):o}); "
+                "chmod it to 700"
+            )
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> StoredToken | None:
+        path = self._path(key)
+        try:
+            info = path.stat()
+        except FileNotFoundError:
+            return None
+        # Writers replace the file, so (inode, mtime) changes with every refresh
+        signature = (info.st_ino, info.st_mtime_ns)
+        if (seen := self._seen.get(key)) is not None and seen[0] == signature:
+            return seen[1]
+        try:
+            token = StoredToken(**json.loads(path.read_bytes()))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+        self._seen[key] = (signature, token)
+        return token
+
+    def refresh(self, key: str, stale: StoredToken | None, fetch: Fetch) -> StoredToken:
+        import fcntl
+
+        lock_path = self.directory / f"{key}.lock"
+        with self._lock, open(lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if _supersedes(current := self.get(key), stale):
+                    metrics.increment("token.refresh_shared")
+                    return current
+                token = _issue(fetch)
+                descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.")
+                with os.fdopen(descriptor, "w") as stream:
+                    json.dump(asdict(token), stream)
+                os.replace(temporary, self._path(key))
+                return token
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class CacheTokenStore(TokenStore):
+    """Stores the token in a Django cache; with a shared cache (e.g. Redis) every host shares it
+
+    A refresh takes a lock key with ``cache.add``. Workers that find the lock
+    taken poll for the winner's token instead of calling OAuth themselves,
+    and fetch their own only if the lock holder does not finish within
+    ``lock_timeout``.
+    """
+
+    def __init__(self, alias: str = "default", lock_timeout: float = 15.0, poll_interval: float = 0.05):
+        self.alias = alias
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"gmo_token:{key}"
+
+    def get(self, key: str) -> StoredToken | None:
+        return caches[self.alias].get(self._key(key))
+
+    def refresh(self, key: str, stale: StoredToken | None, fetch: Fetch) -> StoredToken:
+        cache = caches[self.alias]
+        token_key, lock_key = self._key(key), f"{self._key(key)}:lock"
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            if _supersedes(current := cache.get(token_key), stale):
+                metrics.increment("token.refresh_shared")
+                return current
+            if cache.add(lock_key, os.getpid(), timeout=self.lock_timeout):
+                break
+            if time.monotonic() >= deadline:
+                metrics.increment("token.lock_timeouts")
+                return self._store(cache, token_key, _issue(fetch))
+            time.sleep(self.poll_interval)
+
+        try:
+            # Re-check under the lock: the previous holder may have stored a token since our read
+            if _supersedes(current := cache.get(token_key), stale):
+                metrics.increment("token.refresh_shared")
+                return current
+            return self._store(cache, token_key, _issue(fetch))
+        finally:
+            cache.delete(lock_key)
+
+    @staticmethod
+    def _store(cache, token_key: str, token: StoredToken) -> StoredToken:
+        cache.set(token_key, token, timeout=max(int(token.expires_at - time.time()), 1))
+        return token
+
+
+@cache
+def get_token_store() -> TokenStore:
+    """The store configured by ``GMO_PAYMENT["token_store"]`` ("file", "cache" or "local")"""
+    gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+    kind = gmo_settings.get("token_store", "file")
+    if kind == "file":
+        return FileTokenStore(Path(gmo_settings.get("token_store_path") or Path(settings.BASE_DIR) / "tokens"))
+    if kind == "cache":
+        return CacheTokenStore(gmo_settings.get("token_cache", "default"))
+    if kind == "local":
+        return LocalTokenStore()
+    raise ValueError(f"Unknown GMO token store {kind!r}; expected 'file', 'cache' or 'local'")
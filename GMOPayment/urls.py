@@ -16,20 +16,29 @@ Including another URLconf
 """
 # from django.contrib import admin
 from django.urls import path
+from .views.aggregate import MerchantAggregateListView
+from .views.health import MetricsView, ReadinessView
 from .views.member import MemberViewSet, MemberRetrieveView, MemberDeleteView
 from .views.merchant import MerchantViewSet
+from .views.order_status import OrderStatusLongPollView
 from .views.payment_methods import PaymentMethodListCreateView, CreateTokenView, VerifyCard, CardDetailsByToken, \
     CardDetailsByMember
 from .views.transaction import TransactionCreditChargeView, TransactionOrderUpdateView, TransactionOrderCaptureView, \
-    TransactionOrderCancelView, TransactionOrderInqueryView, Finalize3dsPaymentView, TransactionCreditOnFileChargeView
+    TransactionOrderCancelView, TransactionOrderInqueryView, Finalize3dsPaymentView, TransactionCreditOnFileChargeView, \
+    TransactionDefaultCardChargeView, TransactionDetailView
+from .views.webhook import GMOWebhookView
 
 urlpatterns = [
+    path('health/ready', ReadinessView.as_view(), name='health-ready'),
+    path('health/metrics', MetricsView.as_view(), name='health-metrics'),
+
     path('members', MemberViewSet.as_view(), name='member-list'),
     path('members/delete', MemberDeleteView.as_view(), name='member-delete'),
 
     path('members/inquiry', MemberRetrieveView.as_view(), name='member-retrieve'),
 
     path('merchants', MerchantViewSet.as_view(), name='merchant-list'),
+    path('merchants/aggregates', MerchantAggregateListView.as_view(), name='merchant-aggregates'),
 
     path('verify-card', VerifyCard.as_view(), name='verify-card'),
     path('create-token', CreateTokenView.as_view(), name='create-token'),
@@ -39,10 +48,15 @@ urlpatterns = [
 
     path('transactions/credit/charge', TransactionCreditChargeView.as_view(), name='transaction-create'),
     path('transactions/credit/on-file/charge', TransactionCreditOnFileChargeView.as_view(), name='transaction-create'),
+    path('transactions/credit/default-card/charge', TransactionDefaultCardChargeView.as_view(), name='transaction-default-card'),
+    path('transactions/<str:order_id>', TransactionDetailView.as_view(), name='transaction-detail'),
     path('tds2/finalize-charge', Finalize3dsPaymentView.as_view(), name='transaction-finalize'),
     path('order/update', TransactionOrderUpdateView.as_view(), name='transaction-update'),
     path('order/capture', TransactionOrderCaptureView.as_view(), name='transaction-capture'),
     path('order/cancel', TransactionOrderCancelView.as_view(), name='transaction-cancel'),
     path('order/inquiry', TransactionOrderInqueryView.as_view(), name='transaction-inquiry'),
+    path('order/status', OrderStatusLongPollView.as_view(), name='order-status'),
+
+    path('webhooks/gmo', GMOWebhookView.as_view(), name='gmo-webhook'),
 ]
 
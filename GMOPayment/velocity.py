@@ -0,0 +1,177 @@
+"""
+Sliding-window velocity limits for card-handling endpoints.
+
+Card-testing traffic is rejected before any card encryption or GMO call.
+Each rule limits one dimension of a request (member, client IP, card
+fingerprint or merchant) to ``limit`` attempts per ``window`` seconds. The
+count is the sliding-window estimate over two fixed buckets: the current
+bucket plus the previous one weighted by how much of it still overlaps the
+window. Buckets live in the Django cache, so limits hold across workers when
+the cache is shared; a check is one ``get_many`` plus one ``incr`` per
+matching rule (an ``add`` when a bucket starts).
+
+Subjects are keyed by a keyed BLAKE2 digest, so card numbers, tokens and IP
+addresses never appear in cache keys.
+"""
+from dataclasses import dataclass
+from functools import cache
+import hashlib
+import math
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+
+from GMOPayment import metrics
+from GMOPayment.exceptions import GMOTooManyRequests
+
+
+CACHE_PREFIX = "gmo_velocity"
+DIMENSIONS = ("member", "ip", "card", "merchant")
+
+
+@dataclass(frozen=True, slots=True)
+class VelocityRule:
+    """At most ``limit`` attempts of ``action`` per ``dimension`` value within ``window`` seconds"""
+
+    action: str  # "*" matches every action
+    dimension: str
+    limit: int
+    window: int
+
+    def applies_to(self, action: str) -> bool:
+        return self.action in ("*", action)
+
+
+@dataclass(frozen=True, slots=True)
+class VelocityPolicy:
+    rules: tuple[VelocityRule, ...] = ()
+    enabled: bool = True
+    cache_alias: str = "default"
+
+    @classmethod
+    def from_settings(cls) -> 'VelocityPolicy':
+        gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+        rules = tuple(
+            VelocityRule(str(action), str(dimension), int(limit), int(window))
+            for action, dimension, limit, window in gmo_settings.get("velocity_rules") or ()
+        )
+        for rule in rules:
+            if rule.dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown velocity dimension {rule.dimension!r}; expected one of {DIMENSIONS}")
+        return cls(
+            rules=rules,
+            enabled=gmo_settings.get("velocity_enabled", True),
+            cache_alias=gmo_settings.get("velocity_cache", "default"),
+        )
+
+
+def fingerprint(value: str | int) -> str:
+    """Short keyed digest of a subject value, safe to use in cache keys
+
+    Ids may arrive as JSON numbers; ``12345`` and ``"12345"`` share a digest.
+    """
+    key = settings.SECRET_KEY.encode()[:64]
+    return hashlib.blake2b(str(value).encode(), key=key, digest_size=12).hexdigest()
+
+
+@dataclass(slots=True)
+class _Check:
+    rule: VelocityRule
+    current_key: str
+    previous_key: str
+    overlap: float  # share of the previous bucket still inside the window
+    remaining: float  # seconds until the current bucket closes
+
+
+class VelocityLimiter:
+    """Counts attempts per rule and rejects those over a limit"""
+
+    def __init__(self, policy: VelocityPolicy | None = None):
+        self.policy = policy or VelocityPolicy.from_settings()
+
+    def _checks(self, action: str, subjects: dict[str, str | int | None], now: float) -> list[_Check]:
+        checks = []
+        for rule in self.policy.rules:
+            value = subjects.get(rule.dimension)
+            if value in (None, "") or not rule.applies_to(action):
+                continue
+            bucket, offset = divmod(now, rule.window)
+            # Keyed by the rule's action, so a "*" rule counts every action against one limit
+            prefix = f"{CACHE_PREFIX}:{rule.action}:{rule.dimension}:{rule.window}:{fingerprint(value)}"
+            checks.append(_Check(
+                rule=rule,
+                current_key=f"{prefix}:{int(bucket)}",
+                previous_key=f"{prefix}:{int(bucket) - 1}",
+                overlap=1 - offset / rule.window,
+                remaining=rule.window - offset,
+            ))
+        return checks
+
+    def check(self, action: str, **subjects: str | int | None) -> None:
+        """Count one attempt of ``action``, raising ``GMOTooManyRequests`` when a rule is exceeded
+
+        Rejected attempts are not counted, so a blocked client regains access
+        as soon as its estimate falls below the limit.
+        """
+        if not self.policy.enabled:
+            return
+        checks = self._checks(action, subjects, time.time())
+        if not checks:
+            return
+
+        cache = caches[self.policy.cache_alias]
+        counts: dict[str, Any] = cache.get_many([key for check in checks for key in (check.current_key, check.previous_key)])
+        for check in checks:
+            previous = counts.get(check.previous_key, 0)
+            estimate = counts.get(check.current_key, 0) + previous * check.overlap
+            if estimate + 1 > check.rule.limit:
+                metrics.increment(f"velocity.blocked.{action}.{check.rule.dimension}")
+                # The estimate drops as the previous bucket slides out, and the current one starts over on rollover
+                excess = estimate + 1 - check.rule.limit
+                wait = min(check.remaining, excess * check.rule.window / previous) if previous else check.remaining
+                raise GMOTooManyRequests(wait=math.ceil(wait))
+
+        for check in checks:
+            try:
+                cache.incr(check.current_key)
+            except ValueError:
+                # First attempt in this bucket; it must outlive the window that still weighs it.
+                # Losing the add race to another worker means the bucket exists now.
+                if not cache.add(check.current_key, 1, timeout=2 * check.rule.window):
+                    cache.incr(check.current_key)
+        metrics.increment(f"velocity.allowed.{action}")
+
+
+@cache
+def get_limiter() -> VelocityLimiter:
+    return VelocityLimiter()
+
+
+def client_ip(request) -> str | None:
+    """The client address, read from the trusted proxy header when one is configured
+
+    Each of the ``trusted_proxy_count`` proxies in front of the app appends
+    the address it saw to ``client_ip_header`` (e.g. X-Forwarded-For), so the
+    client is that many entries from the right; anything further left was
+    sent by the client itself and is ignored.
+    """
+    gmo_settings = getattr(settings, "GMO_PAYMENT", {})
+    if header := gmo_settings.get("client_ip_header"):
+        hops = [hop.strip() for hop in request.headers.get(header, "").split(",") if hop.strip()]
+        if hops:
+            return hops[-min(max(gmo_settings.get("trusted_proxy_count", 1), 1), len(hops))]
+    return request.META.get("REMOTE_ADDR") or None
+
+
+def check_velocity(request, action: str, *, member: str | int | None = None, card: str | int | None = None,
+                   merchant: str | int | None = None) -> None:
+    """Apply the configured velocity rules to a request before it reaches GMO"""
+    get_limiter().check(
+        action,
+        ip=client_ip(request),
+        member=member,
+        card=card,
+        merchant=merchant or request.data.get("merchant_id"),
+    )
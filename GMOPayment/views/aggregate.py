@@ -0,0 +1,40 @@
+from datetime import date
+
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+
+from GMOPayment.conditional import ConditionalListMixin
+from GMOPayment.models.aggregate import MerchantDailyAggregate
+from GMOPayment.serializers.aggregate import MerchantDailyAggregateSerializer, MerchantDailyAggregateValuesSerializer
+from GMOPayment.serializers.values import ValuesListMixin
+
+
+class MerchantAggregateListView(ConditionalListMixin, ValuesListMixin, generics.ListAPIView):
+    """Daily transaction totals per merchant, served from the aggregates table only"""
+
+    serializer_class = MerchantDailyAggregateSerializer
+    values_serializer_class = MerchantDailyAggregateValuesSerializer
+
+    def _date_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({name: "Use the YYYY-MM-DD format."})
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = MerchantDailyAggregate.objects.select_related('merchant').order_by('merchant_id', 'day', 'status', 'job_cd')
+        if merchant_id := params.get("merchant_id"):
+            queryset = queryset.filter(merchant__merchant_id=merchant_id)
+        if since := self._date_param("since"):
+            queryset = queryset.filter(day__gte=since)
+        if until := self._date_param("until"):
+            queryset = queryset.filter(day__lte=until)
+        if statuses := params.getlist("status"):
+            queryset = queryset.filter(status__in=statuses)
+        if job_codes := params.getlist("job_cd"):
+            queryset = queryset.filter(job_cd__in=job_codes)
+        return queryset
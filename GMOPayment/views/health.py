@@ -0,0 +1,39 @@
+import hmac
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from GMOPayment import metrics
+from GMOPayment.warmup import get_state
+
+
+class ReadinessView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, *args, **kwargs):
+        state = get_state()
+        return Response(
+            state.as_dict(),
+            status=status.HTTP_200_OK if state.ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+class CanReadMetrics(BasePermission):
+    """Staff users, or callers sending GMO_METRICS_TOKEN in the X-Metrics-Token header"""
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = settings.GMO_PAYMENT.get("metrics_token")
+        return bool(token) and hmac.compare_digest(request.headers.get("X-Metrics-Token", ""), token)
+
+
+class MetricsView(APIView):
+    permission_classes = [CanReadMetrics]
+
+    def get(self, request, *args, **kwargs):
+        return Response(metrics.snapshot(), status=status.HTTP_200_OK)
@@ -1,18 +1,21 @@
 import logging
 from rest_framework import generics, status
 from rest_framework.exceptions import ValidationError
-from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from GMOPayment.models.member import Member
 from GMOPayment.serializers.member import MemberSerializer
+from GMOPayment.services.base import LazyService
 from GMOPayment.services.member import GMOMemberService
 
 
+logger = logging.getLogger(__name__)
+
+
 class MemberViewSet(generics.CreateAPIView):
     queryset = Member.objects.all()
     serializer_class = MemberSerializer
-    service = GMOMemberService()
+    service = LazyService(GMOMemberService)
 
     def create(self, request, *args, **kwargs):
         try:
@@ -20,29 +23,29 @@ class MemberViewSet(generics.CreateAPIView):
             if not member_id:
                 raise ValidationError("Member ID is required.")
             response = self.service.create_member(member_id, request.data.get("name"))
-            return Response(response, status=status.HTTP_201_CREATED)
+            return response.to_response(status.HTTP_201_CREATED)
         except Exception as e:
-            logging.error(f"GMO Member creation failed: {str(e)}")
+            logger.error("GMO Member creation failed: %s", e)
             raise ValidationError({"error": str(e)})
 
 
 class MemberRetrieveView(APIView):
-    service = GMOMemberService()
+    service = LazyService(GMOMemberService)
 
     def post(self, request, *args, **kwargs):
         member_id = request.data.get("member_id")
         if not member_id:
             raise ValidationError("Member ID is required.")
         response = self.service.get_member(member_id)
-        return Response(response, status=status.HTTP_200_OK)
+        return response.to_response(status.HTTP_200_OK)
 
 
 class MemberDeleteView(APIView):
-    service = GMOMemberService()
+    service = LazyService(GMOMemberService)
 
     def delete(self, request, *args, **kwargs):
         member_id = request.data.get("member_id")
         if not member_id:
             raise ValidationError("member_id is required.")
         response = self.service.delete_member(member_id)
-        return Response(response, status=status.HTTP_202_ACCEPTED)
\ No newline at end of file
+        return response.to_response(status.HTTP_202_ACCEPTED)
\ No newline at end of file
@@ -1,15 +1,19 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 
+from GMOPayment.conditional import ConditionalListMixin
 from GMOPayment.models.merchant import Merchant
-from GMOPayment.serializers.merchant import MerchantSerializer
+from GMOPayment.serializers.merchant import MerchantSerializer, MerchantValuesSerializer
+from GMOPayment.serializers.values import ValuesListMixin
+from GMOPayment.services.base import LazyService
 from GMOPayment.services.merchant import GMOMerchantService
 
 
-class MerchantViewSet(generics.ListAPIView, generics.CreateAPIView):
+class MerchantViewSet(ConditionalListMixin, ValuesListMixin, generics.ListAPIView, generics.CreateAPIView):
     queryset = Merchant.objects.all()
     serializer_class = MerchantSerializer
-    service = GMOMerchantService()
+    values_serializer_class = MerchantValuesSerializer
+    service = LazyService(GMOMerchantService)
 
     def create(self, request, *args, **kwargs):
         response = self.service.create_merchant_account(request.data["member_id"], request.data.get("name"))
@@ -0,0 +1,57 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views import View
+
+from GMOPayment import metrics
+from GMOPayment.exceptions import GMOAPIException
+from GMOPayment.order_status import board
+from GMOPayment.services.base import LazyService
+from GMOPayment.services.transaction import GMOTransactionService
+
+
+class OrderStatusLongPollView(View):
+    """Waits for an order's status to change, e.g. once 3DS authentication completes
+
+    ``GET /order/status?access_id=...&status=<last seen>&timeout=<seconds>``
+    answers as soon as the status differs from ``status`` (immediately if no
+    status is given and one is known). Waiting happens on the event loop
+    under ASGI. ``order/inquiry`` is called only if nothing changed before
+    the timeout.
+    """
+
+    service = LazyService(GMOTransactionService)
+
+    async def get(self, request, *args, **kwargs):
+        access_id = request.GET.get("access_id")
+        if not access_id:
+            return JsonResponse({"access_id": ["This field is required."]}, status=400)
+        known_status = request.GET.get("status") or None
+
+        gmo_settings = settings.GMO_PAYMENT
+        limit = gmo_settings.get("order_status_wait_max", 20.0)
+        try:
+            timeout = min(max(float(request.GET.get("timeout", limit)), 0.0), limit)
+        except ValueError:
+            return JsonResponse({"timeout": ["A number of seconds is required."]}, status=400)
+
+        state = await board.wait_for_change(
+            access_id, known_status, timeout, gmo_settings.get("order_status_poll_interval", 1.0)
+        )
+        if state is not None:
+            return JsonResponse({**state.as_dict(), "changed": True})
+
+        # Nothing changed locally; ask GMO once (the service publishes what it finds)
+        metrics.increment("order_status.gateway_fallback")
+        try:
+            result = await sync_to_async(self.service.inquiry_transaction_order, thread_sensitive=False)(access_id)
+        except GMOAPIException as e:
+            return JsonResponse({"detail": e.detail}, status=e.status_code)
+        status = result.order_status
+        return JsonResponse({
+            "access_id": access_id,
+            "status": status,
+            "order_id": result.order.order_id if result.order else None,
+            "source": "gateway",
+            "changed": status != known_status,
+        })
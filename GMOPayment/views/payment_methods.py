@@ -1,45 +1,62 @@
 from rest_framework import generics, status
 from rest_framework.exceptions import ValidationError
-from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from GMOPayment.admission import Priority
+from GMOPayment.cards import normalize_number
+from GMOPayment.conditional import ConditionalListMixin
 from GMOPayment.models.payment_method import PaymentMethod
-from GMOPayment.serializers.payment_method import PaymentMethodSerializer
+from GMOPayment.serializers.payment_method import PaymentMethodSerializer, PaymentMethodValuesSerializer
+from GMOPayment.serializers.values import ValuesListMixin
+from GMOPayment.services.base import LazyService
 from GMOPayment.services.payment_method import GMOPaymentMethodService
+from GMOPayment.velocity import check_velocity
 
 
-class PaymentMethodListCreateView(generics.ListCreateAPIView):
+class PaymentMethodListCreateView(ConditionalListMixin, ValuesListMixin, generics.ListCreateAPIView):
     queryset = PaymentMethod.objects.all()
     serializer_class = PaymentMethodSerializer
-    service = GMOPaymentMethodService()
+    values_serializer_class = PaymentMethodValuesSerializer
+    service = LazyService(GMOPaymentMethodService)
+    admission_group = "payment_methods"
+    admission_priority = Priority.NEW
 
     def create(self, request, *args, **kwargs):
         member_id = request.data.get("member_id")
         card_token = request.data.get("card_token")
-        response = self.service.save_card(member_id, card_token)
-        return Response(response, status=status.HTTP_201_CREATED)
+        make_default = str(request.data.get("make_default", "")).lower() in ("1", "true", "yes")
+        check_velocity(request, "save_card", member=member_id, card=card_token)
+        response = self.service.save_card(member_id, card_token, make_default)
+        return response.to_response(status.HTTP_201_CREATED)
 
 class VerifyCard(APIView):
-    service = GMOPaymentMethodService()
+    service = LazyService(GMOPaymentMethodService)
+    admission_group = "payment_methods"
+    admission_priority = Priority.NEW
 
     def post(self, request, *args, **kwargs):
         member_id = request.data.get("member_id")
         card_token = request.data.get("card_token")
         order_id = request.data.get("order_id")
+        check_velocity(request, "verify_card", member=member_id, card=card_token)
         response = self.service.verify_card(order_id, card_token)
-        return Response(response, status=status.HTTP_200_OK)
+        return response.to_response(status.HTTP_200_OK)
 
 class CardDetailsByToken(APIView):
-    service = GMOPaymentMethodService()
+    service = LazyService(GMOPaymentMethodService)
+    admission_group = "payment_methods"
+    admission_priority = Priority.READ
 
     def post(self, request, *args, **kwargs):
         card_token = request.data.get("card_token")
         response = self.service.get_card_details_by_token(card_token)
-        return Response(response, status=status.HTTP_200_OK)
+        return response.to_response(status.HTTP_200_OK)
 
 
 class CardDetailsByMember(APIView):
-    service = GMOPaymentMethodService()
+    service = LazyService(GMOPaymentMethodService)
+    admission_group = "payment_methods"
+    admission_priority = Priority.READ
 
     def post(self, request, *args, **kwargs):
         member_id = request.data.get("member_id")
@@ -52,10 +69,12 @@ class CardDetailsByMember(APIView):
         if not card_id:
             raise ValidationError("card_id is required.")
         response = self.service.get_card_details_by_member(member_id, card_type, card_id)
-        return Response(response, status=status.HTTP_200_OK)
+        return response.to_response(status.HTTP_200_OK)
 
 class CreateTokenView(APIView):
-    service = GMOPaymentMethodService()
+    service = LazyService(GMOPaymentMethodService)
+    admission_group = "payment_methods"
+    admission_priority = Priority.NEW
 
     def post(self, request, *args, **kwargs):
         card_no = request.data.get("card_number")
@@ -63,6 +82,6 @@ class CreateTokenView(APIView):
         expire_month = request.data.get("expire_month")
         expire_year = request.data.get("expire_year")
         security_code = request.data.get("security_code")
-
+        check_velocity(request, "create_token", card=normalize_number(str(card_no or "")))
         response = self.service.create_token(card_no, card_holder_name, expire_month, expire_year, security_code)
-        return Response(response, status=status.HTTP_201_CREATED)
+        return response.to_response(status.HTTP_201_CREATED)
@@ -1,13 +1,20 @@
 from rest_framework import status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from GMOPayment.admission import Priority
+from GMOPayment.archive import find_transaction
+from GMOPayment.serializers.transaction import TransactionSerializer
+from GMOPayment.services.base import LazyService
 from GMOPayment.services.transaction import GMOTransactionService
+from GMOPayment.velocity import check_velocity
 
 
 class TransactionCreditChargeView(APIView):
-    service = GMOTransactionService()
+    service = LazyService(GMOTransactionService)
+    admission_group = "transactions"
+    admission_priority = Priority.NEW
 
     def post(self, request, *args, **kwargs):
         order_id = request.data.get("order_id")
@@ -16,12 +23,17 @@ class TransactionCreditChargeView(APIView):
             raise ValidationError("Order ID is required.")
         if not card_token:
             raise ValidationError("Card token is required.")
-        response = self.service.create_transaction_with_new_payment_method(order_id, card_token, )
-        return Response(response, status=status.HTTP_201_CREATED)
+        check_velocity(request, "charge", card=card_token)
+        response = self.service.create_transaction_with_new_payment_method(
+            order_id, card_token, request.data.get("authorization_mode"), request.data.get("merchant_id")
+        )
+        return response.to_response(status.HTTP_201_CREATED)
 
 
 class TransactionCreditOnFileChargeView(APIView):
-    service = GMOTransactionService()
+    service = LazyService(GMOTransactionService)
+    admission_group = "transactions"
+    admission_priority = Priority.NEW
 
     def post(self, request, *args, **kwargs):
         order_id = request.data.get("order_id")
@@ -33,23 +45,51 @@ class TransactionCreditOnFileChargeView(APIView):
             raise ValidationError("member_id is required.")
         if not card_id:
             raise ValidationError("card_id is required.")
-        response = self.service.create_transaction_with_registered_payment_method(order_id, member_id, card_id)
-        return Response(response, status=status.HTTP_201_CREATED)
+        check_velocity(request, "charge", member=member_id, card=f"{member_id}:{card_id}")
+        response = self.service.create_transaction_with_registered_payment_method(
+            order_id, member_id, card_id,
+            authorization_mode=request.data.get("authorization_mode"),
+            merchant_id=request.data.get("merchant_id"),
+        )
+        return response.to_response(status.HTTP_201_CREATED)
+
+
+class TransactionDefaultCardChargeView(APIView):
+    service = LazyService(GMOTransactionService)
+    admission_group = "transactions"
+    admission_priority = Priority.NEW
+
+    def post(self, request, *args, **kwargs):
+        order_id = request.data.get("order_id")
+        member_id = request.data.get("member_id")
+        if not order_id:
+            raise ValidationError("order_id is required.")
+        if not member_id:
+            raise ValidationError("member_id is required.")
+        check_velocity(request, "charge", member=member_id)
+        response = self.service.charge_default_card(
+            order_id, member_id, request.data.get("authorization_mode"), request.data.get("merchant_id")
+        )
+        return response.to_response(status.HTTP_201_CREATED)
 
 
 class Finalize3dsPaymentView(APIView):
-    service = GMOTransactionService()
+    service = LazyService(GMOTransactionService)
+    admission_group = "transactions"
+    admission_priority = Priority.SETTLE
 
     def post(self, request, *args, **kwargs):
         access_id = request.data.get("access_id")
         if not access_id:
             raise ValidationError("access_id is required.")
         response = self.service.finalize_3d_secure_payment(access_id)
-        return Response(response, status=status.HTTP_200_OK)
+        return response.to_response(status.HTTP_200_OK)
 
 
 class TransactionOrderUpdateView(APIView):
-    service = GMOTransactionService()
+    service = LazyService(GMOTransactionService)
+    admission_group = "transactions"
+    admission_priority = Priority.SETTLE
 
     def post(self, request, *args, **kwargs):
         access_id = request.data.get("access_id")
@@ -58,38 +98,54 @@ class TransactionOrderUpdateView(APIView):
             raise ValidationError("access_id is required.")
         if not amount:
             raise ValidationError("amount is required.")
-        response = self.service.update_order(access_id, amount)
-        return Response(response, status=status.HTTP_200_OK)
+        response = self.service.update_order(access_id, amount, request.data.get("authorization_mode") or "CAPTURE")
+        return response.to_response(status.HTTP_200_OK)
 
 
 class TransactionOrderCaptureView(APIView):
-    service = GMOTransactionService()
+    service = LazyService(GMOTransactionService)
+    admission_group = "transactions"
+    admission_priority = Priority.SETTLE
 
     def post(self, request, *args, **kwargs):
         access_id = request.data.get("access_id")
         if not access_id:
             raise ValidationError("access_id is required.")
-        response = self.service.capture_transaction(access_id)
-        return Response(response, status=status.HTTP_200_OK)
+        # With an amount, the change and the capture go to GMO as one order/update call
+        response = self.service.update_and_capture(access_id, request.data.get("amount") or None)
+        return response.to_response(status.HTTP_200_OK)
 
 
 class TransactionOrderCancelView(APIView):
-    service = GMOTransactionService()
+    service = LazyService(GMOTransactionService)
+    admission_group = "transactions"
+    admission_priority = Priority.SETTLE
 
     def post(self, request, *args, **kwargs):
         access_id = request.data.get("access_id")
         if not access_id:
             raise ValidationError("access_id is required.")
         response = self.service.cancel_transaction(access_id)
-        return Response(response, status=status.HTTP_200_OK)
+        return response.to_response(status.HTTP_200_OK)
 
 
 class TransactionOrderInqueryView(APIView):
-    service = GMOTransactionService()
+    service = LazyService(GMOTransactionService)
+    admission_group = "transactions"
+    admission_priority = Priority.READ
 
     def post(self, request, *args, **kwargs):
         access_id = request.data.get("access_id")
         if not access_id:
             raise ValidationError("access_id is required.")
         response = self.service.inquiry_transaction_order(access_id)
-        return Response(response, status=status.HTTP_200_OK)
\ No newline at end of file
+        return response.to_response(status.HTTP_200_OK)
+
+
+class TransactionDetailView(APIView):
+    """A stored transaction by order id, served from the archive once it has been archived"""
+
+    def get(self, request, order_id, *args, **kwargs):
+        if (instance := find_transaction(order_id)) is None:
+            raise NotFound("Transaction not found.")
+        return Response(TransactionSerializer(instance).data, status=status.HTTP_200_OK)
@@ -0,0 +1,40 @@
+import hmac
+import logging
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from GMOPayment.order_status import board
+from GMOPayment.responses import OrderResult
+
+
+logger = logging.getLogger(__name__)
+
+
+class GMOWebhookView(APIView):
+    """Receives GMO order notifications and publishes them to long-polling clients"""
+
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, *args, **kwargs):
+        secret = settings.GMO_PAYMENT.get("webhook_secret")
+        if not secret:
+            # Fail closed: without a secret anyone could publish order statuses
+            logger.error("Rejected a GMO webhook: GMO_WEBHOOK_SECRET is not configured")
+            raise AuthenticationFailed("Webhook secret is not configured.")
+        if not hmac.compare_digest(request.headers.get("X-GMO-Webhook-Secret", ""), secret):
+            raise AuthenticationFailed("Invalid webhook secret.")
+        result = OrderResult(request.body)
+        try:
+            valid = isinstance(result.data, dict)
+        except ValueError:
+            valid = False
+        if not valid:
+            raise ValidationError("Webhook body must be a JSON object.")
+        if board.publish_result(result, source="webhook") is None:
+            raise ValidationError("Webhook body has no order.")
+        return Response(status=status.HTTP_204_NO_CONTENT)
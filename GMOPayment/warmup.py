@@ -0,0 +1,128 @@
+"""
+Worker warm-up: authenticate, open keep-alive connections to the GMO hosts
+and load the card-encryption public key before the first request arrives.
+
+Enable with ``GMO_WARMUP_ON_READY=True`` to run from ``AppConfig.ready()``,
+or call it from a gunicorn hook (needed with ``preload_app``, since the
+master's connections must not be shared with forked workers)::
+
+    # gunicorn.conf.py
+    from GMOPayment.warmup import post_fork
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+import logging
+import threading
+import time
+from typing import Any
+
+from decouple import config
+from django.apps import apps
+from django.conf import settings
+import requests
+
+from GMOPayment.gmo_client import get_shared_client, reset_shared_client
+
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupStatus:
+    DISABLED = "disabled"
+    COLD = "cold"
+    WARMING = "warming"
+    WARM = "warm"
+    FAILED = "failed"
+
+
+@dataclass(slots=True)
+class WarmupState:
+    """Outcome of the latest warm-up in this process"""
+
+    status: str = WarmupStatus.DISABLED
+    started_at: float | None = None
+    finished_at: float | None = None
+    steps: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status in (WarmupStatus.WARM, WarmupStatus.DISABLED)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "ready": self.ready}
+
+
+_state = WarmupState()
+_lock = threading.Lock()
+
+
+def get_state() -> WarmupState:
+    return _state
+
+
+def _timed(step: str, steps: dict[str, float], func: Any, *args: Any) -> Any:
+    started = time.perf_counter()
+    result = func(*args)
+    steps[step] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def _open_connections(session: requests.Session, url: str, count: int, timeout: float) -> None:
+    """Open ``count`` pooled keep-alive connections to the host serving ``url``"""
+    def probe(_: int) -> None:
+        session.head(url, timeout=timeout, allow_redirects=False).close()
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        list(pool.map(probe, range(count)))
+
+
+def warm_up() -> WarmupState:
+    """Run every warm-up step synchronously and record the result"""
+    global _state
+    from GMOPayment.services.payment_method import load_public_key
+
+    state = WarmupState(status=WarmupStatus.WARMING, started_at=time.time())
+    _state = state
+    try:
+        client = get_shared_client()
+        connections = max(settings.GMO_PAYMENT.get("warmup_connections", 1), 1)
+        _timed("authenticate", state.steps, client.authenticate)
+        for name, url in (("api", client.urls.api_base_url), ("pm_token", client.urls.payment_method_token_url)):
+            _timed(f"connect_{name}", state.steps, _open_connections, client.session, url, connections, client.timeout)
+        _timed("public_key", state.steps, load_public_key, config("PM_TOKEN_PUBLIC_KEY"))
+    except Exception as e:
+        state.status, state.error = WarmupStatus.FAILED, str(e)
+        logger.error("GMO warm-up failed: %s", e)
+    else:
+        state.status = WarmupStatus.WARM
+        logger.info("GMO warm-up finished", extra={"steps": state.steps})
+    state.finished_at = time.time()
+    return state
+
+
+def start_warm_up(background: bool = True) -> None:
+    """Start a warm-up unless one is already running in this process"""
+    global _state
+    with _lock:
+        if _state.status == WarmupStatus.WARMING:
+            return
+        _state = WarmupState(status=WarmupStatus.WARMING, started_at=time.time())
+    if background:
+        threading.Thread(target=warm_up, name="gmo-warmup", daemon=True).start()
+    else:
+        warm_up()
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    """Gunicorn ``post_fork`` hook; warms the new worker when the app is preloaded
+
+    Without ``preload_app`` Django is set up later in the worker, and
+    ``AppConfig.ready()`` starts the warm-up if ``GMO_WARMUP_ON_READY`` is set.
+    """
+    global _state
+    if not apps.ready:
+        return
+    reset_shared_client()
+    _state = WarmupState(status=WarmupStatus.COLD)
+    start_warm_up(background=True)
@@ -0,0 +1,120 @@
+"""
+Behaviour of the gateway-bound views when the gateway slows down.
+
+A slow stub gateway is hammered by more charge clients than the
+``transactions`` admission group lets through, while a few capture clients
+run alongside. Each client loops for ``--duration`` seconds through Django's
+test client. Results are per route and outcome: admitted requests should keep
+a bounded latency, shed ones should fail fast with ``503``, and captures
+should be shed far less than charges. ``--disabled`` runs the same load
+without admission control for comparison.
+
+    python -m benchmarks.bench_admission --latency fixed:200 --charges 24 --captures 4 --duration 10
+"""
+import argparse
+from collections import defaultdict
+import itertools
+import os
+import statistics
+import threading
+import time
+
+from benchmarks.harness import RunResult, configure_django, percentile, print_results, store_results
+from benchmarks.stub_gateway import EndpointBehaviour, LatencyProfile, StubGateway
+
+
+_sequence = itertools.count()
+
+ROUTES = {
+    "charge": ("/transactions/credit/on-file/charge", lambda: {
+        "order_id": f"bench-{next(_sequence):012d}", "member_id": "MEM-bench", "card_id": "card-1",
+    }),
+    "capture": ("/order/capture", lambda: {"access_id": "acc-bench"}),
+}
+
+
+def drive(route: str, clients: int, duration: float, samples: dict, lock: threading.Lock) -> list[threading.Thread]:
+    from django.test import Client
+
+    path, payload = ROUTES[route]
+    stop_at = time.perf_counter() + duration
+
+    def client_loop() -> None:
+        client, local = Client(), defaultdict(list)
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            response = client.post(path, payload(), content_type="application/json")
+            outcome = "ok" if response.status_code < 400 else str(response.status_code)
+            local[outcome].append(time.perf_counter() - started)
+        with lock:
+            for outcome, latencies in local.items():
+                samples[(route, outcome)].extend(latencies)
+
+    return [threading.Thread(target=client_loop) for _ in range(clients)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", default="fixed:200", help="stub latency, distribution:mean_ms[:spread]")
+    parser.add_argument("--charges", type=int, default=24, help="concurrent charge clients")
+    parser.add_argument("--captures", type=int, default=4, help="concurrent capture clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--limit", type=int, default=4, help="transactions group concurrency")
+    parser.add_argument("--queue", type=int, default=8, help="transactions group queue")
+    parser.add_argument("--max-wait", type=float, default=1.0, help="seconds a request may wait for a slot")
+    parser.add_argument("--disabled", action="store_true", help="run without admission control")
+    parser.add_argument("--no-store", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "GMO_ADMISSION_ENABLED": str(not args.disabled),
+        "GMO_ADMISSION_TRANSACTIONS_CONCURRENCY": str(args.limit),
+        "GMO_ADMISSION_TRANSACTIONS_QUEUE": str(args.queue),
+        "GMO_ADMISSION_TRANSACTIONS_MAX_WAIT": str(args.max_wait),
+    })
+    behaviour = EndpointBehaviour(LatencyProfile.parse(args.latency))
+    samples: dict[tuple[str, str], list[float]] = defaultdict(list)
+    lock = threading.Lock()
+    with StubGateway(default=behaviour, seed=0) as gateway:
+        configure_django(gateway)
+        from GMOPayment import metrics
+
+        threads = (
+            drive("charge", args.charges, args.duration, samples, lock)
+            + drive("capture", args.captures, args.duration, samples, lock)
+        )
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+        snapshot = metrics.snapshot()
+
+    results = []
+    for (route, outcome), latencies in sorted(samples.items()):
+        millis = [latency * 1000 for latency in latencies]
+        results.append(RunResult(
+            scenario=f"{route}_{outcome}",
+            concurrency=args.charges if route == "charge" else args.captures,
+            requests=len(millis),
+            errors=0 if outcome == "ok" else len(millis),
+            duration_s=duration,
+            throughput_rps=len(millis) / duration,
+            p50_ms=percentile(millis, 50),
+            p95_ms=percentile(millis, 95),
+            p99_ms=percentile(millis, 99),
+            mean_ms=statistics.fmean(millis),
+            extra={"admission": not args.disabled},
+        ))
+
+    print_results(results)
+    counters = {name: value for name, value in snapshot["counters"].items() if name.startswith("admission.")}
+    print(f"\nAdmission counters: {counters}")
+    print(f"Queue wait: {snapshot['admission_wait']}")
+    if not args.no_store:
+        print(f"Results written to {store_results('admission', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
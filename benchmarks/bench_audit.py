@@ -0,0 +1,122 @@
+"""
+Cost of the GMO audit log on the request path, and lookup speed afterwards.
+
+Charges run through ``GMOTransactionService`` against the stub gateway with
+the audit log off and on, alternating rounds so drift affects both alike.
+The audit log writes to a temporary directory with small segments, so the
+lookup at the end has to pick the right blocks out of many segments.
+Latencies are per charge; the ``lookup`` row is per ``AuditReader.find``.
+
+    python -m benchmarks.bench_audit --latency fixed:2 --concurrency 1,8 --requests 2000
+"""
+import argparse
+import itertools
+from pathlib import Path
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.harness import RunResult, configure_django, percentile, print_results, run_concurrent, store_results
+from benchmarks.stub_gateway import EndpointBehaviour, LatencyProfile, StubGateway
+
+
+_sequence = itertools.count()
+
+
+def merge(name: str, runs: list[RunResult]) -> RunResult:
+    """Combine alternating rounds of one scenario into a single row"""
+    return RunResult(
+        scenario=name,
+        concurrency=runs[0].concurrency,
+        requests=sum(run.requests for run in runs),
+        errors=sum(run.errors for run in runs),
+        duration_s=sum(run.duration_s for run in runs),
+        throughput_rps=sum(run.requests for run in runs) / sum(run.duration_s for run in runs),
+        p50_ms=statistics.median(run.p50_ms for run in runs),
+        p95_ms=statistics.median(run.p95_ms for run in runs),
+        p99_ms=statistics.median(run.p99_ms for run in runs),
+        mean_ms=statistics.fmean(run.mean_ms for run in runs),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=2000, help="charges per scenario and level")
+    parser.add_argument("--rounds", type=int, default=4, help="alternating off/on rounds per level")
+    parser.add_argument("--latency", default="fixed:2", help="stub latency, distribution:mean_ms[:spread]")
+    parser.add_argument("--segment-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--no-store", action="store_true")
+    args = parser.parse_args()
+
+    gateway = StubGateway(default=EndpointBehaviour(latency=LatencyProfile.parse(args.latency))).start()
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            configure_django(gateway)
+            from GMOPayment import metrics
+            from GMOPayment.audit import AuditLog, AuditPolicy, AuditReader
+            from GMOPayment.gmo_client import get_shared_client
+            from GMOPayment.services.transaction import GMOTransactionService
+
+            client = get_shared_client()
+            audit = AuditLog(AuditPolicy(path=Path(directory), segment_bytes=args.segment_bytes, batch_size=128))
+            service = GMOTransactionService()
+            order_ids: list[str] = []
+
+            def charge() -> bool:
+                order_id = f"bench-{next(_sequence):012d}"
+                if client.audit is not None:
+                    order_ids.append(order_id)
+                result = service.create_transaction_with_registered_payment_method(order_id, "MEM-bench", "card-1", "1000")
+                return result.order is not None and result.order.order_id == order_id
+
+            charge()  # authenticate and open connections before timing
+            results = []
+            per_round = max(args.requests // args.rounds, 1)
+            for concurrency in (int(level) for level in args.concurrency.split(",")):
+                runs: dict[str, list[RunResult]] = {"audit_off": [], "audit_on": []}
+                for _ in range(args.rounds):
+                    for name, log in (("audit_off", None), ("audit_on", audit)):
+                        client.audit = log
+                        runs[name].append(run_concurrent(name, charge, concurrency, per_round))
+                results.extend(merge(name, rounds) for name, rounds in runs.items())
+            client.audit = None
+            audit.flush()
+        finally:
+            gateway.stop()
+
+        reader = AuditReader(Path(directory))
+        segments = reader.segments()
+        sample = random.Random(7).sample(order_ids, min(args.lookups, len(order_ids)))
+        lookup_ms, found = [], 0
+        for order_id in sample:
+            started = time.perf_counter()
+            found += sum(1 for _ in reader.find(order_id))
+            lookup_ms.append((time.perf_counter() - started) * 1000)
+        counters = metrics.snapshot()["counters"]
+        results.append(RunResult(
+            scenario="lookup",
+            concurrency=1,
+            requests=len(sample),
+            errors=len(sample) - found,
+            duration_s=sum(lookup_ms) / 1000,
+            throughput_rps=len(sample) / (sum(lookup_ms) / 1000),
+            p50_ms=percentile(lookup_ms, 50),
+            p95_ms=percentile(lookup_ms, 95),
+            p99_ms=percentile(lookup_ms, 99),
+            mean_ms=statistics.fmean(lookup_ms),
+            extra={"segments": len(segments)},
+        ))
+
+    print_results(results)
+    raw, written = counters.get("audit.bytes_raw", 0), counters.get("audit.bytes_written", 0)
+    print(f"\nAudit: {counters.get('audit.records', 0)} records, {counters.get('audit.dropped', 0)} dropped, "
+          f"{len(segments)} segments, {raw} bytes raw -> {written} compressed ({raw / max(written, 1):.1f}x)")
+    if not args.no_store:
+        print(f"Results written to {store_results('audit', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+BIN index lookups per second.
+
+Builds an index of ``--ranges`` random, partly nested prefix ranges into a
+temporary file, maps it, and times lookups of full and masked card numbers
+against the built-in IIN prefix rules of ``GMOPayment.cards``. Latencies are
+per lookup.
+
+    python -m benchmarks.bench_bins --ranges 200000 --number 100000
+"""
+import argparse
+from collections.abc import Callable
+import itertools
+from pathlib import Path
+import random
+import statistics
+import tempfile
+import time
+import timeit
+from typing import Any
+
+from benchmarks.harness import RunResult, configure_django, measure_allocations, percentile, print_results, store_results
+
+
+BRANDS = ("VISA", "MC", "JCB", "AMEX", "DISC")
+
+
+def synthetic_ranges(count: int, seed: int) -> list[Any]:
+    """Eight-digit ranges inside six-digit parents, the shape of real BIN tables"""
+    from GMOPayment.bins import BinRange, prefix_key
+
+    rng = random.Random(seed)
+    ranges = []
+    for bin6 in rng.sample(range(300000, 700000), count // 2):
+        prefix = str(bin6)
+        brand = BRANDS[bin6 % len(BRANDS)]
+        ranges.append(BinRange(prefix_key(prefix), prefix_key(prefix, "9"), brand, f"Issuer {bin6 % 997}"))
+        low = rng.randrange(0, 90)
+        ranges.append(BinRange(
+            prefix_key(f"{prefix}{low:02d}"), prefix_key(f"{prefix}{low + 9:02d}", "9"), brand, f"Issuer {bin6 % 991}"
+        ))
+    return ranges
+
+
+def measure(name: str, call: Callable[[], Any], number: int, repeat: int) -> RunResult:
+    rounds = timeit.repeat(call, number=number, repeat=repeat)
+    per_call_ms = [total / number * 1000 for total in rounds]
+    peak, blocks = measure_allocations(call, 1000)
+    return RunResult(
+        scenario=name,
+        concurrency=1,
+        requests=number * repeat,
+        errors=0,
+        duration_s=sum(rounds),
+        throughput_rps=number * repeat / sum(rounds),
+        p50_ms=percentile(per_call_ms, 50),
+        p95_ms=percentile(per_call_ms, 95),
+        p99_ms=percentile(per_call_ms, 99),
+        mean_ms=statistics.fmean(per_call_ms),
+        alloc_peak_bytes=peak,
+        alloc_blocks=blocks,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ranges", type=int, default=200_000, help="source ranges in the index")
+    parser.add_argument("--number", type=int, default=100_000, help="lookups per timing round")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-store", action="store_true")
+    args = parser.parse_args()
+
+    configure_django()
+    from GMOPayment.bins import BinIndex, build_index
+    from GMOPayment.cards import detect_brand
+
+    rng = random.Random(args.seed)
+    numbers = [f"{rng.randrange(300000, 700000)}{rng.randrange(10 ** 9, 10 ** 10)}" for _ in range(4096)]
+    masked = [f"{number[:6]}******{number[-4:]}" for number in numbers]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bins.bin"
+        started = time.perf_counter()
+        count = build_index(synthetic_ranges(args.ranges, args.seed), path)
+        build_s = time.perf_counter() - started
+        started = time.perf_counter()
+        index = BinIndex(path)
+        open_ms = (time.perf_counter() - started) * 1000
+        hits = sum(index.lookup(number) is not None for number in numbers)
+
+        full_numbers, masked_numbers, rule_numbers = (itertools.cycle(items) for items in (numbers, masked, numbers))
+        results = [
+            measure("index_lookup", lambda: index.lookup(next(full_numbers)), args.number, args.repeat),
+            measure("index_lookup_masked", lambda: index.lookup(next(masked_numbers)), args.number, args.repeat),
+            measure("prefix_rules", lambda: detect_brand(next(rule_numbers)), args.number, args.repeat),
+        ]
+        size = path.stat().st_size
+        del index
+
+    for result in results:
+        result.extra.update(index_ranges=count, index_bytes=size, build_s=round(build_s, 3), open_ms=round(open_ms, 3))
+    print(f"Index: {count} disjoint ranges, {size} bytes, built in {build_s:.2f}s, opened in {open_ms:.2f}ms, "
+          f"{hits}/{len(numbers)} sample hits\n")
+    print_results(results)
+    if not args.no_store:
+        print(f"Results written to {store_results('bins', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
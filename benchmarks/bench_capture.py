@@ -0,0 +1,90 @@
+"""
+Round trips of the capture flows: authorize then capture (optionally with an
+amount change in between) against capturing at authorization time.
+
+Each flow runs through ``GMOTransactionService`` against the stub gateway,
+so every GMO call pays the configured latency. Latencies are per flow; the
+``calls`` column of the stored results is GMO calls per flow.
+
+    python -m benchmarks.bench_capture --latency fixed:20 --concurrency 1,8 --flows 100
+"""
+import argparse
+from collections.abc import Callable
+import itertools
+import sys
+
+from benchmarks.harness import configure_django, print_results, run_concurrent, store_results
+from benchmarks.stub_gateway import EndpointBehaviour, LatencyProfile, StubGateway
+
+
+_sequence = itertools.count()
+
+
+def build_flows(service) -> dict[str, Callable[[], bool]]:
+    def charge(mode: str):
+        return service.create_transaction_with_registered_payment_method(
+            f"bench-{next(_sequence):012d}", "MEM-bench", "card-1", "1000", authorization_mode=mode
+        )
+
+    def auth_update_capture() -> bool:
+        access_id = charge("AUTH").access_id
+        service.update_order(access_id, "900", authorization_mode="AUTH")
+        return service.capture_transaction(access_id).order_status == "CAPTURED"
+
+    def auth_capture() -> bool:
+        return service.capture_transaction(charge("AUTH").access_id).order_status == "CAPTURED"
+
+    def auth_update_and_capture() -> bool:
+        return service.update_and_capture(charge("AUTH").access_id, "900").order_status == "CAPTURED"
+
+    def capture_at_auth() -> bool:
+        return charge("CAPTURE").order_status == "CAPTURED"
+
+    return {
+        "auth_update_capture": auth_update_capture,
+        "auth_update_and_capture": auth_update_and_capture,
+        "auth_capture": auth_capture,
+        "capture_at_auth": capture_at_auth,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8", help="comma separated concurrency levels")
+    parser.add_argument("--flows", type=int, default=100, help="flows per scenario and level")
+    parser.add_argument("--latency", default="fixed:20", help="stub latency, distribution:mean_ms[:spread]")
+    parser.add_argument("--no-store", action="store_true")
+    args = parser.parse_args()
+
+    gateway = StubGateway(default=EndpointBehaviour(latency=LatencyProfile.parse(args.latency))).start()
+    try:
+        configure_django(gateway)
+        from GMOPayment.services.transaction import GMOTransactionService
+
+        service = GMOTransactionService()
+        flows = build_flows(service)
+        flows["capture_at_auth"]()  # authenticate and open connections before timing
+
+        results = []
+        for concurrency in (int(level) for level in args.concurrency.split(",")):
+            for name, flow in flows.items():
+                before = sum(count for path, count in gateway.request_counts.items() if path.startswith("/api/"))
+                result = run_concurrent(name, flow, concurrency, args.flows)
+                after = sum(count for path, count in gateway.request_counts.items() if path.startswith("/api/"))
+                result.extra["calls"] = round((after - before) / args.flows, 2)
+                results.append(result)
+    finally:
+        gateway.stop()
+
+    print_results(results)
+    print("\nGMO calls per flow: " + ", ".join(
+        f"{result.scenario}={result.extra['calls']}" for result in results if result.concurrency == results[0].concurrency
+    ))
+    if not args.no_store:
+        print(f"Results written to {store_results('capture', results, vars(args))}")
+    if any(result.errors for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
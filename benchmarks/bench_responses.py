@@ -0,0 +1,101 @@
+"""
+Micro-benchmark of GMO response handling: decoding the body into a ``dict``
+and re-rendering it through DRF, against passing the typed response's raw
+bytes straight through.
+
+Each scenario is timed with ``timeit`` over ``--repeat`` rounds of
+``--number`` calls; the reported latencies are per call. Allocation figures
+come from ``tracemalloc``.
+
+    python -m benchmarks.bench_responses --number 20000 --repeat 7
+"""
+import argparse
+from collections.abc import Callable
+import json
+import statistics
+import timeit
+from typing import Any
+
+from benchmarks.harness import RunResult, configure_django, measure_allocations, percentile, print_results, store_results
+from benchmarks.stub_gateway import ROUTES
+
+
+def charge_body() -> bytes:
+    """A realistic ``credit/charge`` response body as sent by the stub gateway"""
+    payload = {"order": {"orderId": "bench-000000000001", "amount": "1000"}, "accessId": "a" * 32}
+    return json.dumps(ROUTES["/api/credit/charge"](payload)).encode()
+
+
+def build_scenarios(raw: bytes) -> dict[str, Callable[[], Any]]:
+    from rest_framework.renderers import JSONRenderer
+
+    from GMOPayment.responses import ChargeResult
+
+    renderer = JSONRenderer()
+
+    def dict_passthrough() -> bytes:
+        return renderer.render(json.loads(raw))
+
+    def typed_passthrough() -> bytes:
+        return ChargeResult(raw).to_response(201).content
+
+    def dict_fields() -> tuple[Any, ...]:
+        data = json.loads(raw)
+        card = data["creditResult"]["cardResult"]
+        return data["order"]["accessId"], data["order"]["orderStatus"], card["brand"], card["cardNumber"]
+
+    def typed_fields() -> tuple[Any, ...]:
+        result = ChargeResult(raw)
+        return result.access_id, result.order_status, result.card.brand, result.card.card_number
+
+    return {
+        "dict_passthrough": dict_passthrough,
+        "typed_passthrough": typed_passthrough,
+        "dict_fields": dict_fields,
+        "typed_fields": typed_fields,
+    }
+
+
+def measure(name: str, call: Callable[[], Any], number: int, repeat: int, alloc_iterations: int) -> RunResult:
+    rounds = timeit.repeat(call, number=number, repeat=repeat)
+    per_call_ms = [total / number * 1000 for total in rounds]
+    peak, blocks = measure_allocations(call, alloc_iterations)
+    return RunResult(
+        scenario=name,
+        concurrency=1,
+        requests=number * repeat,
+        errors=0,
+        duration_s=sum(rounds),
+        throughput_rps=number * repeat / sum(rounds),
+        p50_ms=percentile(per_call_ms, 50),
+        p95_ms=percentile(per_call_ms, 95),
+        p99_ms=percentile(per_call_ms, 99),
+        mean_ms=statistics.fmean(per_call_ms),
+        alloc_peak_bytes=peak,
+        alloc_blocks=blocks,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing round")
+    parser.add_argument("--repeat", type=int, default=7, help="timing rounds per scenario")
+    parser.add_argument("--alloc-iterations", type=int, default=200)
+    parser.add_argument("--no-store", action="store_true")
+    args = parser.parse_args()
+
+    configure_django()
+    raw = charge_body()
+    results = [
+        measure(name, call, args.number, args.repeat, args.alloc_iterations)
+        for name, call in build_scenarios(raw).items()
+    ]
+
+    print(f"Body size: {len(raw)} bytes\n")
+    print_results(results)
+    if not args.no_store:
+        print(f"Results written to {store_results('responses', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+List serialization throughput: ``ModelSerializer(many=True)`` over model
+instances against the ``values()``-based ``ValuesSerializer`` equivalents.
+
+Each scenario serializes the whole table (query included) ``--repeat`` times
+against an in-memory database. The reported rps is rows per second, and
+latencies are per full list. Before timing, the two outputs are checked to
+render identical JSON.
+
+    python -m benchmarks.bench_serializers --rows 5000 --repeat 10
+"""
+import argparse
+from datetime import timedelta
+import statistics
+import time
+
+from benchmarks.harness import RunResult, configure_django, measure_allocations, percentile, print_results, store_results
+
+
+def populate(rows: int) -> None:
+    from django.utils import timezone
+
+    from GMOPayment.models.member import Member
+    from GMOPayment.models.merchant import Merchant
+    from GMOPayment.models.payment_method import PaymentMethod
+    from GMOPayment.models.transaction import Transaction
+
+    now = timezone.now()
+    merchants = Merchant.objects.bulk_create(
+        Merchant(merchant_id=f"mer{i:06d}", name=f"Merchant {i}", site_id="site", shop_id="shop", shop_password="pass")
+        for i in range(rows)
+    )
+    members = Member.objects.bulk_create(
+        Member(member_id=f"mem{i:06d}", name=f"Member {i}", email=f"m{i}@example.com") for i in range(rows)
+    )
+    brands = [code for code, _ in PaymentMethod.CARD_BRAND_CHOICES] + [None]
+    methods = PaymentMethod.objects.bulk_create(
+        PaymentMethod(
+            member=member, card_no="411111******1111", expire="3012", cardholder_name="TARO MIHON",
+            brand=brands[i % len(brands)], is_default=True, card_id=f"card{i}",
+        )
+        for i, member in enumerate(members)
+    )
+    statuses = [code for code, _ in Transaction.TRANSACTION_STATUS_CHOICES]
+    job_codes = [code for code, _ in Transaction.JOB_CODE_CHOICES]
+    Transaction.objects.bulk_create(
+        Transaction(
+            order_id=f"order{i:08d}", access_id=f"acc{i}", access_pass="pass", amount=100 + i, tax=10,
+            job_cd=job_codes[i % len(job_codes)], status=statuses[i % len(statuses)], member=members[i],
+            merchant_account=merchants[i], payment_method=methods[i], transaction_date=now - timedelta(minutes=i),
+        )
+        for i in range(rows)
+    )
+
+
+def scenarios() -> list[tuple[str, type, type, type]]:
+    from GMOPayment.models.member import Member
+    from GMOPayment.models.merchant import Merchant
+    from GMOPayment.models.payment_method import PaymentMethod
+    from GMOPayment.models.transaction import Transaction
+    from GMOPayment.serializers.member import MemberSerializer, MemberValuesSerializer
+    from GMOPayment.serializers.merchant import MerchantSerializer, MerchantValuesSerializer
+    from GMOPayment.serializers.payment_method import PaymentMethodSerializer, PaymentMethodValuesSerializer
+    from GMOPayment.serializers.transaction import TransactionSerializer, TransactionValuesSerializer
+
+    return [
+        ("member", Member, MemberSerializer, MemberValuesSerializer),
+        ("merchant", Merchant, MerchantSerializer, MerchantValuesSerializer),
+        ("payment_method", PaymentMethod, PaymentMethodSerializer, PaymentMethodValuesSerializer),
+        ("transaction", Transaction, TransactionSerializer, TransactionValuesSerializer),
+    ]
+
+
+def measure(name: str, serialize, rows: int, repeat: int) -> RunResult:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        serialize()
+        samples.append((time.perf_counter() - started) * 1000)
+    peak, blocks = measure_allocations(serialize, iterations=3)
+    return RunResult(
+        scenario=name,
+        concurrency=1,
+        requests=rows * repeat,
+        errors=0,
+        duration_s=sum(samples) / 1000,
+        throughput_rps=rows * repeat / (sum(samples) / 1000),
+        p50_ms=percentile(samples, 50),
+        p95_ms=percentile(samples, 95),
+        p99_ms=percentile(samples, 99),
+        mean_ms=statistics.fmean(samples),
+        alloc_peak_bytes=peak,
+        alloc_blocks=blocks,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="rows per table")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--no-store", action="store_true")
+    args = parser.parse_args()
+
+    configure_django(database=True)
+    from rest_framework.renderers import JSONRenderer
+
+    populate(args.rows)
+    renderer = JSONRenderer()
+
+    results = []
+    for name, model, model_serializer, values_serializer in scenarios():
+        queryset = model.objects.order_by("pk")
+        baseline = lambda: model_serializer(queryset.all(), many=True).data  # noqa: E731
+        fast = lambda: values_serializer(queryset.all()).data  # noqa: E731
+        if renderer.render(baseline()) != renderer.render(fast()):
+            raise SystemExit(f"{name}: ValuesSerializer output differs from {model_serializer.__name__}")
+        results.append(measure(f"{name}_model", baseline, args.rows, args.repeat))
+        results.append(measure(f"{name}_values", fast, args.rows, args.repeat))
+
+    print_results(results)
+    if not args.no_store:
+        print(f"Results written to {store_results('serializers', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
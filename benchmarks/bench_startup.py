@@ -0,0 +1,86 @@
+"""
+Cold-start benchmark: ``manage.py check`` and WSGI/ASGI application load.
+
+Every sample runs in a fresh interpreter. The WSGI/ASGI targets also resolve
+the URLconf, since Django otherwise defers importing the views until the
+first request. ``--importtime`` prints the slowest imports of each target.
+
+    python -m benchmarks.bench_startup --runs 10 --importtime
+"""
+import argparse
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.harness import RunResult, gateway_environment, percentile, print_results, store_results
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+RESOLVE_URLS = "from django.urls import get_resolver; get_resolver().url_patterns"
+
+TARGETS = {
+    "manage_check": [sys.executable, "manage.py", "check"],
+    "wsgi_load": [sys.executable, "-c", f"from GMOPayment.wsgi import application; {RESOLVE_URLS}"],
+    "asgi_load": [sys.executable, "-c", f"from GMOPayment.asgi import application; {RESOLVE_URLS}"],
+}
+
+
+def slowest_imports(command: list[str], env: dict[str, str], limit: int) -> list[tuple[int, str]]:
+    """Cumulative import time in microseconds of the slowest top-level imports"""
+    completed = subprocess.run(
+        [command[0], "-X", "importtime", *command[1:]], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not name.startswith("  "):  # top-level imports only
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--importtime", action="store_true", help="show the slowest imports per target")
+    parser.add_argument("--no-store", action="store_true")
+    args = parser.parse_args()
+
+    env = {**os.environ, **gateway_environment()}
+    results = []
+    for name, command in TARGETS.items():
+        samples = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            subprocess.run(command, cwd=ROOT, env=env, capture_output=True, check=True)
+            samples.append((time.perf_counter() - started) * 1000)
+        results.append(RunResult(
+            scenario=name,
+            concurrency=1,
+            requests=len(samples),
+            errors=0,
+            duration_s=sum(samples) / 1000,
+            throughput_rps=0.0,
+            p50_ms=percentile(samples, 50),
+            p95_ms=percentile(samples, 95),
+            p99_ms=percentile(samples, 99),
+            mean_ms=statistics.fmean(samples),
+        ))
+        if args.importtime:
+            print(f"\nSlowest imports for {name}:")
+            for cumulative, module in slowest_imports(command, env, 10):
+                print(f"  {cumulative / 1000:>8.1f} ms  {module}")
+
+    print()
+    print_results(results)
+    if not args.no_store:
+        print(f"Results written to {store_results('startup', results, vars(args))}")
+
+
+if __name__ == "__main__":
+    main()
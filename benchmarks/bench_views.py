@@ -0,0 +1,111 @@
+"""
+End-to-end benchmark of the gateway-bound views against the stub gateway.
+
+Each scenario posts to a real URL through Django's test client, so the
+request passes the middleware stack, the DRF view, the service and
+``GMOHttpClient`` before reaching the stub over localhost.
+
+    python -m benchmarks.bench_views --concurrency 1,4,16,64 --requests 400 --latency lognormal:20:0.5
+"""
+import argparse
+from dataclasses import dataclass
+import itertools
+import threading
+from typing import Any
+
+from benchmarks.harness import configure_django, measure_allocations, print_results, run_concurrent, store_results
+from benchmarks.stub_gateway import EndpointBehaviour, LatencyProfile, StubGateway
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    name: str
+    method: str
+    path: str
+    payload: Any
+
+
+_sequence = itertools.count()
+
+
+def _order_id() -> str:
+    return f"bench-{next(_sequence):012d}"
+
+
+SCENARIOS = [
+    Scenario("credit_charge", "post", "/transactions/credit/charge",
+             lambda: {"order_id": _order_id(), "card_token": "tok-bench"}),
+    Scenario("credit_on_file_charge", "post", "/transactions/credit/on-file/charge",
+             lambda: {"order_id": _order_id(), "member_id": "MEM-bench", "card_id": "card-1"}),
+    Scenario("order_inquiry", "post", "/order/inquiry", lambda: {"access_id": "acc-bench"}),
+    Scenario("order_capture", "post", "/order/capture", lambda: {"access_id": "acc-bench"}),
+    Scenario("order_update", "post", "/order/update", lambda: {"access_id": "acc-bench", "amount": "900"}),
+    Scenario("order_cancel", "post", "/order/cancel", lambda: {"access_id": "acc-bench"}),
+    Scenario("member_create", "post", "/members", lambda: {"member_id": f"m{next(_sequence)}"}),
+    Scenario("member_inquiry", "post", "/members/inquiry", lambda: {"member_id": "MEM-bench"}),
+    Scenario("member_delete", "delete", "/members/delete", lambda: {"member_id": "MEM-bench"}),
+    Scenario("card_details_token", "post", "/card-details/token", lambda: {"card_token": "tok-bench"}),
+    Scenario("create_token", "post", "/create-token", lambda: {
+        "card_number": "4111111111111111",
+        "card_holder_name": "TARO MIHON",
+        "expire_month": "12",
+        "expire_year": "2030",
+        "security_code": "123",
+    }),
+]
+
+
+def make_call(scenario: Scenario):
+    """Return a callable issuing one request with a per-thread test client"""
+    from django.test import Client
+
+    local = threading.local()
+
+    def call() -> bool:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = Client()
+        response = getattr(client, scenario.method)(scenario.path, scenario.payload(), content_type="application/json")
+        return response.status_code < 400
+
+    return call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--latency", default="fixed:2", help="stub latency, distribution:mean_ms[:spread]")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--scenarios", default="", help="comma separated subset of scenario names")
+    parser.add_argument("--alloc-iterations", type=int, default=30)
+    parser.add_argument("--no-store", action="store_true", help="do not write results to benchmarks/results")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    selected = {name for name in args.scenarios.split(",") if name}
+    scenarios = [s for s in SCENARIOS if not selected or s.name in selected]
+
+    behaviour = EndpointBehaviour(LatencyProfile.parse(args.latency), args.error_rate)
+    with StubGateway(default=behaviour, seed=0) as gateway:
+        configure_django(gateway)
+
+        results = []
+        for scenario in scenarios:
+            call = make_call(scenario)
+            peak, blocks = measure_allocations(call, args.alloc_iterations)
+            for level in levels:
+                result = run_concurrent(scenario.name, call, level, args.requests)
+                result.alloc_peak_bytes, result.alloc_blocks = peak, blocks
+                results.append(result)
+
+        print_results(results)
+        print(f"\nGateway requests: {dict(gateway.request_counts)}")
+
+    if not args.no_store:
+        path = store_results("views", results, vars(args))
+        print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compare two stored benchmark runs and flag regressions.
+
+    python -m benchmarks.compare views <base-revision> <head-revision> --threshold 0.10
+
+Exits with status 1 when throughput drops or p99 latency rises by more than
+the threshold for any scenario/concurrency pair present in both runs.
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.harness import RESULTS_DIR
+
+
+def load(suite: str, revision: str) -> dict[tuple[str, int], dict]:
+    document = json.loads((RESULTS_DIR / suite / f"{revision}.json").read_text())
+    return {(r["scenario"], r["concurrency"]): r for r in document["results"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suite")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    base, head = load(args.suite, args.base), load(args.suite, args.head)
+    regressions = 0
+    print(f"{'scenario':<28}{'conc':>6}{'rps base':>11}{'rps head':>11}{'p99 base':>11}{'p99 head':>11}")
+    for key in sorted(base.keys() & head.keys()):
+        old, new = base[key], head[key]
+        slower = new["p99_ms"] > old["p99_ms"] * (1 + args.threshold)
+        weaker = new["throughput_rps"] < old["throughput_rps"] * (1 - args.threshold)
+        flag = "  REGRESSION" if slower or weaker else ""
+        regressions += bool(flag)
+        print(
+            f"{key[0]:<28}{key[1]:>6}{old['throughput_rps']:>11.1f}{new['throughput_rps']:>11.1f}"
+            f"{old['p99_ms']:>11.2f}{new['p99_ms']:>11.2f}{flag}"
+        )
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Shared plumbing for the benchmark suite: Django bootstrap against the stub
+gateway, concurrent load generation, latency statistics and result storage.
+"""
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+from typing import Any
+
+from benchmarks.stub_gateway import StubGateway
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _generate_public_key() -> str:
+    """Return a fresh base64 DER RSA public key for card encryption"""
+    import base64
+
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    der = private_key.public_key().public_bytes(
+        serialization.Encoding.DER,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return base64.b64encode(der).decode()
+
+
+def gateway_environment(gateway: StubGateway | None = None) -> dict[str, str]:
+    """Environment variables pointing the GMO settings at the stub gateway"""
+    base = gateway.api_url if gateway else "http://127.0.0.1:9/api/"
+    oauth = gateway.oauth_url if gateway else "http://127.0.0.1:9/oauth/token"
+    token = gateway.payment_method_token_url if gateway else "http://127.0.0.1:9/token/"
+    return {
+        "SHOP_ID": "bench-shop",
+        "SHOP_PASSWORD": "bench-shop-pass",
+        "SITE_ID": "bench-site",
+        "SITE_PASSWORD": "bench-site-pass",
+        "IS_PRODUCTION": "False",
+        "PROD_API_URL": base,
+        "TEST_API_URL": base,
+        "PROD_OAUTH_URL": oauth,
+        "TEST_OAUTH_URL": oauth,
+        "PROD_PAYMENT_METHOD_TOKEN_URL": token,
+        "TEST_PAYMENT_METHOD_TOKEN_URL": token,
+        "PM_TOKEN_API_KEY": "bench-api-key",
+        "PM_TOKEN_PUBLIC_KEY": os.environ.get("PM_TOKEN_PUBLIC_KEY") or _generate_public_key(),
+        # Keep OAuth tokens per benchmark process instead of sharing them through /tmp across runs
+        "GMO_TOKEN_STORE": os.environ.get("GMO_TOKEN_STORE", "local"),
+        # Benchmarks replay the same client IP and cards far beyond any sane velocity limit
+        "GMO_VELOCITY_ENABLED": os.environ.get("GMO_VELOCITY_ENABLED", "False"),
+        # Load tests measure the views themselves; bench_admission turns shedding back on
+        "GMO_ADMISSION_ENABLED": os.environ.get("GMO_ADMISSION_ENABLED", "False"),
+        # Keep benchmark traffic out of the audit directory; bench_audit writes to a temporary one
+        "GMO_AUDIT_ENABLED": os.environ.get("GMO_AUDIT_ENABLED", "False"),
+        "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "GMOPayment.settings"),
+    }
+
+
+def configure_django(gateway: StubGateway | None = None, database: bool = False) -> None:
+    """Point the GMO settings at the stub gateway and set up Django"""
+    os.environ.update(gateway_environment(gateway))
+
+    import django
+    from django.test.utils import setup_test_environment
+
+    django.setup()
+    setup_test_environment()
+
+    if database:
+        create_database()
+
+
+def create_database() -> None:
+    """Create an in-memory test database with every GMOPayment model"""
+    import importlib
+    import pkgutil
+
+    from django.db import connection
+
+    import GMOPayment.models
+
+    for module in pkgutil.iter_modules(GMOPayment.models.__path__):
+        importlib.import_module(f"GMOPayment.models.{module.name}")
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted sample"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+@dataclass(slots=True)
+class RunResult:
+    """Measurements of one scenario at one concurrency level"""
+
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    duration_s: float
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    alloc_peak_bytes: float = 0.0
+    alloc_blocks: float = 0.0
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+def measure_allocations(call: Callable[[], Any], iterations: int = 50) -> tuple[float, float]:
+    """Return the mean traced peak bytes and net allocated blocks per call"""
+    call()  # warm caches, imports and connections outside the traced window
+    tracemalloc.start()
+    peaks, blocks = [], []
+    try:
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before_size, _ = tracemalloc.get_traced_memory()
+            before_blocks = len(tracemalloc.take_snapshot().traces)
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before_size)
+            blocks.append(len(tracemalloc.take_snapshot().traces) - before_blocks)
+    finally:
+        tracemalloc.stop()
+    return statistics.fmean(peaks), statistics.fmean(blocks)
+
+
+def run_concurrent(
+        scenario: str,
+        call: Callable[[], bool],
+        concurrency: int,
+        total_requests: int,
+) -> RunResult:
+    """Drive ``call`` from ``concurrency`` threads and collect latency statistics
+
+    ``call`` returns ``True`` on success; exceptions are counted as errors.
+    """
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = iter(range(total_requests))
+
+    def worker() -> None:
+        nonlocal errors
+        local_latencies, local_errors = [], 0
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    break
+            start = time.perf_counter()
+            try:
+                ok = call()
+            except Exception:
+                ok = False
+            local_latencies.append(time.perf_counter() - start)
+            local_errors += not ok
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    duration = time.perf_counter() - started
+
+    millis = [latency * 1000 for latency in latencies]
+    return RunResult(
+        scenario=scenario,
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors,
+        duration_s=duration,
+        throughput_rps=len(latencies) / duration if duration else 0.0,
+        p50_ms=percentile(millis, 50),
+        p95_ms=percentile(millis, 95),
+        p99_ms=percentile(millis, 99),
+        mean_ms=statistics.fmean(millis) if millis else 0.0,
+    )
+
+
+def git_revision() -> str:
+    """Short commit hash of the working tree, suffixed with ``-dirty`` if modified"""
+    root = Path(__file__).resolve().parent.parent
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{revision}-dirty" if dirty else revision
+
+
+def store_results(suite: str, results: Iterable[RunResult], config: dict[str, Any] | None = None) -> Path:
+    """Write results to ``benchmarks/results/<suite>/<revision>.json``"""
+    revision = git_revision()
+    path = RESULTS_DIR / suite / f"{revision}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "suite": suite,
+        "revision": revision,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config or {},
+        "results": [asdict(result) for result in results],
+    }
+    path.write_text(json.dumps(document, indent=2))
+    return path
+
+
+def print_results(results: Iterable[RunResult]) -> None:
+    header = f"{'scenario':<28}{'conc':>6}{'reqs':>7}{'err':>6}{'rps':>10}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'peakKiB':>10}{'blocks':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.scenario:<28}{r.concurrency:>6}{r.requests:>7}{r.errors:>6}{r.throughput_rps:>10.1f}"
+            f"{r.p50_ms:>9.2f}{r.p95_ms:>9.2f}{r.p99_ms:>9.2f}{r.alloc_peak_bytes / 1024:>10.1f}{r.alloc_blocks:>8.0f}"
+        )
@@ -0,0 +1,289 @@
+"""
+Local stub of the GMO Payment Gateway used by the benchmark suite.
+
+Serves the OAuth endpoint, the OpenAPI endpoints under ``/api/`` and the
+payment-method token endpoint under ``/token/`` on localhost, with
+configurable latency distributions and error rates per endpoint.
+
+Run standalone with::
+
+    python -m benchmarks.stub_gateway --port 8765 --latency lognormal:20:0.5 --error-rate 0.01
+"""
+import argparse
+from collections import Counter
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import threading
+import time
+from typing import Any
+import uuid
+
+
+@dataclass(frozen=True, slots=True)
+class LatencyProfile:
+    """Latency distribution in milliseconds"""
+
+    distribution: str = "fixed"
+    mean_ms: float = 0.0
+    spread: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyProfile':
+        """Parse ``distribution:mean_ms[:spread]`` (e.g. ``lognormal:20:0.5``)"""
+        distribution, _, rest = spec.partition(":")
+        mean_ms, _, spread = rest.partition(":")
+        return cls(distribution, float(mean_ms or 0), float(spread or 0))
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a delay in seconds"""
+        match self.distribution:
+            case "fixed":
+                delay = self.mean_ms
+            case "uniform":
+                delay = rng.uniform(max(self.mean_ms - self.spread, 0), self.mean_ms + self.spread)
+            case "exponential":
+                delay = rng.expovariate(1 / self.mean_ms) if self.mean_ms else 0.0
+            case "lognormal":
+                delay = rng.lognormvariate(0, self.spread) * self.mean_ms
+            case _:
+                raise ValueError(f"Unknown latency distribution: {self.distribution}")
+        return max(delay, 0.0) / 1000
+
+
+@dataclass(frozen=True, slots=True)
+class EndpointBehaviour:
+    """Latency and failure behaviour of a stubbed endpoint"""
+
+    latency: LatencyProfile = LatencyProfile()
+    error_rate: float = 0.0
+    error_status: int = HTTPStatus.SERVICE_UNAVAILABLE
+
+
+def _card_result() -> dict[str, Any]:
+    return {
+        "cardNumber": "411111******1111",
+        "cardholderName": "TARO MIHON",
+        "expiryMonth": "12",
+        "expiryYear": "30",
+        "issuerCode": "0000000",
+        "brand": "VISA",
+        "domesticFlag": "DOMESTIC",
+        "fundingType": "CREDIT",
+    }
+
+
+def _order(payload: dict[str, Any], status: str = "AUTHORIZED") -> dict[str, Any]:
+    order = payload.get("order") or {}
+    return {
+        "orderId": order.get("orderId", payload.get("orderId", uuid.uuid4().hex[:27])),
+        "accessId": payload.get("accessId", uuid.uuid4().hex),
+        "amount": order.get("amount", payload.get("amount", "1000")),
+        "currency": order.get("currency", "JPY"),
+        "chargeType": "CARD",
+        "orderStatus": status,
+        "transactionType": "MIT",
+        "createdDateTime": "2025-01-01T00:00:00+09:00",
+    }
+
+
+def _charge(payload: dict[str, Any]) -> dict[str, Any]:
+    info = payload.get("creditInformation") or payload.get("creditOnfileInformation") or {}
+    mode = (info.get("creditChargeOptions") or {}).get("authorizationMode", "AUTH")
+    return {
+        "order": _order(payload, "CAPTURED" if mode == "CAPTURE" else "AUTHORIZED"),
+        "creditResult": {
+            "authorizationMode": mode,
+            "approvalCode": "123456",
+            "processedDateTime": "2025-01-01T00:00:00+09:00",
+            "forwarded": "2a99662",
+            "cardResult": _card_result(),
+        },
+    }
+
+
+ROUTES: dict[str, Any] = {
+    "/oauth/token": lambda payload: {"access_token": uuid.uuid4().hex, "token_type": "Bearer", "expires_in": 3600},
+    "/api/credit/charge": _charge,
+    "/api/credit/on-file/charge": _charge,
+    "/api/credit/verifyCard": lambda payload: {"cardResult": _card_result()},
+    "/api/credit/storeCard": lambda payload: {
+        "onfileCard": {
+            "memberId": ((payload.get("creditStoringInformation") or {}).get("onfileCardOptions") or {}).get("memberId"),
+            "type": "CREDIT_CARD",
+            "cardId": uuid.uuid4().hex[:10],
+        },
+        "cardResult": _card_result(),
+    },
+    "/api/credit/getCardDetails": lambda payload: {"cardDetails": [_card_result()]},
+    "/api/tds2/finalizeCharge": _charge,
+    "/api/order/inquiry": lambda payload: {"order": _order(payload)},
+    "/api/order/capture": lambda payload: {"order": _order(payload, "CAPTURED")},
+    "/api/order/update": lambda payload: {"order": _order(payload, "CAPTURED")},
+    "/api/order/cancel": lambda payload: {"order": _order(payload, "CANCELED")},
+    "/api/member/create": lambda payload: {"memberId": payload.get("memberId"), "memberName": payload.get("memberName")},
+    "/api/member/inquiry": lambda payload: {"memberId": payload.get("memberId"), "memberName": "Taro Mihon"},
+    "/api/member/delete": lambda payload: {"memberId": payload.get("memberId")},
+    "/token/payment/CreateToken.json": lambda payload: {
+        "tokenObject": {
+            "token": [uuid.uuid4().hex],
+            "maskedCardNumber": "411111******1111",
+            "isSecurityCodeSet": True,
+        }
+    },
+}
+
+
+class StubGateway:
+    """Threaded HTTP server that imitates the GMO Payment Gateway"""
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            default: EndpointBehaviour | None = None,
+            overrides: dict[str, EndpointBehaviour] | None = None,
+            seed: int | None = None,
+            track_members: bool = False,
+    ):
+        self.default = default or EndpointBehaviour()
+        self.overrides = overrides or {}
+        self.request_counts: Counter[str] = Counter()
+        # With track_members, member inquiry and delete answer 404 for ids never created,
+        # and creating an id that exists answers 400
+        self.members: set[str] | None = set() if track_members else None
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/api/"
+
+    @property
+    def oauth_url(self) -> str:
+        return f"{self.base_url}/oauth/token"
+
+    @property
+    def payment_method_token_url(self) -> str:
+        return f"{self.base_url}/token/"
+
+    def behaviour_for(self, path: str) -> EndpointBehaviour:
+        """Return the behaviour configured for a path (``/api/`` prefix optional)"""
+        return self.overrides.get(path) or self.overrides.get(path.removeprefix("/api/")) or self.default
+
+    def _draw(self, behaviour: EndpointBehaviour) -> tuple[float, bool]:
+        with self._lock:
+            return behaviour.latency.sample(self._rng), self._rng.random() < behaviour.error_rate
+
+    def respond(self, path: str, payload: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        """Status and body for a routed request"""
+        if self.members is not None and path.startswith("/api/member/"):
+            member_id = payload.get("memberId")
+            with self._lock:
+                if path == "/api/member/create":
+                    if member_id in self.members:
+                        return HTTPStatus.BAD_REQUEST, {"title": "duplicate_member", "message": f"Member {member_id} already exists"}
+                    self.members.add(member_id)
+                elif member_id not in self.members:
+                    return HTTPStatus.NOT_FOUND, {"title": "not_found", "message": f"Member {member_id} not found"}
+                elif path == "/api/member/delete":
+                    self.members.discard(member_id)
+        return HTTPStatus.OK, ROUTES[path](payload)
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _send(self, status: int, body: dict[str, Any]) -> None:
+                encoded = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def do_POST(self) -> None:
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                path = self.path.split("?", 1)[0]
+                with gateway._lock:
+                    gateway.request_counts[path] += 1
+
+                if path not in ROUTES:
+                    self._send(HTTPStatus.NOT_FOUND, {"title": "not_found", "message": path})
+                    return
+
+                behaviour = gateway.behaviour_for(path)
+                delay, fail = gateway._draw(behaviour)
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self._send(behaviour.error_status, {"title": "stub_error", "message": "Injected failure"})
+                    return
+
+                try:
+                    payload = json.loads(raw) if raw and self.headers.get_content_type() == "application/json" else {}
+                except ValueError:
+                    payload = {}
+                self._send(*gateway.respond(path, payload))
+
+            do_GET = do_POST
+            do_HEAD = do_POST
+
+        return Handler
+
+    def start(self) -> 'StubGateway':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="gmo-stub-gateway", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'StubGateway':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0", help="distribution:mean_ms[:spread]")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=HTTPStatus.SERVICE_UNAVAILABLE)
+    args = parser.parse_args()
+
+    behaviour = EndpointBehaviour(LatencyProfile.parse(args.latency), args.error_rate, args.error_status)
+    gateway = StubGateway(args.host, args.port, default=behaviour)
+    print(f"Stub GMO gateway listening on {gateway.base_url}")
+    try:
+        gateway._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from collections.abc import Iterator
+
+import pytest
+
+from GMOPayment.gmo_client import GMOHttpClient
+from GMOPayment.tokens import LocalTokenStore
+from benchmarks.stub_gateway import StubGateway
+
+
+@pytest.fixture
+def stub_gateway() -> Iterator[StubGateway]:
+    with StubGateway(track_members=True) as gateway:
+        yield gateway
+
+
+@pytest.fixture
+def gmo_client(stub_gateway: StubGateway, settings, monkeypatch: pytest.MonkeyPatch) -> GMOHttpClient:
+    """A client talking to the stub gateway, also returned by ``get_shared_client``"""
+    settings.GMO_PAYMENT = {
+        **settings.GMO_PAYMENT,
+        "test_api_url": stub_gateway.api_url,
+        "test_oauth_url": stub_gateway.oauth_url,
+        "test_payment_method_token_url": stub_gateway.payment_method_token_url,
+    }
+    client = GMOHttpClient(max_retries=0, token_store=LocalTokenStore())
+    monkeypatch.setattr("GMOPayment.gmo_client._shared_client", client)
+    return client
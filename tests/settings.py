@@ -0,0 +1,17 @@
+"""
+Settings for the test suite: the project settings with the gateway pointed at
+an unreachable placeholder, so nothing talks to GMO unless a test starts the
+stub gateway (see ``conftest.stub_gateway``). Variables already set win.
+"""
+import os
+
+from benchmarks.harness import gateway_environment
+
+
+for name, value in gateway_environment().items():
+    os.environ.setdefault(name, value)
+# Tests run in one process; keep tokens, velocity counters and audit segments out of shared paths
+os.environ.setdefault("GMO_TOKEN_STORE", "local")
+os.environ.setdefault("GMO_AUDIT_ENABLED", "False")
+
+from GMOPayment.settings import *  # noqa: E402, F403
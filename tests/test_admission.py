@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from GMOPayment.admission import AdmissionGroup, Priority
+
+
+def test_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        AdmissionGroup("transactions", 0)
+
+
+def test_admits_up_to_concurrency_then_sheds_without_a_queue():
+    group = AdmissionGroup("transactions", 2)
+    assert group.acquire() and group.acquire()
+    assert not group.acquire(Priority.SETTLE)
+    assert group.running == 2
+    group.release()
+    assert group.running == 1
+    assert group.acquire()
+
+
+def test_release_hands_the_slot_to_a_waiting_thread():
+    group = AdmissionGroup("transactions", 1, queue=1, max_wait=5)
+    assert group.acquire()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(group.acquire()))
+    waiter.start()
+    while group.waiting == 0:
+        time.sleep(0.001)
+    group.release()
+    waiter.join(5)
+    assert result == [True]
+    assert group.running == 1
+    assert group.waiting == 0
+
+
+def test_waiter_is_shed_after_max_wait():
+    group = AdmissionGroup("transactions", 1, queue=1, max_wait=0.05)
+    assert group.acquire()
+    assert not group.acquire()
+    assert group.waiting == 0
+    assert group.running == 1
+
+
+async def _queue(group: AdmissionGroup, priority: int) -> asyncio.Task:
+    task = asyncio.create_task(group.acquire_async(priority))
+    # Queueing happens before the first await, so one pass of the loop enqueues it
+    await asyncio.sleep(0)
+    return task
+
+
+def test_waiters_are_admitted_in_priority_order():
+    async def scenario():
+        group = AdmissionGroup("transactions", 1, queue=3, max_wait=5)
+        assert await group.acquire_async()
+        new = await _queue(group, Priority.NEW)
+        read = await _queue(group, Priority.READ)
+        settle = await _queue(group, Priority.SETTLE)
+        order = []
+        for _ in range(3):
+            group.release()
+            done, _ = await asyncio.wait({new, read, settle} - set(order), return_when=asyncio.FIRST_COMPLETED)
+            assert len(done) == 1
+            order.extend(done)
+        assert order == [settle, read, new]
+        assert all(task.result() for task in order)
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_displaces_the_lowest_priority_waiter():
+    async def scenario():
+        group = AdmissionGroup("transactions", 1, queue=1, max_wait=5)
+        assert await group.acquire_async()
+        new = await _queue(group, Priority.NEW)
+        settle = await _queue(group, Priority.SETTLE)
+        assert await new is False
+        assert group.waiting == 1
+        # An equal or lower priority does not displace anyone
+        assert await group.acquire_async(Priority.SETTLE) is False
+        group.release()
+        assert await settle is True
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        group = AdmissionGroup("transactions", 1, queue=1, max_wait=5)
+        assert await group.acquire_async()
+        task = await _queue(group, Priority.NEW)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert group.waiting == 0
+        group.release()
+        assert group.running == 0
+
+    asyncio.run(scenario())
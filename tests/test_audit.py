@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+
+from GMOPayment.audit import AuditLog, AuditPolicy, AuditReader
+from GMOPayment.exceptions import GMOAPIException
+from GMOPayment.gmo_client import GMOHttpClient
+from GMOPayment.tokens import LocalTokenStore
+from benchmarks.stub_gateway import EndpointBehaviour
+
+
+def test_queue_size_comes_from_settings(settings):
+    settings.GMO_PAYMENT = {**settings.GMO_PAYMENT, "audit_queue_size": 12}
+    policy = AuditPolicy.from_settings()
+    assert policy.queue_size == 12
+    assert AuditLog(policy).queue.maxsize == 12
+
+
+def test_attempts_retried_inside_urllib3_are_audited(gmo_client, stub_gateway, tmp_path: Path):
+    stub_gateway.overrides["/api/order/inquiry"] = EndpointBehaviour(error_rate=1.0, error_status=503)
+    log = AuditLog(AuditPolicy(path=tmp_path, flush_interval=0.01))
+    client = GMOHttpClient(max_retries=2, token_store=LocalTokenStore(), audit_log=log)
+
+    with pytest.raises(GMOAPIException):
+        client.post("order/inquiry", {"accessId": "access-1"})
+    assert log.flush()
+    log.stop()
+
+    records = list(AuditReader(tmp_path).find("access-1"))
+    assert stub_gateway.request_counts["/api/order/inquiry"] == 3
+    assert [record["status"] for record in records] == [503, 503, 503]
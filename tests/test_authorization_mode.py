@@ -0,0 +1,26 @@
+import pytest
+
+from GMOPayment.exceptions import GMOValidationError
+from GMOPayment.models.merchant import Merchant
+from GMOPayment.services.transaction import resolve_authorization_mode
+
+
+@pytest.mark.parametrize("mode", [["AUTH"], {"mode": "AUTH"}, 1, 0, True, "VOID"])
+def test_invalid_modes_are_validation_errors(mode):
+    with pytest.raises(GMOValidationError):
+        resolve_authorization_mode(mode)
+
+
+def test_mode_is_case_insensitive_and_defaults_from_settings(settings):
+    assert resolve_authorization_mode("capture") == "CAPTURE"
+    settings.GMO_PAYMENT = {**settings.GMO_PAYMENT, "authorization_mode": "capture"}
+    assert resolve_authorization_mode(None) == "CAPTURE"
+
+
+@pytest.mark.django_db
+def test_merchant_default_applies_when_no_mode_is_requested():
+    Merchant.objects.create(
+        merchant_id="shop-1", name="Shop", site_id="s", shop_id="s", shop_password="p", authorization_mode="CAPTURE"
+    )
+    assert resolve_authorization_mode("", "shop-1") == "CAPTURE"
+    assert resolve_authorization_mode("AUTH", "shop-1") == "AUTH"
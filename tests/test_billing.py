@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from GMOPayment.billing import BillingScheduler, add_months, advance
+from GMOPayment.endpoints import EndpointFamily
+from GMOPayment.models.billing import BillingSchedule
+from GMOPayment.models.member import Member
+from GMOPayment.models.payment_method import PaymentMethod
+from GMOPayment.models.transaction import Transaction
+from GMOPayment.services.transaction import GMOTransactionService
+from GMOPayment.timeouts import TimeoutPolicy
+from benchmarks.stub_gateway import EndpointBehaviour, LatencyProfile
+
+
+JAN_1 = datetime(2025, 1, 1, 10, 0, tzinfo=timezone.utc)
+CHARGE = "/api/credit/on-file/charge"
+INQUIRY = "/api/order/inquiry"
+
+
+def test_add_months_clamps_to_month_end():
+    assert add_months(datetime(2025, 1, 31), 1) == datetime(2025, 2, 28)
+    assert add_months(datetime(2024, 1, 31), 1) == datetime(2024, 2, 29)
+    assert add_months(datetime(2025, 11, 30), 3) == datetime(2026, 2, 28)
+    assert advance(datetime(2025, 1, 1), "YEAR", 2) == datetime(2027, 1, 1)
+
+
+@pytest.fixture
+def scheduler(gmo_client) -> BillingScheduler:
+    return BillingScheduler(service=GMOTransactionService(client=gmo_client), concurrency=2)
+
+
+def make_schedule(member_id: str = "member-1", **fields) -> BillingSchedule:
+    member = Member.objects.create(member_id=member_id)
+    PaymentMethod.objects.create(member=member, card_no="4111111111111111", expire="3012", card_id="card-1", is_default=True)
+    return BillingSchedule.objects.create(member=member, amount=1000, next_run_at=JAN_1, **fields)
+
+
+def fail_charges(stub_gateway) -> None:
+    stub_gateway.overrides[CHARGE] = EndpointBehaviour(error_rate=1.0, error_status=402)
+
+
+@pytest.mark.django_db
+def test_retried_charge_keeps_the_billing_date(scheduler, stub_gateway):
+    schedule = make_schedule()
+
+    fail_charges(stub_gateway)
+    stats = scheduler.run_once(JAN_1 + timedelta(minutes=5))
+    assert (stats.succeeded, stats.failed) == (0, 1)
+    schedule.refresh_from_db()
+    assert schedule.next_run_at == JAN_1 + timedelta(minutes=5, hours=1)
+    assert schedule.scheduled_at == JAN_1
+
+    del stub_gateway.overrides[CHARGE]
+    stats = scheduler.run_once(JAN_1 + timedelta(hours=2))
+    assert stats.succeeded == 1
+    schedule.refresh_from_db()
+    assert schedule.next_run_at == datetime(2025, 2, 1, 10, 0, tzinfo=timezone.utc)
+    assert schedule.scheduled_at is None
+    assert schedule.failure_count == 0
+    assert list(Transaction.objects.order_by("id").values_list("order_id", "status")) == [
+        (f"SUB{schedule.id}-202501011000-0", "FAILED"),
+        (f"SUB{schedule.id}-202501011000-1", "SUCCESS"),
+    ]
+
+
+@pytest.mark.django_db
+def test_resumed_claim_records_the_order_gmo_already_charged(scheduler, stub_gateway):
+    schedule = make_schedule(claimed_until=JAN_1, pending_order_id="SUB-crashed-0")
+
+    stats = scheduler.run_once(JAN_1 + timedelta(minutes=30))
+
+    assert stats.succeeded == 1
+    assert stub_gateway.request_counts[INQUIRY] == 1
+    assert stub_gateway.request_counts[CHARGE] == 0
+    assert Transaction.objects.get().order_id == "SUB-crashed-0"
+    schedule.refresh_from_db()
+    assert schedule.pending_order_id is None
+    assert schedule.claimed_until is None
+
+
+@pytest.mark.django_db
+def test_resumed_claim_charges_an_order_gmo_never_saw(scheduler, stub_gateway):
+    make_schedule(claimed_until=JAN_1, pending_order_id="SUB-crashed-0")
+    stub_gateway.overrides[INQUIRY] = EndpointBehaviour(error_rate=1.0, error_status=404)
+
+    stats = scheduler.run_once(JAN_1 + timedelta(minutes=30))
+
+    assert stats.succeeded == 1
+    assert stub_gateway.request_counts[CHARGE] == 1
+    assert Transaction.objects.get().order_id == "SUB-crashed-0"
+
+
+@pytest.mark.django_db
+def test_unresolved_inquiry_leaves_the_order_pending(scheduler, stub_gateway):
+    schedule = make_schedule(claimed_until=JAN_1, pending_order_id="SUB-crashed-0")
+    stub_gateway.overrides[INQUIRY] = EndpointBehaviour(error_rate=1.0)
+
+    stats = scheduler.run_once(JAN_1 + timedelta(minutes=30))
+
+    assert (stats.succeeded, stats.failed, stats.deferred) == (0, 0, 1)
+    assert stub_gateway.request_counts[CHARGE] == 0
+    schedule.refresh_from_db()
+    assert schedule.pending_order_id == "SUB-crashed-0"
+    assert schedule.claimed_until is None
+    assert schedule.failure_count == 0
+
+
+@pytest.mark.django_db
+def test_record_error_defers_one_charge_and_releases_its_claim(scheduler):
+    broken = make_schedule("member-1")
+    healthy = make_schedule("member-2")
+    Transaction.objects.create(
+        order_id=f"SUB{broken.id}-202501011000-0", access_id="", access_pass="", amount=1, job_cd="AUTH"
+    )
+
+    stats = scheduler.run_once(JAN_1 + timedelta(minutes=5))
+
+    assert (stats.claimed, stats.succeeded, stats.deferred) == (2, 1, 1)
+    broken.refresh_from_db()
+    healthy.refresh_from_db()
+    assert broken.claimed_until is None
+    assert broken.pending_order_id == f"SUB{broken.id}-202501011000-0"
+    assert healthy.next_run_at == datetime(2025, 2, 1, 10, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.django_db
+def test_unanswered_charge_is_inquired_before_charging_again(scheduler, stub_gateway, monkeypatch):
+    schedule = make_schedule()
+    timeouts = TimeoutPolicy(timeouts={family: (1.0, 0.05) for family in EndpointFamily})
+    monkeypatch.setattr(scheduler.service.client, "timeout_policy", timeouts)
+    stub_gateway.overrides[CHARGE] = EndpointBehaviour(latency=LatencyProfile.parse("fixed:500"))
+
+    stats = scheduler.run_once(JAN_1 + timedelta(minutes=5))
+    assert (stats.failed, stats.deferred) == (0, 1)
+    schedule.refresh_from_db()
+    assert schedule.pending_order_id == f"SUB{schedule.id}-202501011000-0"
+    assert schedule.failure_count == 0
+
+    del stub_gateway.overrides[CHARGE]
+    stats = scheduler.run_once(JAN_1 + timedelta(minutes=10))
+    assert stats.succeeded == 1
+    assert stub_gateway.request_counts[INQUIRY] == 1
+    assert stub_gateway.request_counts[CHARGE] == 1
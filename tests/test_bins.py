@@ -0,0 +1,66 @@
+from GMOPayment.bins import BinIndex, BinRange, build_index, card_key, flatten, prefix_key
+
+
+def test_flatten_lets_the_narrowest_range_win():
+    broad = BinRange(100, 199, "VISA", "Broad Bank")
+    narrow = BinRange(120, 129, "VISA", "Narrow Bank")
+    assert flatten([narrow, broad]) == [
+        BinRange(100, 119, "VISA", "Broad Bank"),
+        BinRange(120, 129, "VISA", "Narrow Bank"),
+        BinRange(130, 199, "VISA", "Broad Bank"),
+    ]
+
+
+def test_flatten_merges_adjacent_ranges_with_the_same_owner():
+    assert flatten([BinRange(100, 109, "MC", "Bank"), BinRange(110, 119, "MC", "Bank")]) == [
+        BinRange(100, 119, "MC", "Bank"),
+    ]
+
+
+def test_flatten_keeps_gaps_and_partial_overlaps():
+    flat = flatten([
+        BinRange(100, 149, "JCB", "First"),
+        BinRange(140, 159, "JCB", "Second"),
+        BinRange(200, 209, "AMEX", "Third"),
+    ])
+    assert flat == [
+        BinRange(100, 139, "JCB", "First"),
+        BinRange(140, 159, "JCB", "Second"),
+        BinRange(200, 209, "AMEX", "Third"),
+    ]
+
+
+def test_flatten_nested_ranges_fall_back_to_the_enclosing_one():
+    flat = flatten([
+        BinRange(0, 999, "VISA", "Outer"),
+        BinRange(100, 199, "VISA", "Middle"),
+        BinRange(150, 159, "VISA", "Inner"),
+    ])
+    assert flat == [
+        BinRange(0, 99, "VISA", "Outer"),
+        BinRange(100, 149, "VISA", "Middle"),
+        BinRange(150, 159, "VISA", "Inner"),
+        BinRange(160, 199, "VISA", "Middle"),
+        BinRange(200, 999, "VISA", "Outer"),
+    ]
+
+
+def test_card_key_handles_masked_and_formatted_numbers():
+    assert card_key("4111111111111111") == 411111111111
+    assert card_key("411111******1111") == prefix_key("411111")
+    assert card_key("4111 1111 1111 1111") == 411111111111
+    assert card_key("****") is None
+
+
+def test_index_lookup_round_trip(tmp_path):
+    path = tmp_path / "bins.bin"
+    count = build_index([
+        BinRange(prefix_key("4"), prefix_key("4", "9"), "VISA", ""),
+        BinRange(prefix_key("411111"), prefix_key("411111", "9"), "VISA", "Test Bank"),
+    ], path)
+    index = BinIndex(path)
+    assert count == len(index) == 3
+    assert index.lookup("4111111111111111").issuer == "Test Bank"
+    assert index.lookup("4242424242424242").brand == "VISA"
+    assert index.lookup("4242424242424242").issuer is None
+    assert index.lookup("5555555555554444") is None
@@ -0,0 +1,135 @@
+from datetime import date
+
+import pytest
+
+from GMOPayment import bins
+from GMOPayment.cards import CardInput, detect_brand, luhn_valid, require_batch, validate_card
+from GMOPayment.exceptions import GMOValidationError
+
+TODAY = date(2026, 5, 15)
+
+
+@pytest.fixture(autouse=True)
+def no_bin_index(monkeypatch):
+    # Brands come from the IIN prefixes only, whatever index the checkout has installed
+    monkeypatch.setattr(bins, "get_index", lambda: None)
+
+
+def card(number="4111111111111111", month="12", year="30", security_code=None) -> CardInput:
+    return CardInput(number, "TARO YAMADA", month, year, security_code)
+
+
+def field_errors(card_input: CardInput, today: date = TODAY) -> dict:
+    with pytest.raises(GMOValidationError) as error:
+        validate_card(card_input, today)
+    return error.value.detail
+
+
+@pytest.mark.parametrize("number", ["4111111111111111", "378282246310005", "5555555555554444", "0", "79927398713"])
+def test_luhn_accepts_valid_numbers(number):
+    assert luhn_valid(number)
+
+
+@pytest.mark.parametrize("number", ["4111111111111112", "378282246310006", "79927398710", "1"])
+def test_luhn_rejects_invalid_numbers(number):
+    assert not luhn_valid(number)
+
+
+@pytest.mark.parametrize(("number", "brand"), [
+    ("4111111111111111", "VISA"),
+    ("378282246310005", "AMEX"),
+    ("5555555555554444", "MC"),
+    ("2223003122003222", "MC"),
+    ("3530111333300000", "JCB"),
+    ("30569309025904", "DINERS"),
+    ("6011111111111117", "DISC"),
+    ("9999999999999995", None),
+])
+def test_detect_brand_by_iin_prefix(number, brand):
+    rule = detect_brand(number)
+    assert (rule.code if rule else None) == brand
+
+
+def test_bin_index_brand_takes_precedence():
+    assert detect_brand("4111111111111111", bins.BinInfo("JCB", "Issuer")).code == "JCB"
+
+
+def test_valid_card_is_normalized():
+    valid = validate_card(card("4111 1111-1111 1111", security_code=" 123 "), TODAY)
+    assert valid.card_number == "4111111111111111"
+    assert valid.brand == "VISA"
+    assert valid.security_code == "123"
+
+
+def test_length_must_match_the_brand():
+    errors = field_errors(card("555555555555444"))
+    assert errors["card_number"] == ["Card number length must be one of 16 for MC."]
+
+
+def test_unknown_brand_gets_generic_lengths():
+    errors = field_errors(card("99999999999"))
+    assert errors["card_number"] == ["Card number length must be one of 12, 13, 14, 15, 16, 17, 18, 19 for this card."]
+
+
+def test_luhn_failure_is_reported_after_length():
+    assert field_errors(card("4111111111111112"))["card_number"] == ["Card number is invalid."]
+
+
+def test_amex_needs_a_four_digit_security_code():
+    assert validate_card(card("378282246310005", security_code="1234"), TODAY).brand == "AMEX"
+    errors = field_errors(card("378282246310005", security_code="123"))
+    assert errors["security_code"] == ["Security code must be 4 digits."]
+
+
+def test_card_is_valid_through_its_expiry_month():
+    assert validate_card(card(month="05", year="26"), TODAY).expire_year == "26"
+    assert validate_card(card(month="05", year="2026"), TODAY).expire_year == "2026"
+
+
+def test_card_before_the_current_month_has_expired():
+    assert field_errors(card(month="04", year="26"))["expire_year"] == ["Card has expired."]
+
+
+def test_two_digit_year_is_read_in_the_current_century():
+    assert field_errors(card(month="12", year="00"), date(2099, 1, 1))["expire_year"] == ["Card has expired."]
+    assert validate_card(card(month="01", year="99"), date(2099, 1, 1)).expire_year == "99"
+
+
+@pytest.mark.parametrize(("month", "year", "field"), [
+    ("13", "30", "expire_month"),
+    ("00", "30", "expire_month"),
+    ("12", "030", "expire_year"),
+    ("12", "", "expire_year"),
+])
+def test_malformed_expiry_fields(month, year, field):
+    assert field in field_errors(card(month=month, year=year))
+
+
+def test_require_batch_returns_cards_in_input_order():
+    valid = require_batch([card("5555555555554444"), card("4111111111111111")], TODAY)
+    assert [item.card_number for item in valid] == ["5555555555554444", "4111111111111111"]
+
+
+def test_require_batch_keys_errors_by_input_position():
+    batch = [card(), card("4111111111111112"), card(), card(month="01", year="26")]
+    with pytest.raises(GMOValidationError) as error:
+        require_batch(batch, TODAY)
+    assert set(error.value.detail) == {"1", "3"}
+    assert error.value.detail["1"]["card_number"] == ["Card number is invalid."]
+    assert error.value.detail["3"]["expire_year"] == ["Card has expired."]
+
+
+@pytest.mark.parametrize("field", ["card_number", "expire_month", "expire_year", "security_code"])
+@pytest.mark.parametrize("value", [4111111111111111, 12, ["12"], {"value": "12"}])
+def test_non_string_fields_are_field_errors(field, value):
+    fields = {"card_number": "4111111111111111", "expire_month": "12", "expire_year": "30", "security_code": "123"}
+    errors = field_errors(CardInput(card_holder_name="TARO YAMADA", **{**fields, field: value}))
+    assert errors == {field: ["Not a valid string."]}
+
+
+def test_create_token_rejects_a_numeric_card_number_and_expiry(client):
+    response = client.post("/create-token", {
+        "card_number": 4111111111111111, "card_holder_name": "TARO YAMADA", "expire_month": 12, "expire_year": 30,
+    }, content_type="application/json")
+    assert response.status_code == 400
+    assert set(response.json()) == {"card_number", "expire_month", "expire_year"}
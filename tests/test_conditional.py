@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.http import http_date
+import pytest
+
+from GMOPayment.models.merchant import Merchant
+
+pytestmark = pytest.mark.django_db
+
+
+def merchant(merchant_id: str) -> Merchant:
+    return Merchant.objects.create(
+        merchant_id=merchant_id, name=merchant_id, site_id="site", shop_id="shop", shop_password="secret",
+    )
+
+
+def test_matching_etag_answers_not_modified(client):
+    merchant("M-00001")
+    first = client.get("/merchants")
+    assert first.status_code == 200
+
+    again = client.get("/merchants", HTTP_IF_NONE_MATCH=first["ETag"])
+    assert again.status_code == 304
+    assert again["ETag"] == first["ETag"]
+
+
+def test_change_within_the_same_second_is_not_hidden_by_if_modified_since(client):
+    record = merchant("M-00001")
+    first = client.get("/merchants")
+
+    # Same wall-clock second as the client's copy, so Last-Modified is unchanged
+    Merchant.objects.filter(pk=record.pk).update(name="Renamed", updated_at=record.updated_at + timedelta(microseconds=1))
+    since = http_date(int(timezone.now().timestamp()) + 60)
+    again = client.get("/merchants", HTTP_IF_MODIFIED_SINCE=since)
+    assert again.status_code == 200
+    assert again["ETag"] != first["ETag"]
+
+
+def test_stale_etag_returns_the_list(client):
+    merchant("M-00001")
+    first = client.get("/merchants")
+    merchant("M-00002")
+
+    again = client.get("/merchants", HTTP_IF_NONE_MATCH=first["ETag"])
+    assert again.status_code == 200
+    assert len(again.json()) == 2
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from GMOPayment.deadline import Deadline, DeadlineTimeout, deadline_scope
+from GMOPayment.endpoints import EndpointFamily
+from GMOPayment.exceptions import GMODeadlineExceeded
+from GMOPayment.gmo_client import GMOHttpClient
+from GMOPayment.timeouts import TimeoutPolicy
+from GMOPayment.tokens import LocalTokenStore
+from benchmarks.stub_gateway import EndpointBehaviour, LatencyProfile
+
+
+def test_deadline_timeout_is_capped_when_each_attempt_starts():
+    deadline = Deadline.after(0.2)
+    timeout = DeadlineTimeout(deadline, 3.05, 10.0)
+    assert timeout.clone().read_timeout == pytest.approx(0.2, abs=0.05)
+    time.sleep(0.1)
+    assert timeout.clone().read_timeout == pytest.approx(0.1, abs=0.05)
+    time.sleep(0.15)
+    assert timeout.clone().read_timeout > 0
+
+
+def test_retries_stop_at_the_request_deadline(gmo_client, stub_gateway):
+    stub_gateway.overrides["/api/order/inquiry"] = EndpointBehaviour(latency=LatencyProfile.parse("fixed:1200"))
+    client = GMOHttpClient(
+        max_retries=3,
+        token_store=LocalTokenStore(),
+        timeout_policy=TimeoutPolicy(timeouts={family: (1.0, 1.0) for family in EndpointFamily}),
+    )
+
+    started = time.monotonic()
+    with deadline_scope(1.5), pytest.raises(GMODeadlineExceeded):
+        client.post("order/inquiry", {"accessId": "access-1"})
+
+    # One full attempt, then a retry cut down to what was left of the deadline
+    assert time.monotonic() - started < 1.8
+    assert stub_gateway.request_counts["/api/order/inquiry"] == 2
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+import pytest
+from rest_framework.test import APIClient
+
+from GMOPayment.hedging import HedgePolicy, Hedger
+
+
+class FakeResponse:
+    def __init__(self, name: str):
+        self.name = name
+
+    def close(self) -> None:
+        pass
+
+
+def test_reads_run_on_the_caller_while_the_pool_is_busy():
+    hedger = Hedger(HedgePolicy(enabled=True, delay=1.0, max_workers=1))
+    release = threading.Event()
+    threads = []
+
+    def slow_send():
+        threads.append(threading.current_thread().name)
+        release.wait(2)
+        return FakeResponse("slow")
+
+    def fast_send():
+        threads.append(threading.current_thread().name)
+        return FakeResponse("fast")
+
+    blocker = threading.Thread(target=hedger.execute, args=("order/inquiry", slow_send))
+    blocker.start()
+    time.sleep(0.05)
+    try:
+        started = time.monotonic()
+        assert hedger.execute("order/inquiry", fast_send).name == "fast"
+        assert time.monotonic() - started < 0.5
+        assert threads[1] == threading.current_thread().name
+    finally:
+        release.set()
+        blocker.join()
+
+
+def test_slow_reads_are_hedged():
+    hedger = Hedger(HedgePolicy(enabled=True, delay=0.05, max_workers=4))
+    calls = []
+
+    def send():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return FakeResponse("primary")
+        return FakeResponse("hedge")
+
+    assert hedger.execute("order/inquiry", send).name == "hedge"
+    assert len(calls) == 2
+
+
+@pytest.mark.django_db
+def test_metrics_need_staff_or_the_metrics_token(settings):
+    client = APIClient()
+    assert client.get("/health/metrics").status_code in (401, 403)
+
+    settings.GMO_PAYMENT = {**settings.GMO_PAYMENT, "metrics_token": "scrape"}
+    assert client.get("/health/metrics", HTTP_X_METRICS_TOKEN="wrong").status_code in (401, 403)
+    assert client.get("/health/metrics", HTTP_X_METRICS_TOKEN="scrape").status_code == 200
+
+    client.force_authenticate(User.objects.create(username="ops", is_staff=True))
+    assert client.get("/health/metrics").status_code == 200
@@ -0,0 +1,55 @@
+import logging
+import threading
+
+from GMOPayment.log import GMOQueueHandler, MaskingFilter
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+        self.addFilter(MaskingFilter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def log_record(msg, args=(), **extra) -> logging.LogRecord:
+    record = logging.LogRecord("GMOPayment.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_queued_record_keeps_arguments_as_they_were_at_the_log_call():
+    payload = {"orderId": "ORDER-1", "cardNumber": "4111111111111111"}
+    record = GMOQueueHandler(handlers=[]).prepare(log_record("request %s", (payload,), body={"status": "pending"}))
+    payload["orderId"] = "ORDER-2"
+    capture = Capture()
+    capture.handle(record)
+
+    message = capture.records[0].getMessage()
+    assert "ORDER-1" in message
+    assert "4111111111111111" not in message
+    assert capture.records[0].body == {"status": "pending"}
+
+
+def test_uncopyable_arguments_are_rendered_at_the_log_call():
+    lock = threading.Lock()
+    record = GMOQueueHandler(handlers=[]).prepare(log_record("holding %r", (lock,)))
+    assert record.args is None
+    assert record.msg == f"holding {lock!r}"
+
+
+def test_listener_masks_and_delivers_records():
+    capture = Capture()
+    capture.name = "test_log_capture"
+    handler = GMOQueueHandler(handlers=["test_log_capture"])
+    payload = {"cardNumber": "4111111111111111", "status": "pending"}
+    try:
+        handler.handle(log_record("saved %s", (payload,)))
+        payload["status"] = "done"
+    finally:
+        handler.stop()
+    message = capture.records[0].getMessage()
+    assert "pending" in message
+    assert "4111111111111111" not in message
@@ -0,0 +1,58 @@
+from http import HTTPStatus
+from pathlib import Path
+
+from django.core.management import call_command
+import pytest
+
+from benchmarks.stub_gateway import EndpointBehaviour
+from GMOPayment.models.member import Member
+from GMOPayment.services.member import gateway_member_id
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_purge_deletes_members_import_created(gmo_client, stub_gateway, tmp_path: Path):
+    members = tmp_path / "members.csv"
+    members.write_text("member_id,name\nalice01,Alice\nbob0002,Bob\n")
+
+    call_command("import_members", members)
+    assert stub_gateway.members == {gateway_member_id("alice01"), gateway_member_id("bob0002")}
+    assert Member.objects.count() == 2
+
+    call_command("purge_members", members)
+    assert stub_gateway.members == set()
+    assert not Member.objects.exists()
+    assert stub_gateway.request_counts["/api/member/delete"] == 2
+
+
+def test_resume_keeps_members_created_on_gmo_before_a_crash(gmo_client, stub_gateway, tmp_path: Path, monkeypatch):
+    members = tmp_path / "members.csv"
+    members.write_text("member_id,name\nalice01,Alice\nbob0002,Bob\n")
+    failures = tmp_path / "failures.jsonl"
+
+    # Killed after GMO registered the batch but before it reached the local table
+    def killed(*args, **kwargs):
+        raise KeyboardInterrupt
+    with monkeypatch.context() as patch:
+        patch.setattr(Member.objects, "bulk_create", killed)
+        with pytest.raises(KeyboardInterrupt):
+            call_command("import_members", members)
+    assert stub_gateway.members == {gateway_member_id("alice01"), gateway_member_id("bob0002")}
+    assert not Member.objects.exists()
+
+    call_command("import_members", members, "--resume", "--failures", failures)
+    assert set(Member.objects.values_list("member_id", flat=True)) == {"alice01", "bob0002"}
+    assert failures.read_text() == ""
+    assert stub_gateway.request_counts["/api/member/inquiry"] == 2
+
+
+def test_import_still_fails_members_gmo_rejects(gmo_client, stub_gateway, tmp_path: Path):
+    members = tmp_path / "members.csv"
+    members.write_text("member_id,name\nalice01,Alice\n")
+    failures = tmp_path / "failures.jsonl"
+    stub_gateway.overrides["/api/member/create"] = EndpointBehaviour(error_rate=1.0, error_status=HTTPStatus.BAD_REQUEST)
+
+    call_command("import_members", members, "--failures", failures)
+    assert not Member.objects.exists()
+    assert '"member_id": "alice01"' in failures.read_text()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from rest_framework.test import APIClient
+
+from GMOPayment import order_status
+from GMOPayment.order_status import OrderStatusBoard
+
+
+ORDER = {"order": {"orderId": "order-1", "accessId": "access-1", "orderStatus": "CAPTURED"}}
+
+
+@pytest.fixture
+def webhook_secret(settings):
+    settings.GMO_PAYMENT = {**settings.GMO_PAYMENT, "webhook_secret": "s3cret"}
+    return "s3cret"
+
+
+def post_webhook(secret: str | None = None):
+    headers = {"HTTP_X_GMO_WEBHOOK_SECRET": secret} if secret is not None else {}
+    return APIClient().post("/webhooks/gmo", json.dumps(ORDER), content_type="application/json", **headers)
+
+
+def test_webhook_is_rejected_without_a_configured_secret(settings):
+    settings.GMO_PAYMENT = {**settings.GMO_PAYMENT, "webhook_secret": ""}
+    assert post_webhook("").status_code == 403
+    assert order_status.board.current("access-1") is None
+
+
+def test_webhook_checks_the_secret(webhook_secret):
+    assert post_webhook("wrong").status_code == 403
+    assert post_webhook(webhook_secret).status_code == 204
+    assert order_status.board.current("access-1").status == "CAPTURED"
+
+
+def test_waiters_are_woken_by_publish_without_polling(monkeypatch):
+    board = OrderStatusBoard()
+    reads = []
+    real_read = order_status._read
+
+    async def counting_read(access_id):
+        reads.append(access_id)
+        return await real_read(access_id)
+
+    monkeypatch.setattr(order_status, "_read", counting_read)
+
+    async def wait():
+        waiting = asyncio.ensure_future(board.wait_for_change("access-2", None, timeout=5, poll_interval=0.01))
+        await asyncio.sleep(0.1)
+        threading.Thread(target=board.publish, args=("access-2", "AUTHORIZED")).start()
+        return await waiting
+
+    state = asyncio.run(wait())
+    assert state.status == "AUTHORIZED"
+    # One read on entry; with the per-process cache the publish is handed over directly
+    assert reads == ["access-2"]
+
+
+def test_wait_times_out_when_nothing_changes():
+    state = asyncio.run(OrderStatusBoard().wait_for_change("access-3", None, timeout=0.05))
+    assert state is None
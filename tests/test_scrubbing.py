@@ -0,0 +1,53 @@
+import gzip
+import json
+from pathlib import Path
+import time
+
+import pytest
+import requests
+
+from GMOPayment.cassette import ReplayAdapter
+from GMOPayment.scrubbing import mask_pan, scrub
+
+
+@pytest.mark.parametrize(("text", "expected"), [
+    ("card 4111111111111111 declined", "card 411111******1111 declined"),
+    ("card 4111-1111-1111-1111", "card 4111-11**-****-1111"),
+    # Not Luhn-valid: order ids, timestamps and phone numbers stay readable
+    ("order 1234567890123 at 20250101123045", "order 1234567890123 at 20250101123045"),
+    ("4111111111111112", "4111111111111112"),
+    ("12345678901", "12345678901"),
+])
+def test_mask_pan_masks_luhn_valid_runs_only(text, expected):
+    assert mask_pan(text) == expected
+
+
+def test_card_number_keys_are_masked_whatever_the_checksum():
+    assert scrub({"cardNo": "4111111111111112", "orderId": "4111111111111111"}) == {
+        "cardNo": "411111******1112",
+        "orderId": "411111******1111",
+    }
+
+
+def write_cassette(path: Path, interactions: list[dict]) -> Path:
+    defaults = {"method": "POST", "request_body": None, "status": 200, "headers": {}, "body": "{}"}
+    path.write_bytes(gzip.compress("".join(json.dumps({**defaults, **i}) + "\n" for i in interactions).encode()))
+    return path
+
+
+def test_realtime_replay_keeps_recorded_arrival_offsets(tmp_path: Path):
+    cassette = write_cassette(tmp_path / "c.ndjson.gz", [
+        {"path": "/api/order/inquiry", "started_at": 100.0, "elapsed": 0.01},
+        {"path": "/api/order/inquiry", "started_at": 100.3, "elapsed": 0.01},
+    ])
+    session = requests.Session()
+    session.mount("http://", ReplayAdapter(cassette, realtime=True, loop=False))
+
+    started = time.monotonic()
+    session.post("http://gmo/api/order/inquiry")
+    first = time.monotonic() - started
+    session.post("http://gmo/api/order/inquiry")
+    second = time.monotonic() - started
+
+    assert first == pytest.approx(0.01, abs=0.05)
+    assert second == pytest.approx(0.31, abs=0.05)
@@ -0,0 +1,39 @@
+import os
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+import pytest
+
+from GMOPayment.tokens import FileTokenStore
+
+
+def test_file_store_creates_a_private_directory(tmp_path: Path):
+    store = FileTokenStore(tmp_path / "tokens")
+    assert (store.directory.stat().st_mode & 0o777) == 0o700
+    token = store.refresh("shop", None, lambda: ("token-1", 3600))
+    assert store.get("shop") == token
+
+
+def test_file_store_refuses_a_directory_others_can_access(tmp_path: Path):
+    directory = tmp_path / "tokens"
+    directory.mkdir(mode=0o700)
+    directory.chmod(0o777)
+    with pytest.raises(ImproperlyConfigured, match="accessible by other users"):
+        FileTokenStore(directory)
+
+
+def test_file_store_refuses_a_symlinked_directory(tmp_path: Path):
+    target = tmp_path / "elsewhere"
+    target.mkdir(mode=0o700)
+    (tmp_path / "tokens").symlink_to(target)
+    with pytest.raises(ImproperlyConfigured, match="not a directory"):
+        FileTokenStore(tmp_path / "tokens")
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason="needs root to hand the directory to another user")
+def test_file_store_refuses_a_directory_owned_by_another_user(tmp_path: Path):
+    directory = tmp_path / "tokens"
+    directory.mkdir(mode=0o700)
+    os.chown(directory, 65534, 65534)
+    with pytest.raises(ImproperlyConfigured, match="owned by uid 65534"):
+        FileTokenStore(directory)
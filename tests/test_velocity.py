@@ -0,0 +1,75 @@
+from django.core.cache import caches
+from django.test import RequestFactory
+import pytest
+
+from GMOPayment.exceptions import GMOTooManyRequests
+from GMOPayment.velocity import VelocityLimiter, VelocityPolicy, VelocityRule, client_ip
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    caches["default"].clear()
+
+
+def limiter(*rules: VelocityRule) -> VelocityLimiter:
+    return VelocityLimiter(VelocityPolicy(rules=rules))
+
+
+def test_wildcard_rule_counts_every_action_against_one_limit():
+    velocity = limiter(VelocityRule("*", "ip", 3, 60))
+    velocity.check("create_token", ip="10.0.0.1")
+    velocity.check("verify_card", ip="10.0.0.1")
+    velocity.check("charge", ip="10.0.0.1")
+    with pytest.raises(GMOTooManyRequests):
+        velocity.check("save_card", ip="10.0.0.1")
+    velocity.check("save_card", ip="10.0.0.2")
+
+
+def test_action_rule_only_counts_its_action():
+    velocity = limiter(VelocityRule("charge", "card", 1, 60))
+    velocity.check("charge", card="4111111111111111")
+    velocity.check("verify_card", card="4111111111111111")
+    with pytest.raises(GMOTooManyRequests):
+        velocity.check("charge", card="4111111111111111")
+
+
+def test_client_ip_uses_remote_addr_without_a_trusted_header(settings):
+    settings.GMO_PAYMENT = {**settings.GMO_PAYMENT, "client_ip_header": ""}
+    request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.9", HTTP_X_FORWARDED_FOR="1.2.3.4")
+    assert client_ip(request) == "10.0.0.9"
+
+
+@pytest.mark.parametrize(("forwarded", "proxies", "expected"), [
+    ("203.0.113.7", 1, "203.0.113.7"),
+    ("6.6.6.6, 203.0.113.7", 1, "203.0.113.7"),
+    ("6.6.6.6, 203.0.113.7, 10.0.0.2", 2, "203.0.113.7"),
+    ("203.0.113.7", 3, "203.0.113.7"),
+])
+def test_client_ip_reads_the_trusted_proxy_header(settings, forwarded, proxies, expected):
+    settings.GMO_PAYMENT = {
+        **settings.GMO_PAYMENT, "client_ip_header": "X-Forwarded-For", "trusted_proxy_count": proxies,
+    }
+    request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=forwarded)
+    assert client_ip(request) == expected
+
+
+def test_numeric_ids_count_with_their_string_form():
+    velocity = limiter(VelocityRule("charge", "member", 1, 60), VelocityRule("charge", "merchant", 2, 60))
+    velocity.check("charge", member=12345, merchant=777)
+    with pytest.raises(GMOTooManyRequests):
+        velocity.check("charge", member="12345")
+    velocity.check("charge", member=0, merchant="777")
+    with pytest.raises(GMOTooManyRequests):
+        velocity.check("charge", merchant=777)
+
+
+def test_charge_with_numeric_member_and_merchant_ids_is_limited_not_crashed(client, monkeypatch):
+    # A limit of 0 rejects before any gateway call, after both ids have been fingerprinted
+    rules = (VelocityRule("charge", "member", 0, 60), VelocityRule("charge", "merchant", 0, 60))
+    monkeypatch.setattr("GMOPayment.velocity.get_limiter", lambda: limiter(*rules))
+    response = client.post(
+        "/transactions/credit/on-file/charge",
+        {"order_id": "ORDER-1", "member_id": 12345, "card_id": "0", "merchant_id": 777},
+        content_type="application/json",
+    )
+    assert response.status_code == 429